@@ -0,0 +1,354 @@
+#!/usr/bin/env python
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Time the compensation code and compare the results to a baseline.
+
+Examples of use::
+
+    # Time everything and save the results
+    run_benchmarks.py --output baseline.json
+
+    # After changing the code: time everything again
+    # and report regressions of more than 20%
+    run_benchmarks.py --output new.json --compare baseline.json
+
+    # Compare two saved results, without running anything
+    run_benchmarks.py --compare baseline.json --results new.json
+
+    # Only time polynomial orders 1 and 15 of the RangedPolynomial benchmarks
+    run_benchmarks.py --orders 1 15 --match ranged_polynomial
+
+The exit status is 1 if any regressions are found, else 0.
+See README.rst for more information.
+"""
+import argparse
+import datetime
+import json
+import platform
+import re
+import sys
+import timeit
+
+import numpy as np
+
+from lsst.ts import mthexapod
+
+# Polynomial orders to time, by default.
+# Order N means N+1 coefficients.
+DEFAULT_ORDERS = tuple(range(1, 16))
+
+# Number of values in each array input.
+ARRAY_SIZE = 1000
+
+# Default fractional increase in time that counts as a regression.
+DEFAULT_THRESHOLD = 0.2
+
+
+def make_coeffs(order, scale):
+    """Make coefficients for a polynomial or Fourier series.
+
+    Parameters
+    ----------
+    order : `int`
+        Polynomial order; the number of coefficients is ``order + 1``.
+    scale : `float`
+        Scale of the coefficients.
+    """
+    return [scale / (i + 1) for i in range(order + 1)]
+
+
+def make_compensation(order, model):
+    """Make a `Compensation` with all coefficients of the specified order.
+
+    Parameters
+    ----------
+    order : `int`
+        Polynomial order; the number of coefficients is ``order + 1``.
+    model : `str`
+        Model for azimuth and rotation; one of `MODEL_NAMES`.
+    """
+    coeffs = [make_coeffs(order, scale=0.1 * (i + 1)) for i in range(6)]
+    return mthexapod.Compensation(
+        elevation_coeffs=coeffs,
+        azimuth_coeffs=coeffs,
+        rotation_coeffs=coeffs,
+        temperature_coeffs=coeffs,
+        min_temperature=-20,
+        max_temperature=25,
+        azimuth_model=model,
+        rotation_model=model,
+    )
+
+
+def make_benchmarks(orders):
+    """Make the benchmarks.
+
+    Parameters
+    ----------
+    orders : `list` [`int`]
+        Polynomial orders to time.
+
+    Returns
+    -------
+    benchmarks : `dict` [`str`, callable]
+        Dict of benchmark name: function to time.
+    """
+    rng = np.random.default_rng(seed=37)
+    elevation = rng.uniform(0, 90, ARRAY_SIZE)
+    azimuth = rng.uniform(0, 360, ARRAY_SIZE)
+    rotation = rng.uniform(-90, 90, ARRAY_SIZE)
+    temperature = rng.uniform(-30, 35, ARRAY_SIZE)
+    inputs = mthexapod.CompensationInputs(
+        elevation=45, azimuth=120, rotation=-20, temperature=10
+    )
+
+    benchmarks = dict()
+    benchmarks["compensation_inputs/scalar"] = lambda: mthexapod.CompensationInputs(
+        elevation=45, azimuth=400, rotation=-200, temperature=10
+    )
+    for order in orders:
+        for model in mthexapod.MODEL_NAMES:
+            compensation = make_compensation(order=order, model=model)
+            benchmarks[
+                f"compensation_{model}/scalar/order={order}"
+            ] = lambda compensation=compensation: compensation.get_offset(inputs)
+            benchmarks[
+                f"compensation_{model}/array/order={order}"
+            ] = lambda compensation=compensation: compensation.get_offsets(
+                elevation=elevation,
+                azimuth=azimuth,
+                rotation=rotation,
+                temperature=temperature,
+            )
+
+        polynomial = mthexapod.RangedPolynomial(
+            coeffs=make_coeffs(order, scale=1), min_x=-20, max_x=25
+        )
+        benchmarks[
+            f"ranged_polynomial/scalar/order={order}"
+        ] = lambda polynomial=polynomial: polynomial(10.0)
+        benchmarks[
+            f"ranged_polynomial/array/order={order}"
+        ] = lambda polynomial=polynomial: polynomial(temperature)
+
+        fourier_series = mthexapod.FourierSeries(coeffs=make_coeffs(order, scale=1))
+        benchmarks[
+            f"fourier_series/scalar/order={order}"
+        ] = lambda fourier_series=fourier_series: fourier_series(120.0)
+        benchmarks[
+            f"fourier_series/array/order={order}"
+        ] = lambda fourier_series=fourier_series: fourier_series(azimuth)
+    return benchmarks
+
+
+def time_function(func, repeat, min_time):
+    """Time a function.
+
+    Parameters
+    ----------
+    func : callable
+        Function to time; called with no arguments.
+    repeat : `int`
+        Number of timing runs.
+    min_time : `float`
+        Minimum duration of each timing run (seconds).
+
+    Returns
+    -------
+    result : `dict`
+        Timing results: the minimum, median, and maximum time per call
+        (seconds) over all runs, the number of calls per run,
+        and the number of runs.
+    """
+    timer = timeit.Timer(func)
+    number, duration = timer.autorange()
+    number = max(number, int(np.ceil(number * min_time / duration)))
+    times = np.array(timer.repeat(repeat=repeat, number=number)) / number
+    return dict(
+        min=float(times.min()),
+        median=float(np.median(times)),
+        max=float(times.max()),
+        number=number,
+        repeat=repeat,
+    )
+
+
+def get_metadata():
+    """Get information about the environment in which
+    the benchmarks were run.
+    """
+    return dict(
+        date=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        mthexapod_version=mthexapod.__version__,
+        numpy_version=np.__version__,
+        python_version=platform.python_version(),
+        platform=platform.platform(),
+        processor=platform.processor(),
+    )
+
+
+def compare_results(baseline, results, threshold):
+    """Compare benchmark results to a baseline.
+
+    Uses the minimum time per call, which is the least noisy statistic.
+
+    Parameters
+    ----------
+    baseline : `dict`
+        Baseline benchmark data, as saved by this script.
+    results : `dict`
+        New benchmark data, as saved by this script.
+    threshold : `float`
+        Fractional increase in time that counts as a regression.
+
+    Returns
+    -------
+    regressions : `list` [`str`]
+        Names of benchmarks that regressed.
+    """
+    regressions = []
+    baseline_results = baseline["results"]
+    new_results = results["results"]
+    names = [name for name in new_results if name in baseline_results]
+    if not names:
+        print("No benchmarks in common with the baseline")
+        return regressions
+    name_len = max(len(name) for name in names)
+    print(f"{'benchmark':{name_len}}  baseline (us)   new (us)   ratio")
+    for name in names:
+        old_time = baseline_results[name]["min"]
+        new_time = new_results[name]["min"]
+        ratio = new_time / old_time
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        elif ratio < 1 - threshold:
+            flag = "  improvement"
+        else:
+            flag = ""
+        print(
+            f"{name:{name_len}}  {old_time*1e6:13.3f} {new_time*1e6:10.3f} "
+            f"{ratio:7.3f}{flag}"
+        )
+    for label, missing_names in (
+        ("not in the baseline", set(new_results) - set(baseline_results)),
+        (
+            "in the baseline but not the new results",
+            set(baseline_results) - set(new_results),
+        ),
+    ):
+        if missing_names:
+            print(f"Benchmarks {label}: {sorted(missing_names)}")
+    if regressions:
+        print(f"{len(regressions)} regression(s) greater than {threshold:.0%}")
+    else:
+        print(f"No regressions greater than {threshold:.0%}")
+    return regressions
+
+
+def main(args=None):
+    """Run the benchmarks and/or compare the results to a baseline.
+
+    Parameters
+    ----------
+    args : `list` [`str`], optional
+        Command-line arguments; if None then use `sys.argv`.
+
+    Returns
+    -------
+    status : `int`
+        Exit status: 1 if there are regressions, else 0.
+    """
+    parser = argparse.ArgumentParser(
+        description="Time the compensation code and compare to a baseline."
+    )
+    parser.add_argument("--output", help="Save the results to this JSON file.")
+    parser.add_argument(
+        "--compare", help="Baseline JSON file to which to compare the results."
+    )
+    parser.add_argument(
+        "--results",
+        help="Results JSON file to compare to the baseline. "
+        "If specified then do not run the benchmarks.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Fractional increase in time that counts as a regression.",
+    )
+    parser.add_argument(
+        "--orders",
+        type=int,
+        nargs="+",
+        default=DEFAULT_ORDERS,
+        help="Polynomial orders to time. Order N means N+1 coefficients.",
+    )
+    parser.add_argument(
+        "--match", help="Only run benchmarks whose name matches this regex."
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Number of timing runs per benchmark."
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.05,
+        help="Minimum duration of each timing run (seconds).",
+    )
+    namespace = parser.parse_args(args)
+    if namespace.results is not None and namespace.compare is None:
+        parser.error("--results requires --compare")
+
+    if namespace.results is None:
+        benchmarks = make_benchmarks(orders=namespace.orders)
+        if namespace.match is not None:
+            pattern = re.compile(namespace.match)
+            benchmarks = {
+                name: func for name, func in benchmarks.items() if pattern.search(name)
+            }
+        results = dict(metadata=get_metadata(), results=dict())
+        for name, func in benchmarks.items():
+            result = time_function(
+                func, repeat=namespace.repeat, min_time=namespace.min_time
+            )
+            results["results"][name] = result
+            print(f"{name}: {result['min']*1e6:0.3f} us")
+        if namespace.output is not None:
+            with open(namespace.output, "w") as f:
+                json.dump(results, f, indent=2)
+    else:
+        with open(namespace.results, "r") as f:
+            results = json.load(f)
+
+    if namespace.compare is not None:
+        with open(namespace.compare, "r") as f:
+            baseline = json.load(f)
+        regressions = compare_results(
+            baseline=baseline, results=results, threshold=namespace.threshold
+        )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""Compute hexapod compensation and actuator lengths on a sky grid.
+
+To use:
+
+run_sky_grid.py config.yaml 1 camera_grid.npz  # For the Camera MTHexapod
+
+Run with --help for more information.
+"""
+from lsst.ts import mthexapod
+
+mthexapod.run_sky_grid()
@@ -11,9 +11,10 @@ You can change matplotlib's backend by editing the code.
 The data format is explained in the README file.
 """
 import argparse
-import itertools
+import importlib.util
 import pdb
 import math
+import pathlib
 
 import numpy as np
 import matplotlib
@@ -24,6 +25,24 @@ matplotlib.use("Qt5Agg")
 
 import matplotlib.pyplot as plt  # noqa
 
+# Use the CSC's Fourier series code, so fits match what the CSC computes.
+# Load the module directly, rather than importing lsst.ts.mthexapod,
+# because the package requires ts_salobj and OpenSplice;
+# fourier_series.py only requires numpy.
+_fourier_series_path = (
+    pathlib.Path(__file__).resolve().parents[1]
+    / "python"
+    / "lsst"
+    / "ts"
+    / "mthexapod"
+    / "fourier_series.py"
+)
+_fourier_series_spec = importlib.util.spec_from_file_location(
+    "fourier_series", _fourier_series_path
+)
+fourier_series = importlib.util.module_from_spec(_fourier_series_spec)
+_fourier_series_spec.loader.exec_module(fourier_series)
+
 RAD_PER_DEG = math.pi / 180.0
 
 # Allowed names for the cause being compensated for
@@ -93,24 +112,12 @@ def poly(x, *coeffs):
     return poly(x)
 
 
-def return_one(data):
-    return 1
-
-
 def fourier(ang, *coeffs):
     """Real-valued Fourier series with ang in degrees.
 
     f(ang) = C0 + C1 sin(ang) + C2 cos(ang) + C3 sin(2 ang) + C4 cos(2 ang) ...
     """
-    function_iter = itertools.cycle([np.sin, np.cos])
-    functions = [return_one] + [next(function_iter) for i in range(len(coeffs) - 1)]
-    # Angle multipliers for C0, C1, C2, C3
-    angle_multipliers = [((i + 1) // 2) * RAD_PER_DEG for i in range(len(coeffs))]
-
-    result = 0
-    for coeff, function, angle_multiplier in zip(coeffs, functions, angle_multipliers):
-        result += coeff * function(ang * angle_multiplier)
-    return result
+    return fourier_series.fourier_design_matrix(ang, len(coeffs)) @ np.array(coeffs)
 
 
 def fit_one(data, cause, axis, model, ncoeffs):
@@ -25,11 +25,21 @@ from .enums import *
 from .fourier_series import *
 from .ranged_polynomial import *
 from .compensation import *
+from .compensation_cache import *
+from .compensation_grid import *
+from .compensation_model_cache import *
+from .compensation_config_watcher import *
+from .deadline_scheduler import *
+from .latency_recorder import *
+from .temperature_source import *
 from .structs import *
+from .lookup_table import *
 from .utils import *
 from .hexapod_commander import *
 from .simple_hexapod import *
 from .mock_controller import *
+from .sky_grid import *
+from .night_replay import *
 from .hexapod_csc import *
 
 try:
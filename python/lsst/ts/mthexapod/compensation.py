@@ -18,17 +18,215 @@
 #
 # You should have received a copy of the GNU General Public License
 
-__all__ = ["Compensation"]
+__all__ = ["CAUSE_NAMES", "MODEL_NAMES", "BaseCompensation", "Compensation"]
 
 import numpy as np
 
-from .ranged_polynomial import RangedPolynomial
 from . import base
+from . import fourier_series
 
 NUM_AXES = 6  # x, y, z, u, v, w
 
+# Names of the inputs to the compensation model, in the order used
+# for the first axis of `Compensation.coeffs`.
+CAUSE_NAMES = ("elevation", "azimuth", "rotation", "temperature")
+TEMPERATURE_INDEX = CAUSE_NAMES.index("temperature")
 
-class Compensation:
+# Names of the models that may be used for azimuth and rotation.
+MODEL_NAMES = ("polynomial", "fourier")
+
+# Offsets used to wrap azimuth to [0, 360) and rotation to [-180, 180).
+_WRAP_OFFSETS = np.array([[0], [180]], dtype=float)
+
+
+class BaseCompensation:
+    """Base class for compensation models.
+
+    Subclasses must override `_compute_offsets`, and may override
+    `_compute_jacobian` to support `get_jacobian`.
+    """
+
+    def get_offset(self, inputs):
+        """Get compensation offset.
+
+        Parameters
+        ----------
+        inputs : `CompensationInputs`
+            Inputs for the compensation model.
+
+        Returns
+        -------
+        offset : `Position`
+            Compensation offsets, such that::
+
+                compensated position = uncompensated position + offset.
+
+        Raises
+        ------
+        ValueError
+            If elevation not in range [0, 90].
+        """
+        offsets = self.get_offsets(
+            elevation=inputs.elevation,
+            azimuth=inputs.azimuth,
+            rotation=inputs.rotation,
+            temperature=inputs.temperature,
+        )
+        return base.Position(*[float(value) for value in offsets[0]])
+
+    def get_offsets(self, elevation, azimuth, rotation, temperature):
+        """Get compensation offsets for many sets of inputs at once.
+
+        The inputs are broadcast against each other, so any of them
+        may be a scalar. Azimuth and rotation are wrapped in the same way
+        as `CompensationInputs`.
+
+        Parameters
+        ----------
+        elevation : `float` or `numpy.ndarray`
+            Telescope elevation (deg). Must be in range [0, 90].
+        azimuth : `float` or `numpy.ndarray`
+            Telescope azimuth (deg).
+        rotation : `float` or `numpy.ndarray`
+            Camera rotation angle (deg).
+        temperature : `float` or `numpy.ndarray`
+            Ambient temperature (C).
+
+        Returns
+        -------
+        offsets : `numpy.ndarray`
+            Compensation offsets as an array of shape (N, 6),
+            where N is the number of input sets and the columns are
+            x, y, z (um), u, v, w (deg).
+
+        Raises
+        ------
+        ValueError
+            If any elevation is not in range [0, 90].
+        """
+        inputs = self._get_input_array(
+            elevation=elevation,
+            azimuth=azimuth,
+            rotation=rotation,
+            temperature=temperature,
+        )
+        return self._compute_offsets(inputs)
+
+    def get_jacobian(self, elevation, azimuth, rotation, temperature):
+        """Get the derivatives of the compensation offsets
+        with respect to each input.
+
+        The inputs are handled as for `get_offsets`.
+
+        Parameters
+        ----------
+        elevation : `float` or `numpy.ndarray`
+            Telescope elevation (deg). Must be in range [0, 90].
+        azimuth : `float` or `numpy.ndarray`
+            Telescope azimuth (deg).
+        rotation : `float` or `numpy.ndarray`
+            Camera rotation angle (deg).
+        temperature : `float` or `numpy.ndarray`
+            Ambient temperature (C).
+
+        Returns
+        -------
+        jacobian : `numpy.ndarray`
+            Jacobian as an array of shape (N, 6, 4), where N is the number
+            of input sets, the middle axis is the offset for x, y, z (um),
+            u, v, w (deg), and the last axis is the input, in the order
+            given by ``CAUSE_NAMES``. Units are offset units per deg
+            for elevation, azimuth and rotation, and per C for temperature.
+            Thus, for small changes in the inputs::
+
+                change in offsets ~= jacobian @ change in inputs
+
+        Raises
+        ------
+        ValueError
+            If any elevation is not in range [0, 90].
+        """
+        inputs = self._get_input_array(
+            elevation=elevation,
+            azimuth=azimuth,
+            rotation=rotation,
+            temperature=temperature,
+        )
+        return self._compute_jacobian(inputs)
+
+    def _compute_offsets(self, inputs):
+        """Compute compensation offsets.
+
+        Parameters
+        ----------
+        inputs : `numpy.ndarray`
+            Compensation inputs, as returned by `_get_input_array`.
+
+        Returns
+        -------
+        offsets : `numpy.ndarray`
+            Compensation offsets as an array of shape (N, 6);
+            see `get_offsets` for details.
+        """
+        raise NotImplementedError("Subclasses must override")
+
+    def _compute_jacobian(self, inputs):
+        """Compute the Jacobian of the compensation offsets.
+
+        Parameters
+        ----------
+        inputs : `numpy.ndarray`
+            Compensation inputs, as returned by `_get_input_array`.
+
+        Returns
+        -------
+        jacobian : `numpy.ndarray`
+            Jacobian as an array of shape (N, 6, 4);
+            see `get_jacobian` for details.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support computing the Jacobian"
+        )
+
+    def _get_input_array(self, elevation, azimuth, rotation, temperature):
+        """Check, wrap, and broadcast compensation inputs.
+
+        Returns
+        -------
+        inputs : `numpy.ndarray`
+            Inputs as an array of shape (N, 4), where the columns are
+            elevation, azimuth, rotation, and temperature (in the order
+            given by ``CAUSE_NAMES``). Azimuth is wrapped to [0, 360)
+            and rotation to [-180, 180).
+
+        Raises
+        ------
+        ValueError
+            If any elevation is not in range [0, 90].
+        """
+        try:
+            # Fast path for the common cases: all scalars, or all arrays
+            # of the same shape.
+            inputs = np.array(
+                (elevation, azimuth, rotation, temperature), dtype=float
+            ).reshape(len(CAUSE_NAMES), -1)
+        except ValueError:
+            inputs = np.array(
+                np.broadcast_arrays(elevation, azimuth, rotation, temperature),
+                dtype=float,
+            ).reshape(len(CAUSE_NAMES), -1)
+        elevation = inputs[0]
+        if np.any((elevation < 0) | (elevation > 90)):
+            raise ValueError(f"elevation={elevation} must be in range [0, 90]")
+        # Wrap azimuth to [0, 360) and rotation to [-180, 180)
+        angles = inputs[1:3]
+        angles += _WRAP_OFFSETS
+        np.mod(angles, 360, out=angles)
+        angles -= _WRAP_OFFSETS
+        return inputs.T
+
+
+class Compensation(BaseCompensation):
     """Compute hexapod compensation for elevation, azimuth, camera rotation,
     and temperature.
 
@@ -53,8 +251,10 @@ class Compensation:
 
     azimuth_coeffs  : `list` [`list` [`float`]]
         Azimuth coefficients, with the same format as ``elevation_coeffs``.
+        The model is specified by ``azimuth_model``.
     rotation_coeffs  : `list` [`list` [`float`]]
         Rotation coefficients, with the same format as ``elevation_coeffs``.
+        The model is specified by ``rotation_model``.
     temperature_coeffs  : `list` [`list` [`float`]]
         Temperature `RangedPolynomial` coefficients, with the same format
         as ``elevation_coeffs``.
@@ -62,13 +262,75 @@ class Compensation:
         Minimum temperature for which ``temperature_coeffs`` is valid.
     max_temperature : `float`
         Maximum temperature for which ``temperature_coeffs`` is valid.
+    azimuth_model : `str`, optional
+        Model for azimuth compensation; one of ``MODEL_NAMES``:
+
+        * "polynomial": a polynomial C0 + C1 az + C2 az^2 + ...
+        * "fourier": a `FourierSeries`
+          C0 + C1 sin(az) + C2 cos(az) + C3 sin(2 az) + ...
+    rotation_model : `str`, optional
+        Model for rotation compensation; one of ``MODEL_NAMES``.
+    cross_terms : `list` [`dict`], optional
+        Terms that depend on two causes at once, e.g. gravity sag
+        that depends on temperature. Each term is a dict with items:
+
+        * causes: the names of two different causes, from ``CAUSE_NAMES``.
+        * coeffs: coefficients for x, y, z, u, v, w: a sequence of 6
+          2-dimensional arrays (lists of lists). Element [i][j] of each
+          array is the coefficient of the product of basis function i+1
+          of the first cause and basis function j+1 of the second cause.
+
+        The basis functions of a cause are those of its 1-dimensional
+        model: 1, x, x^2, ... for a polynomial, or 1, sin(x), cos(x),
+        sin(2 x), ... for a Fourier series. The constant basis function
+        is omitted from cross terms because its products with the other
+        cause are already part of the 1-dimensional models.
+        Here is an example of a cross term with coefficients of
+        elevation * temperature and elevation^2 * temperature::
+
+            dict(
+                causes=["elevation", "temperature"],
+                coeffs=[[[0]], [[0.1], [0.01]], [[0]], [[0]], [[0]], [[0]]],
+            )
 
     Raises
     ------
     ValueError
         If ``elevation_coeffs``, ``azimuth_coeffs``, ``rotation_coeffs``,
         or ``temperature_coeffs`` is not a sequence of 6 items,
-        or if any item is not a sequence of floats with at least 1 element.
+        or if any item is not a sequence of floats with at least 1 element,
+        or if ``min_temperature >= max_temperature``,
+        or if ``azimuth_model`` or ``rotation_model``
+        is not one of ``MODEL_NAMES``,
+        or if any item in ``cross_terms`` is invalid.
+
+    Notes
+    -----
+    The coefficients are compiled into a single zero-padded array
+    `coeffs` with shape (4, 6, K), where the first axis is the cause
+    (in the order given by ``CAUSE_NAMES``), the second axis is x, y, z,
+    u, v, w, and K is the largest number of coefficients for any cause
+    and axis. All polynomial causes and axes are evaluated together
+    with one pass of Horner's method. Fourier series causes are evaluated
+    separately, as the product of a `fourier_design_matrix`
+    and the coefficients.
+
+    Azimuth and rotation are periodic, so a Fourier series typically
+    needs far fewer terms than a polynomial to fit them.
+
+    The temperature model is a `RangedPolynomial`, which is evaluated as
+    the polynomial at the temperature clipped to
+    [min_temperature, max_temperature], plus C1 times the amount
+    by which the temperature was clipped.
+
+    Cross terms are evaluated together, with no loops over inputs:
+    the basis functions of each cause are evaluated as Vandermonde-like
+    matrices, the outer products of the matrices for each term are
+    concatenated into one design matrix, and the offsets are the product
+    of the design matrix and the cross-term coefficients.
+    Cross terms use the temperature clipped to
+    [min_temperature, max_temperature], so they are constant
+    in temperature outside that range.
     """
 
     def __init__(
@@ -80,56 +342,402 @@ class Compensation:
         temperature_coeffs,
         min_temperature,
         max_temperature,
+        azimuth_model="polynomial",
+        rotation_model="polynomial",
+        cross_terms=(),
     ):
-        for name, coeffs in (
-            ("elevation", elevation_coeffs),
-            ("azimuth", azimuth_coeffs),
-            ("rotation", rotation_coeffs),
-            ("temperature", temperature_coeffs),
-        ):
-            if len(coeffs) != 6:
+        cause_coeffs = (
+            elevation_coeffs,
+            azimuth_coeffs,
+            rotation_coeffs,
+            temperature_coeffs,
+        )
+        for name, coeffs in zip(CAUSE_NAMES, cause_coeffs):
+            if len(coeffs) != NUM_AXES:
                 raise ValueError(f"{name}={coeffs} must be 6 lists of coefficients")
+            for axis_coeffs in coeffs:
+                if len(axis_coeffs) < 1:
+                    raise ValueError(
+                        f"{name}={coeffs}: each list must contain at least one element"
+                    )
+        if min_temperature >= max_temperature:
+            raise ValueError(
+                f"min_temperature {min_temperature} >= "
+                f"max_temperature {max_temperature}"
+            )
+        for name, model in (
+            ("azimuth_model", azimuth_model),
+            ("rotation_model", rotation_model),
+        ):
+            if model not in MODEL_NAMES:
+                raise ValueError(f"{name}={model!r} must be one of {MODEL_NAMES}")
+        self.min_temperature = min_temperature
+        self.max_temperature = max_temperature
+        self.azimuth_model = azimuth_model
+        self.rotation_model = rotation_model
 
-            if name != "temperature":
-                setattr(
-                    self,
-                    f"{name}_polys",
-                    [np.polynomial.Polynomial(coeffs[i]) for i in range(NUM_AXES)],
-                )
-        self.temperature_polys = [
-            RangedPolynomial(
-                coeffs=temperature_coeffs[i],
-                min_x=min_temperature,
-                max_x=max_temperature,
+        ncoeffs = max(
+            len(axis_coeffs) for coeffs in cause_coeffs for axis_coeffs in coeffs
+        )
+        # Temperature coefficients must have at least two elements (C0, C1)
+        # so the linear extrapolation coefficient is always available.
+        ncoeffs = max(ncoeffs, 2)
+        self.coeffs = np.zeros((len(CAUSE_NAMES), NUM_AXES, ncoeffs), dtype=float)
+        for i, coeffs in enumerate(cause_coeffs):
+            for j, axis_coeffs in enumerate(coeffs):
+                self.coeffs[i, j, : len(axis_coeffs)] = axis_coeffs
+
+        # Indices of the causes modeled as Fourier series. Zero their rows
+        # in the coefficients used for Horner's method, so that pass
+        # contributes nothing for these causes.
+        self._fourier_indices = [
+            CAUSE_NAMES.index(name)
+            for name, model in (
+                ("azimuth", azimuth_model),
+                ("rotation", rotation_model),
             )
-            for i in range(NUM_AXES)
+            if model == "fourier"
         ]
+        self._polynomial_coeffs = self.coeffs.copy()
+        self._polynomial_coeffs[self._fourier_indices] = 0
+        # Coefficients of the derivatives of the polynomials: k Ck.
+        self._derivative_coeffs = self._polynomial_coeffs[:, :, 1:] * np.arange(
+            1, ncoeffs
+        )
 
-    def get_offset(self, inputs):
-        """Get compensation offset.
+        # Cross terms, as a list of (cause indices, coefficients) tuples,
+        # where coefficients is a zero-padded array of shape (n1, n2, 6).
+        self._cross_terms = []
+        for term in cross_terms:
+            self._cross_terms.append(self._compile_cross_term(term))
+        # Coefficients of all cross terms, with shape (M, 6),
+        # in the order of the columns of `_get_cross_design_matrix`.
+        if self._cross_terms:
+            self._cross_coeffs = np.concatenate(
+                [coeffs.reshape(-1, NUM_AXES) for _, coeffs in self._cross_terms]
+            )
+        else:
+            self._cross_coeffs = np.zeros((0, NUM_AXES))
+
+    @property
+    def has_cross_terms(self):
+        """Does the model have any cross terms?"""
+        return len(self._cross_terms) > 0
+
+    @classmethod
+    def from_config(cls, config):
+        """Construct a `Compensation` from CSC configuration.
 
         Parameters
         ----------
-        inputs : `CompensationInputs`
-            Inputs for the compensation model.
+        config : `dict`
+            The ``camera_config`` or ``m2_config`` section
+            of the validated CSC configuration.
 
         Returns
         -------
-        offset : `Position`
-            Compensation offsets, such that::
+        compensation : `Compensation`
+            The compensation model.
+        """
+        return cls(
+            elevation_coeffs=config["elevation_coeffs"],
+            azimuth_coeffs=config["azimuth_coeffs"],
+            rotation_coeffs=config["rotation_coeffs"],
+            temperature_coeffs=config["temperature_coeffs"],
+            min_temperature=config["min_temperature"],
+            max_temperature=config["max_temperature"],
+            azimuth_model=config["azimuth_model"],
+            rotation_model=config["rotation_model"],
+            cross_terms=config.get("cross_terms", ()),
+        )
 
-                compensated position = uncompensated position + offset.
+    def get_cause_offsets(self, cause, values):
+        """Get the compensation offsets due to a single cause.
+
+        Parameters
+        ----------
+        cause : `str`
+            Name of cause; one of ``CAUSE_NAMES``.
+        values : `float` or `numpy.ndarray`
+            Values of the cause, e.g. elevation (deg) if cause="elevation".
+
+        Returns
+        -------
+        offsets : `numpy.ndarray`
+            Compensation offsets as an array of shape (N, 6),
+            where N is the number of values and the columns are
+            x, y, z (um), u, v, w (deg).
+            The offsets include the constant (C0) term for this cause,
+            so the sum of the offsets for each cause is the total offset,
+            unless there are cross terms (which are not included).
 
         Raises
         ------
         ValueError
-            If elevation not in range [0, 90].
+            If ``cause`` is not one of ``CAUSE_NAMES``,
+            or if cause="elevation" and any value is not in range [0, 90].
         """
-        offsets = [
-            self.elevation_polys[i](inputs.elevation)
-            + self.azimuth_polys[i](inputs.azimuth)
-            + self.rotation_polys[i](inputs.rotation)
-            + self.temperature_polys[i](inputs.temperature)
-            for i in range(NUM_AXES)
+        if cause not in CAUSE_NAMES:
+            raise ValueError(f"cause={cause!r} must be one of {CAUSE_NAMES}")
+        input_kwargs = {name: 0 for name in CAUSE_NAMES}
+        input_kwargs[cause] = values
+        inputs = self._get_input_array(**input_kwargs)
+        return self._get_cause_offsets(inputs)[:, CAUSE_NAMES.index(cause), :]
+
+    def _compute_offsets(self, inputs):
+        offsets = self._get_cause_offsets(inputs).sum(axis=1)
+        if self._cross_terms:
+            offsets += self._get_cross_design_matrix(inputs) @ self._cross_coeffs
+        return offsets
+
+    def _compute_jacobian(self, inputs):
+        """Compute the Jacobian of the compensation offsets.
+
+        Polynomials are differentiated analytically, using Horner's method
+        on the derivative coefficients k Ck. Outside the valid temperature
+        range the temperature model is linear, so its derivative is C1.
+        """
+        x, temperature, clipped_temperature = self._get_horner_inputs(inputs)
+
+        cause_derivatives = np.empty((len(inputs), len(CAUSE_NAMES), NUM_AXES))
+        cause_derivatives[:] = self._derivative_coeffs[:, :, -1]
+        for k in range(self._derivative_coeffs.shape[-1] - 2, -1, -1):
+            cause_derivatives *= x
+            cause_derivatives += self._derivative_coeffs[:, :, k]
+        out_of_range = temperature != clipped_temperature
+        cause_derivatives[out_of_range, TEMPERATURE_INDEX, :] = self.coeffs[
+            TEMPERATURE_INDEX, :, 1
         ]
-        return base.Position(*offsets)
+        for i in self._fourier_indices:
+            derivative_matrix = fourier_series.fourier_derivative_matrix(
+                inputs[:, i], self.coeffs.shape[-1]
+            )
+            cause_derivatives[:, i, :] = derivative_matrix @ self.coeffs[i].T
+        jacobian = cause_derivatives.transpose(0, 2, 1)
+
+        # Product rule: d(f(x1) g(x2))/dx1 = f'(x1) g(x2), and similarly
+        # for x2. Cross terms use clipped temperature,
+        # so their derivative is 0 outside the temperature range.
+        for (index1, index2), coeffs in self._cross_terms:
+            basis1, derivative1 = self._get_cross_basis(
+                inputs, x, index1, coeffs.shape[0], derivative=True
+            )
+            basis2, derivative2 = self._get_cross_basis(
+                inputs, x, index2, coeffs.shape[1], derivative=True
+            )
+            flat_coeffs = coeffs.reshape(-1, NUM_AXES)
+            for index, design_matrix in (
+                (index1, _outer_rows(derivative1, basis2)),
+                (index2, _outer_rows(basis1, derivative2)),
+            ):
+                derivative = design_matrix @ flat_coeffs
+                if index == TEMPERATURE_INDEX:
+                    derivative[out_of_range] = 0
+                jacobian[:, :, index] += derivative
+        return jacobian
+
+    def _compile_cross_term(self, term):
+        """Check a cross term and convert it to internal form.
+
+        Parameters
+        ----------
+        term : `dict`
+            Cross term; see the ``cross_terms`` constructor argument.
+
+        Returns
+        -------
+        cause_indices : `tuple` [`int`, `int`]
+            Indices of the two causes, in ``CAUSE_NAMES``.
+        coeffs : `numpy.ndarray`
+            Coefficients, zero-padded to shape (n1, n2, 6).
+
+        Raises
+        ------
+        ValueError
+            If the term is invalid.
+        """
+        causes = term["causes"]
+        if len(causes) != 2 or causes[0] == causes[1]:
+            raise ValueError(f"cross term causes={causes} must be two different causes")
+        for cause in causes:
+            if cause not in CAUSE_NAMES:
+                raise ValueError(
+                    f"cross term causes={causes}: {cause!r} not in {CAUSE_NAMES}"
+                )
+        axis_coeffs_list = term["coeffs"]
+        if len(axis_coeffs_list) != NUM_AXES:
+            raise ValueError(
+                f"cross term coeffs={axis_coeffs_list} must be 6 arrays of coefficients"
+            )
+        shapes = []
+        for axis_coeffs in axis_coeffs_list:
+            row_lengths = [len(row) for row in axis_coeffs]
+            if not row_lengths or min(row_lengths) < 1:
+                raise ValueError(
+                    f"cross term coeffs={axis_coeffs_list}: "
+                    "each array must have at least one row and column"
+                )
+            shapes.append((len(row_lengths), max(row_lengths)))
+        coeffs = np.zeros(
+            (
+                max(shape[0] for shape in shapes),
+                max(shape[1] for shape in shapes),
+                NUM_AXES,
+            )
+        )
+        for axis, axis_coeffs in enumerate(axis_coeffs_list):
+            for i, row in enumerate(axis_coeffs):
+                coeffs[i, : len(row), axis] = row
+        return (CAUSE_NAMES.index(causes[0]), CAUSE_NAMES.index(causes[1])), coeffs
+
+    def _get_cross_basis(self, inputs, x, cause_index, nbasis, derivative=False):
+        """Evaluate the basis functions of one cause of a cross term.
+
+        Parameters
+        ----------
+        inputs : `numpy.ndarray`
+            Compensation inputs, as returned by `_get_input_array`.
+        x : `numpy.ndarray`
+            Clipped inputs, as returned by `_get_horner_inputs`.
+        cause_index : `int`
+            Index of the cause in ``CAUSE_NAMES``.
+        nbasis : `int`
+            Number of basis functions to evaluate,
+            omitting the constant function.
+        derivative : `bool`, optional
+            Also compute the derivatives of the basis functions?
+
+        Returns
+        -------
+        basis : `numpy.ndarray`
+            Basis functions, with shape (N, nbasis).
+        derivative_basis : `numpy.ndarray`
+            Derivatives of the basis functions with respect to the cause,
+            with shape (N, nbasis). Only returned if ``derivative`` true.
+        """
+        if cause_index in self._fourier_indices:
+            angle = inputs[:, cause_index]
+            basis = fourier_series.fourier_design_matrix(angle, nbasis + 1)[:, 1:]
+            if not derivative:
+                return basis
+            derivative_basis = fourier_series.fourier_derivative_matrix(
+                angle, nbasis + 1
+            )[:, 1:]
+            return basis, derivative_basis
+
+        # Vandermonde matrix of the clipped value: value^1 ... value^nbasis
+        powers = np.arange(1, nbasis + 1)
+        value = x[:, cause_index]
+        basis = value ** powers
+        if not derivative:
+            return basis
+        derivative_basis = powers * value ** (powers - 1)
+        return basis, derivative_basis
+
+    def _get_cross_design_matrix(self, inputs):
+        """Get the design matrix for all cross terms.
+
+        Parameters
+        ----------
+        inputs : `numpy.ndarray`
+            Compensation inputs, as returned by `_get_input_array`.
+
+        Returns
+        -------
+        design_matrix : `numpy.ndarray`
+            Products of the basis functions of each cross term,
+            with shape (N, M), such that the offsets due to the cross terms
+            are ``design_matrix @ self._cross_coeffs``.
+        """
+        x, _, _ = self._get_horner_inputs(inputs)
+        return np.concatenate(
+            [
+                _outer_rows(
+                    self._get_cross_basis(inputs, x, index1, coeffs.shape[0]),
+                    self._get_cross_basis(inputs, x, index2, coeffs.shape[1]),
+                )
+                for (index1, index2), coeffs in self._cross_terms
+            ],
+            axis=1,
+        )
+
+    def _get_cause_offsets(self, inputs):
+        """Compute the compensation offset for each cause separately.
+
+        Parameters
+        ----------
+        inputs : `numpy.ndarray`
+            Compensation inputs, as returned by `_get_input_array`.
+
+        Returns
+        -------
+        cause_offsets : `numpy.ndarray`
+            Compensation offsets for each cause, as an array of shape
+            (N, 4, 6), where the middle axis is the cause,
+            in the order given by ``CAUSE_NAMES``.
+        """
+        x, temperature, clipped_temperature = self._get_horner_inputs(inputs)
+
+        cause_offsets = np.empty((len(inputs), len(CAUSE_NAMES), NUM_AXES))
+        cause_offsets[:] = self._polynomial_coeffs[:, :, -1]
+        for k in range(self.coeffs.shape[-1] - 2, -1, -1):
+            cause_offsets *= x
+            cause_offsets += self._polynomial_coeffs[:, :, k]
+        cause_offsets[:, TEMPERATURE_INDEX, :] += np.multiply.outer(
+            temperature - clipped_temperature, self.coeffs[TEMPERATURE_INDEX, :, 1]
+        )
+        for i in self._fourier_indices:
+            design_matrix = fourier_series.fourier_design_matrix(
+                inputs[:, i], self.coeffs.shape[-1]
+            )
+            cause_offsets[:, i, :] = design_matrix @ self.coeffs[i].T
+        return cause_offsets
+
+    def _get_horner_inputs(self, inputs):
+        """Get the inputs for Horner's method.
+
+        Parameters
+        ----------
+        inputs : `numpy.ndarray`
+            Compensation inputs, as returned by `_get_input_array`.
+
+        Returns
+        -------
+        x : `numpy.ndarray`
+            Inputs with shape (N, 4, 1), to broadcast against coefficient
+            arrays with shape (4, 6), with temperature clipped to
+            [min_temperature, max_temperature].
+        temperature : `numpy.ndarray`
+            Unclipped temperature, with shape (N,).
+        clipped_temperature : `numpy.ndarray`
+            Clipped temperature, with shape (N,); a view of ``x``.
+        """
+        x = inputs[:, :, np.newaxis].copy()
+        temperature = inputs[:, TEMPERATURE_INDEX]
+        clipped_temperature = x[:, TEMPERATURE_INDEX, 0]
+        np.clip(
+            temperature,
+            self.min_temperature,
+            self.max_temperature,
+            out=clipped_temperature,
+        )
+        return x, temperature, clipped_temperature
+
+
+def _outer_rows(a, b):
+    """Compute the outer product of corresponding rows of two arrays.
+
+    Parameters
+    ----------
+    a : `numpy.ndarray`
+        Array of shape (N, n1).
+    b : `numpy.ndarray`
+        Array of shape (N, n2).
+
+    Returns
+    -------
+    outer : `numpy.ndarray`
+        Array of shape (N, n1 * n2), where row k is the flattened
+        outer product of ``a[k]`` and ``b[k]``.
+    """
+    return np.einsum("ni,nj->nij", a, b).reshape(len(a), -1)
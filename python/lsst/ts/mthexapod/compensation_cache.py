@@ -0,0 +1,141 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ["CompensationCache"]
+
+import collections
+import dataclasses
+
+from . import base
+
+
+class CompensationCache:
+    """A least-recently-used cache of compensation offsets,
+    keyed on quantized compensation inputs.
+
+    Parameters
+    ----------
+    compensation : `Compensation`
+        Compensation model.
+    max_size : `int`
+        Maximum number of cached offsets. If 0 then do not cache;
+        every call to `get_offset` calls ``compensation.get_offset``.
+    resolution : `list` [`float`]
+        Resolution to which inputs are quantized, in order:
+        elevation, azimuth, rotation (deg), temperature (C).
+        A value of 0 means that input is not quantized; the cache is
+        only likely to be useful if every input is quantized.
+
+    Raises
+    ------
+    ValueError
+        If ``max_size`` < 0, ``resolution`` does not have 4 elements,
+        or any resolution value is negative.
+
+    Attributes
+    ----------
+    hits : `int`
+        Number of calls to `get_offset` that were found in the cache.
+    misses : `int`
+        Number of calls to `get_offset` that were not found in the cache.
+    evictions : `int`
+        Number of cached offsets discarded to make room for new ones.
+
+    Notes
+    -----
+    Offsets are computed at the quantized inputs, rather than at the
+    inputs that caused the cache miss, so that the result for a given
+    set of inputs does not depend on the order of calls.
+    The quantized elevation is clipped to [0, 90].
+    """
+
+    def __init__(self, compensation, max_size, resolution):
+        if max_size < 0:
+            raise ValueError(f"max_size={max_size} must be >= 0")
+        if len(resolution) != 4:
+            raise ValueError(f"resolution={resolution} must have 4 elements")
+        if min(resolution) < 0:
+            raise ValueError(f"resolution={resolution} values must be >= 0")
+        self.compensation = compensation
+        self.max_size = max_size
+        self.resolution = tuple(resolution)
+        self._cache = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear(self):
+        """Clear the cache and reset the counters."""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_offset(self, inputs):
+        """Get compensation offset, using the cache if possible.
+
+        Parameters
+        ----------
+        inputs : `CompensationInputs`
+            Inputs for the compensation model.
+
+        Returns
+        -------
+        offset : `Position`
+            Compensation offset; see `Compensation.get_offset`.
+            This is a copy, so it is safe to modify.
+        """
+        if self.max_size == 0:
+            return self.compensation.get_offset(inputs)
+
+        key = tuple(
+            round(value / resolution) if resolution > 0 else value
+            for value, resolution in zip(
+                (inputs.elevation, inputs.azimuth, inputs.rotation, inputs.temperature),
+                self.resolution,
+            )
+        )
+        offset = self._cache.get(key)
+        if offset is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return dataclasses.replace(offset)
+
+        self.misses += 1
+        elevation, azimuth, rotation, temperature = (
+            value * resolution if resolution > 0 else value
+            for value, resolution in zip(key, self.resolution)
+        )
+        quantized_inputs = base.CompensationInputs(
+            elevation=min(max(elevation, 0), 90),
+            azimuth=azimuth,
+            rotation=rotation,
+            temperature=temperature,
+        )
+        offset = self.compensation.get_offset(quantized_inputs)
+        self._cache[key] = offset
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+        return dataclasses.replace(offset)
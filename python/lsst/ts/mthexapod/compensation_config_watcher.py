@@ -0,0 +1,194 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ["CompensationConfigWatcher", "read_compensation_config"]
+
+import asyncio
+import logging
+import os
+import pathlib
+
+import yaml
+
+from lsst.ts import salobj
+from . import enums
+from . import utils
+
+
+def read_compensation_config(path, index):
+    """Read and validate a compensation configuration file.
+
+    Parameters
+    ----------
+    path : `str` or `pathlib.Path`
+        Path to a yaml file with the same format as the ``camera_config``
+        or ``m2_config`` section of the CSC configuration.
+    index : `SalIndex` or `int`
+        SAL index of the hexapod.
+
+    Returns
+    -------
+    config : `dict`
+        The validated configuration, with defaults filled in.
+
+    Raises
+    ------
+    jsonschema.ValidationError
+        If the configuration is not valid.
+    """
+    subconfig_name = utils.get_subconfig_name(index)
+    with open(path, "r") as f:
+        raw_config = yaml.safe_load(f)
+    # Validate the file as the relevant section of a full configuration,
+    # so it is checked against ``instance_specific_config``.
+    config = utils.get_config_validator().validate({subconfig_name: raw_config})
+    return config[subconfig_name]
+
+
+class CompensationConfigWatcher:
+    """Watch a compensation configuration file for changes.
+
+    Poll the file's modification time and size. When either changes,
+    read and validate the file (in a thread, to avoid blocking
+    the event loop) and call a callback function with the result.
+
+    Parameters
+    ----------
+    path : `str` or `pathlib.Path`
+        Path to the compensation configuration file;
+        see `read_compensation_config` for the format.
+    index : `SalIndex` or `int`
+        SAL index of the hexapod.
+    callback : coroutine
+        Coroutine to call with the new configuration (a `dict`)
+        when the file changes and is valid.
+        Exceptions raised by the callback are logged and otherwise ignored.
+    poll_interval : `float`
+        Interval between checks of the file (seconds).
+    log : `logging.Logger` or `None`, optional
+        Logger; if None then create one.
+
+    Raises
+    ------
+    ValueError
+        If ``poll_interval`` is not positive.
+
+    Attributes
+    ----------
+    path : `pathlib.Path`
+        The ``path`` argument.
+    num_polls : `int`
+        Number of times the file was checked.
+    num_loaded : `int`
+        Number of times the callback was called.
+    num_errors : `int`
+        Number of times the file could not be read or was invalid,
+        or the callback failed.
+
+    Notes
+    -----
+    Call `start` to start watching and `stop` to stop.
+    If the file is missing or invalid, log a warning and keep watching.
+    """
+
+    def __init__(self, path, index, callback, poll_interval, log=None):
+        if poll_interval <= 0:
+            raise ValueError(f"poll_interval={poll_interval} must be positive")
+        self.path = pathlib.Path(path)
+        self.index = enums.SalIndex(index)
+        self.callback = callback
+        self.poll_interval = poll_interval
+        if log is None:
+            self.log = logging.getLogger(type(self).__name__)
+        else:
+            self.log = log.getChild(type(self).__name__)
+        self.num_polls = 0
+        self.num_loaded = 0
+        self.num_errors = 0
+        self._file_signature = None
+        self._watch_task = salobj.make_done_future()
+
+    @property
+    def running(self):
+        """Is the watcher running?"""
+        return not self._watch_task.done()
+
+    def start(self, ignore_current=False):
+        """Start watching the file. A no-op if already running.
+
+        Parameters
+        ----------
+        ignore_current : `bool`, optional
+            If True then ignore the current contents of the file
+            (e.g. because the caller has just read it), and only call
+            the callback when it changes. If False then call the
+            callback for the current contents, if the file exists.
+        """
+        if self.running:
+            return
+        self._file_signature = self._get_file_signature() if ignore_current else None
+        self._watch_task = asyncio.create_task(self._watch_loop())
+
+    def stop(self):
+        """Stop watching the file."""
+        self._watch_task.cancel()
+
+    def _get_file_signature(self):
+        """Get the modification time and size of the file,
+        or None if it does not exist.
+        """
+        try:
+            stat_result = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat_result.st_mtime_ns, stat_result.st_size)
+
+    async def _watch_loop(self):
+        """Check the file at regular intervals."""
+        loop = asyncio.get_running_loop()
+        while True:
+            file_signature = self._get_file_signature()
+            if file_signature is not None and file_signature != self._file_signature:
+                self._file_signature = file_signature
+                try:
+                    config = await loop.run_in_executor(
+                        None, read_compensation_config, self.path, self.index
+                    )
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.num_errors += 1
+                    self.log.warning(
+                        f"Ignoring invalid compensation config file {self.path}: {e!r}"
+                    )
+                else:
+                    try:
+                        await self.callback(config)
+                        self.num_loaded += 1
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception:
+                        self.num_errors += 1
+                        self.log.exception(
+                            f"Failed to apply compensation config file {self.path}"
+                        )
+            self.num_polls += 1
+            await asyncio.sleep(self.poll_interval)
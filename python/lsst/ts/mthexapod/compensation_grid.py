@@ -0,0 +1,281 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ["CompensationGrid", "MAX_GRID_POINTS"]
+
+import math
+
+import numpy as np
+
+from .compensation import CAUSE_NAMES, NUM_AXES, TEMPERATURE_INDEX, BaseCompensation
+
+# Range of elevation, azimuth, and rotation (deg) covered by the grid.
+# Azimuth and rotation are wrapped by BaseCompensation._get_input_array
+# to lie in these ranges.
+ANGLE_RANGES = ((0, 90), (0, 360), (-180, 180))
+
+# Maximum number of grid points; the table uses 48 bytes per point,
+# so this limits the table to about 100 MB.
+MAX_GRID_POINTS = 2_000_000
+
+# Offsets of the 16 corners of a grid cell, as an array of shape (16, 4).
+_CORNER_OFFSETS = np.array(
+    [[(corner >> dim) & 1 for dim in range(4)] for corner in range(16)], dtype=int
+)
+
+
+class CompensationGrid(BaseCompensation):
+    """A compensation model that interpolates offsets precomputed
+    on a regular grid of elevation, azimuth, rotation, and temperature.
+
+    The cost of computing an offset is independent of the number of
+    coefficients in the underlying model.
+
+    Parameters
+    ----------
+    compensation : `BaseCompensation`
+        Compensation model to sample. It must have attributes
+        ``min_temperature`` and ``max_temperature``.
+    steps : `list` [`float`]
+        Maximum grid spacing, in order: elevation, azimuth, rotation (deg),
+        temperature (C). The actual spacing is chosen to evenly divide
+        each range, so it may be a bit smaller.
+
+    Raises
+    ------
+    ValueError
+        If ``steps`` does not have 4 elements, any step is not positive,
+        or the grid would have more than `MAX_GRID_POINTS` points.
+
+    Attributes
+    ----------
+    compensation : `BaseCompensation`
+        The ``compensation`` argument.
+    grid_axes : `list` [`numpy.ndarray`]
+        Grid values for elevation, azimuth, rotation (deg)
+        and temperature (C).
+    table : `numpy.ndarray`
+        Offsets at each grid point, as an array of shape
+        (n_elevation, n_azimuth, n_rotation, n_temperature, 6).
+    max_error : `numpy.ndarray`
+        Estimated maximum absolute interpolation error
+        for x, y, z (um), u, v, w (deg); see `_measure_max_error`
+        for details.
+
+    Notes
+    -----
+    Offsets are computed by multilinear interpolation.
+    The temperature grid spans
+    [``compensation.min_temperature``, ``compensation.max_temperature``];
+    outside that range the offset is extrapolated linearly, using the slope
+    of the model measured just outside the range. This matches the
+    linear behavior of the temperature model (see `RangedPolynomial`).
+    """
+
+    def __init__(self, compensation, steps):
+        if len(steps) != len(CAUSE_NAMES):
+            raise ValueError(f"steps={steps} must have {len(CAUSE_NAMES)} elements")
+        if min(steps) <= 0:
+            raise ValueError(f"steps={steps} values must be positive")
+        ranges = ANGLE_RANGES + (
+            (compensation.min_temperature, compensation.max_temperature),
+        )
+        grid_axes = [
+            np.linspace(
+                min_value, max_value, math.ceil((max_value - min_value) / step) + 1
+            )
+            for (min_value, max_value), step in zip(ranges, steps)
+        ]
+        num_points = math.prod(len(axis) for axis in grid_axes)
+        if num_points > MAX_GRID_POINTS:
+            raise ValueError(
+                f"steps={steps} gives {num_points} grid points "
+                f"> MAX_GRID_POINTS={MAX_GRID_POINTS}; use larger steps"
+            )
+        self._init_grid(compensation=compensation, grid_axes=grid_axes)
+
+        # Call _compute_offsets instead of get_offsets, because the latter
+        # would wrap the grid points at azimuth=360 and rotation=180
+        # to azimuth=0 and rotation=-180.
+        grid_inputs = np.meshgrid(*self.grid_axes, indexing="ij")
+        self.table = compensation._compute_offsets(
+            np.stack([arr.ravel() for arr in grid_inputs], axis=-1)
+        ).reshape(grid_inputs[0].shape + (NUM_AXES,))
+        # The temperature model is linear outside the grid;
+        # measure the slope below and above the grid.
+        below_offsets = compensation.get_offsets(
+            0, 0, 0, [self.min_temperature - 1, self.min_temperature]
+        )
+        above_offsets = compensation.get_offsets(
+            0, 0, 0, [self.max_temperature, self.max_temperature + 1]
+        )
+        self._temperature_slopes = np.array(
+            [np.diff(below_offsets, axis=0)[0], np.diff(above_offsets, axis=0)[0]]
+        )
+        self.max_error = self._measure_max_error()
+
+    @classmethod
+    def load(cls, path, compensation):
+        """Load a grid saved by `save`.
+
+        Parameters
+        ----------
+        path : `str` or `pathlib.Path`
+            Path to the saved grid.
+        compensation : `BaseCompensation`
+            Compensation model that was sampled to make the saved grid.
+            It is not checked.
+
+        Returns
+        -------
+        grid : `CompensationGrid`
+            The loaded grid.
+
+        Raises
+        ------
+        ValueError
+            If the saved data is not consistent.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            grid_axes = [data[f"grid_axis{i}"] for i in range(len(CAUSE_NAMES))]
+            table = data["table"]
+            temperature_slopes = data["temperature_slopes"]
+            max_error = data["max_error"]
+        shape = tuple(len(axis) for axis in grid_axes) + (NUM_AXES,)
+        if table.shape != shape:
+            raise ValueError(f"table.shape={table.shape} != {shape}")
+        if temperature_slopes.shape != (2, NUM_AXES):
+            raise ValueError(
+                f"temperature_slopes.shape={temperature_slopes.shape} != {(2, NUM_AXES)}"
+            )
+        self = cls.__new__(cls)
+        self._init_grid(compensation=compensation, grid_axes=grid_axes)
+        self.table = table
+        self._temperature_slopes = temperature_slopes
+        self.max_error = max_error
+        return self
+
+    def save(self, path):
+        """Save the grid to a numpy ``.npz`` file, for use by `load`.
+
+        Parameters
+        ----------
+        path : `str` or `pathlib.Path` or file-like object
+            Path to the file, or an open binary file.
+        """
+        np.savez(
+            path,
+            table=self.table,
+            temperature_slopes=self._temperature_slopes,
+            max_error=self.max_error,
+            **{f"grid_axis{i}": axis for i, axis in enumerate(self.grid_axes)},
+        )
+
+    @property
+    def nbytes(self):
+        """Memory used by the table of offsets (bytes)."""
+        return self.table.nbytes
+
+    def _init_grid(self, compensation, grid_axes):
+        """Set the compensation model and grid axes,
+        and attributes derived from them.
+        """
+        self.compensation = compensation
+        self.min_temperature = compensation.min_temperature
+        self.max_temperature = compensation.max_temperature
+        self.grid_axes = grid_axes
+        self._grid_start = np.array([axis[0] for axis in self.grid_axes])
+        self._grid_step = np.array([axis[1] - axis[0] for axis in self.grid_axes])
+        self._grid_max_index = np.array([len(axis) - 2 for axis in self.grid_axes])
+
+    def _compute_offsets(self, inputs):
+        temperature = inputs[:, TEMPERATURE_INDEX]
+        clipped_temperature = np.clip(
+            temperature, self.min_temperature, self.max_temperature
+        )
+        inputs = inputs.copy()
+        inputs[:, TEMPERATURE_INDEX] = clipped_temperature
+
+        # Index of the lower corner of the cell containing each input,
+        # and fractional position within that cell.
+        scaled_inputs = (inputs - self._grid_start) / self._grid_step
+        lower_index = np.clip(
+            np.floor(scaled_inputs).astype(int), 0, self._grid_max_index
+        )
+        fraction = scaled_inputs - lower_index
+
+        # Shape (N, 16, 4)
+        corner_index = lower_index[:, np.newaxis, :] + _CORNER_OFFSETS
+        corner_values = self.table[
+            corner_index[..., 0],
+            corner_index[..., 1],
+            corner_index[..., 2],
+            corner_index[..., 3],
+        ]
+        corner_weights = np.where(
+            _CORNER_OFFSETS, fraction[:, np.newaxis, :], 1 - fraction[:, np.newaxis, :]
+        ).prod(axis=-1)
+        offsets = np.einsum("nc,nca->na", corner_weights, corner_values)
+
+        # Extrapolate linearly in temperature
+        delta_temperature = temperature - clipped_temperature
+        offsets += np.multiply.outer(
+            np.minimum(delta_temperature, 0), self._temperature_slopes[0]
+        )
+        offsets += np.multiply.outer(
+            np.maximum(delta_temperature, 0), self._temperature_slopes[1]
+        )
+        return offsets
+
+    def _measure_max_error(self):
+        """Estimate the maximum absolute interpolation error.
+
+        For each input, measure the maximum error at the midpoints
+        between grid values of that input (with the other inputs at grid
+        values), then sum these maxima. This is exact for models that are
+        a sum of quadratic functions of one input, but only an estimate
+        otherwise: for higher-order terms the largest error within
+        a cell need not be at its midpoint, and coupling between inputs
+        adds error that this does not measure.
+
+        Returns
+        -------
+        max_error : `numpy.ndarray`
+            Maximum absolute error for x, y, z, u, v, w.
+        """
+        centers = [(axis[:-1] + axis[1:]) / 2 for axis in self.grid_axes]
+        max_error = np.zeros(NUM_AXES)
+        for i in range(len(CAUSE_NAMES)):
+            sample_axes = list(self.grid_axes)
+            sample_axes[i] = centers[i]
+            dim_max_error = np.zeros(NUM_AXES)
+            # Process one elevation at a time, to limit memory use.
+            for elevation in sample_axes[0]:
+                sample_inputs = [
+                    arr.ravel()
+                    for arr in np.meshgrid(elevation, *sample_axes[1:], indexing="ij")
+                ]
+                error = self.get_offsets(
+                    *sample_inputs
+                ) - self.compensation.get_offsets(*sample_inputs)
+                dim_max_error = np.maximum(dim_max_error, np.abs(error).max(axis=0))
+            max_error += dim_max_error
+        return max_error
@@ -0,0 +1,228 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ["CompensationModelCache", "get_compensation_config_hash"]
+
+import collections
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import tempfile
+import threading
+
+from .compensation import Compensation
+from .compensation_grid import CompensationGrid
+
+# Increment this if the format of cached files changes,
+# or the way compensation models are built from configuration changes,
+# in order to invalidate existing cached files.
+_CACHE_VERSION = 1
+
+
+def get_compensation_config_hash(subconfig, grid_steps=None):
+    """Compute a hash of the configuration for a compensation model.
+
+    Parameters
+    ----------
+    subconfig : `dict`
+        The ``camera_config`` or ``m2_config`` section
+        of the CSC configuration.
+    grid_steps : `list` [`float`] or `None`, optional
+        Grid steps for a `CompensationGrid`, or None if no grid.
+
+    Returns
+    -------
+    config_hash : `str`
+        Hexadecimal SHA-256 hash.
+    """
+    data = dict(version=_CACHE_VERSION, subconfig=subconfig, grid_steps=grid_steps)
+    data_str = json.dumps(data, sort_keys=True, default=list)
+    return hashlib.sha256(data_str.encode()).hexdigest()
+
+
+class CompensationModelCache:
+    """A cache of compensation models, keyed on a hash of their
+    configuration, so reconfiguring with unchanged compensation
+    configuration does not rebuild them.
+
+    Parameters
+    ----------
+    max_size : `int`, optional
+        Maximum number of models to keep in memory; least-recently-used
+        models are discarded first. If 0 then do not cache in memory.
+    cache_dir : `str` or `pathlib.Path` or `None`, optional
+        Directory in which to save compensation grids, if any.
+        If None then do not cache on disk.
+    log : `logging.Logger` or `None`, optional
+        Logger; if None then create one.
+
+    Raises
+    ------
+    ValueError
+        If ``max_size`` < 0.
+
+    Attributes
+    ----------
+    cache_dir : `pathlib.Path` or `None`
+        The ``cache_dir`` argument. You may change it at any time.
+    hits : `int`
+        Number of calls to `get` that were found in memory.
+    disk_hits : `int`
+        Number of calls to `get` that loaded a grid from disk.
+    misses : `int`
+        Number of calls to `get` that built a new model.
+
+    Notes
+    -----
+    The in-memory cache holds a `Compensation` and, if grid steps are
+    specified, a `CompensationGrid` that samples it. Only grids are
+    cached on disk, because building a `Compensation` is cheap;
+    each grid is saved as a ``.npz`` file named for its config hash.
+    Files are written atomically, so a cache directory may be shared
+    by several processes.
+
+    `get` is thread safe, so it may be called in a thread
+    to avoid blocking an event loop.
+    """
+
+    def __init__(self, max_size=2, cache_dir=None, log=None):
+        if max_size < 0:
+            raise ValueError(f"max_size={max_size} must be >= 0")
+        self.max_size = max_size
+        self.cache_dir = None if cache_dir is None else pathlib.Path(cache_dir)
+        if log is None:
+            self.log = logging.getLogger(type(self).__name__)
+        else:
+            self.log = log.getChild(type(self).__name__)
+        self._models = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, subconfig, grid_steps=None):
+        """Get a compensation model, building it only if necessary.
+
+        Parameters
+        ----------
+        subconfig : `dict`
+            The ``camera_config`` or ``m2_config`` section
+            of the CSC configuration.
+        grid_steps : `list` [`float`] or `None`, optional
+            Grid steps for a `CompensationGrid`, or None if no grid.
+
+        Returns
+        -------
+        compensation : `Compensation`
+            Compensation model.
+        grid : `CompensationGrid` or `None`
+            Grid that samples ``compensation``,
+            or None if ``grid_steps`` is None.
+        """
+        with self._lock:
+            return self._get(subconfig=subconfig, grid_steps=grid_steps)
+
+    def clear(self):
+        """Clear the in-memory cache. Does not affect the disk cache."""
+        with self._lock:
+            self._models.clear()
+
+    def __len__(self):
+        return len(self._models)
+
+    def _get(self, subconfig, grid_steps):
+        """Implement `get`, without locking."""
+        config_hash = get_compensation_config_hash(
+            subconfig=subconfig, grid_steps=grid_steps
+        )
+        models = self._models.get(config_hash)
+        if models is not None:
+            self.hits += 1
+            self._models.move_to_end(config_hash)
+            return models
+
+        compensation = Compensation.from_config(subconfig)
+        grid = None
+        if grid_steps is not None:
+            grid = self._load_grid(config_hash=config_hash, compensation=compensation)
+            if grid is None:
+                self.misses += 1
+                grid = CompensationGrid(compensation=compensation, steps=grid_steps)
+                self._save_grid(config_hash=config_hash, grid=grid)
+            else:
+                self.disk_hits += 1
+        else:
+            self.misses += 1
+
+        models = (compensation, grid)
+        if self.max_size > 0:
+            self._models[config_hash] = models
+            while len(self._models) > self.max_size:
+                self._models.popitem(last=False)
+        return models
+
+    def _get_grid_path(self, config_hash):
+        return self.cache_dir / f"compensation_grid_{config_hash}.npz"
+
+    def _load_grid(self, config_hash, compensation):
+        """Load a grid from the disk cache.
+
+        Return None if there is no disk cache, no cached file,
+        or the file cannot be read.
+        """
+        if self.cache_dir is None:
+            return None
+        path = self._get_grid_path(config_hash)
+        if not path.is_file():
+            return None
+        try:
+            return CompensationGrid.load(path, compensation=compensation)
+        except Exception as e:
+            self.log.warning(f"Could not load cached compensation grid {path}: {e!r}")
+            return None
+
+    def _save_grid(self, config_hash, grid):
+        """Save a grid to the disk cache, if there is one.
+
+        Log a warning, rather than raising, if the grid cannot be saved.
+        """
+        if self.cache_dir is None:
+            return
+        path = self._get_grid_path(config_hash)
+        temp_path = None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write a temporary file and rename it,
+            # so readers never see a partial file.
+            with tempfile.NamedTemporaryFile(
+                dir=self.cache_dir, suffix=".tmp", delete=False
+            ) as f:
+                temp_path = f.name
+                grid.save(f)
+            os.replace(temp_path, path)
+            temp_path = None
+        except Exception as e:
+            self.log.warning(f"Could not save compensation grid to {path}: {e!r}")
+        finally:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
@@ -0,0 +1,261 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ["DeadlineScheduler", "SchedulerStatistics"]
+
+import asyncio
+import dataclasses
+import math
+import time
+
+
+@dataclasses.dataclass
+class SchedulerStatistics:
+    """Statistics about the ticks of a `DeadlineScheduler`.
+
+    Times are in seconds. Period and jitter statistics are NaN
+    if there is not enough data.
+    """
+
+    # Number of ticks.
+    num_ticks: int = 0
+    # Number of ticks that fired late because the previous iteration
+    # overran its deadline.
+    num_overruns: int = 0
+    # Number of ticks that were skipped entirely due to overruns.
+    num_skipped_ticks: int = 0
+    # Mean and maximum measured time between ticks.
+    mean_period: float = math.nan
+    max_period: float = math.nan
+    # Mean and maximum lateness of each tick relative to its deadline.
+    mean_jitter: float = math.nan
+    max_jitter: float = math.nan
+
+    def format(self):
+        """Format the statistics as a one-line string."""
+        return (
+            f"num_ticks={self.num_ticks}, num_overruns={self.num_overruns}, "
+            f"num_skipped_ticks={self.num_skipped_ticks}, "
+            f"mean_period={self.mean_period:0.4f}, max_period={self.max_period:0.4f}, "
+            f"mean_jitter={self.mean_jitter:0.4f}, max_jitter={self.max_jitter:0.4f}"
+        )
+
+
+class DeadlineScheduler:
+    """Wait for ticks at a fixed cadence, without drift.
+
+    Each tick is scheduled for a fixed deadline ``interval`` seconds
+    after the previous deadline, rather than ``interval`` seconds after
+    the caller finishes its work, so the time spent between calls to `wait`
+    does not accumulate.
+
+    Parameters
+    ----------
+    interval : `float`
+        Interval between ticks (sec).
+    log : `logging.Logger` or `None`, optional
+        Logger for statistics. If None then statistics are not logged.
+    log_interval : `float` or `None`, optional
+        Interval between statistics log messages (sec).
+        If None then statistics are not logged.
+    name : `str`, optional
+        Name of the schedule, for log messages.
+
+    Raises
+    ------
+    ValueError
+        If ``interval`` is not positive.
+
+    Notes
+    -----
+    If the caller overruns a deadline then the next tick fires as soon as
+    `wait` is called, and every deadline that passed entirely in the meantime
+    is skipped rather than being fired in a burst. Such ticks are counted
+    as overruns and skipped ticks.
+
+    Each tick records the measured period (time since the previous tick)
+    and jitter (lateness relative to the deadline). `get_statistics`
+    returns statistics since the last call to `reset_statistics`.
+    If logging is enabled then the statistics are logged at info level
+    and reset every ``log_interval`` seconds.
+    """
+
+    def __init__(self, interval, log=None, log_interval=None, name="Schedule"):
+        self.interval = interval
+        self.name = name
+        self.log = log
+        self.log_interval = log_interval
+        self.reset()
+        self.reset_statistics()
+
+    @property
+    def interval(self):
+        """Get or set the interval between ticks (sec).
+
+        Setting the interval takes effect after the next tick.
+        """
+        return self._interval
+
+    @interval.setter
+    def interval(self, interval):
+        if interval <= 0:
+            raise ValueError(f"interval={interval} must be positive")
+        self._interval = interval
+
+    def set_interval(self, interval):
+        """Set the interval between ticks, effective immediately.
+
+        Unlike setting `interval`, this moves the pending deadline,
+        so the next tick is ``interval`` seconds after the previous
+        deadline. If that is already in the past then the next
+        call to `wait` is an overrun.
+
+        Parameters
+        ----------
+        interval : `float`
+            Interval between ticks (sec).
+
+        Raises
+        ------
+        ValueError
+            If ``interval`` is not positive.
+        """
+        previous_deadline = self.deadline - self.interval
+        self.interval = interval
+        self.deadline = previous_deadline + interval
+
+    def reset(self, start_time=None):
+        """Restart the schedule.
+
+        Parameters
+        ----------
+        start_time : `float` or `None`, optional
+            Time of the previous (virtual) tick (monotonic sec).
+            If None then use the current time.
+            The next tick is due one interval later.
+        """
+        if start_time is None:
+            start_time = time.monotonic()
+        self.deadline = start_time + self.interval
+        self.tick_time = None
+
+    def reset_statistics(self):
+        """Reset the statistics."""
+        self.num_ticks = 0
+        self.num_overruns = 0
+        self.num_skipped_ticks = 0
+        self._period_sum = 0
+        self._num_periods = 0
+        self._max_period = math.nan
+        self._jitter_sum = 0
+        self._max_jitter = math.nan
+        self._log_start_time = time.monotonic()
+
+    async def wait(self):
+        """Wait for the next tick.
+
+        Returns
+        -------
+        num_skipped : `int`
+            The number of ticks skipped because the deadline
+            was overrun; 0 if the deadline was met.
+        """
+        num_skipped = 0
+        current_time = time.monotonic()
+        if current_time >= self.deadline:
+            self.num_overruns += 1
+            num_skipped = int((current_time - self.deadline) // self.interval)
+            self.num_skipped_ticks += num_skipped
+            self.deadline += num_skipped * self.interval
+        else:
+            await asyncio.sleep(self.deadline - current_time)
+
+        tick_time = time.monotonic()
+        self._record_tick(tick_time)
+        self.deadline += self.interval
+        if (
+            self.log is not None
+            and self.log_interval is not None
+            and tick_time - self._log_start_time >= self.log_interval
+        ):
+            self._log_statistics(tick_time)
+        return num_skipped
+
+    def get_statistics(self):
+        """Get statistics since the last call to `reset_statistics`.
+
+        Returns
+        -------
+        statistics : `SchedulerStatistics`
+            The statistics.
+        """
+        return SchedulerStatistics(
+            num_ticks=self.num_ticks,
+            num_overruns=self.num_overruns,
+            num_skipped_ticks=self.num_skipped_ticks,
+            mean_period=self._period_sum / self._num_periods
+            if self._num_periods > 0
+            else math.nan,
+            max_period=self._max_period,
+            mean_jitter=self._jitter_sum / self.num_ticks
+            if self.num_ticks > 0
+            else math.nan,
+            max_jitter=self._max_jitter,
+        )
+
+    def _record_tick(self, tick_time):
+        """Record statistics for a tick.
+
+        Parameters
+        ----------
+        tick_time : `float`
+            Time of the tick (monotonic sec).
+        """
+        self.num_ticks += 1
+        jitter = tick_time - self.deadline
+        self._jitter_sum += jitter
+        self._max_jitter = max(jitter, self._max_jitter, key=_nan_to_neg_inf)
+        if self.tick_time is not None:
+            period = tick_time - self.tick_time
+            self._period_sum += period
+            self._num_periods += 1
+            self._max_period = max(period, self._max_period, key=_nan_to_neg_inf)
+        self.tick_time = tick_time
+
+    def _log_statistics(self, current_time):
+        """Log and reset the statistics.
+
+        Parameters
+        ----------
+        current_time : `float`
+            The current time (monotonic sec).
+        """
+        duration = current_time - self._log_start_time
+        self.log.info(
+            f"{self.name} statistics over the last {duration:0.1f} seconds: "
+            f"interval={self.interval}, {self.get_statistics().format()}"
+        )
+        self.reset_statistics()
+
+
+def _nan_to_neg_inf(value):
+    """Return -inf if value is NaN, else value; a key for `max`."""
+    return -math.inf if math.isnan(value) else value
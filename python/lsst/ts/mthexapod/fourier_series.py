@@ -18,9 +18,8 @@
 #
 # You should have received a copy of the GNU General Public License
 
-__all__ = ["FourierSeries"]
+__all__ = ["FourierSeries", "fourier_design_matrix", "fourier_derivative_matrix"]
 
-import itertools
 import math
 
 import numpy as np
@@ -28,6 +27,100 @@ import numpy as np
 RAD_PER_DEG = math.pi / 180.0
 
 
+def fourier_design_matrix(angle, ncoeffs):
+    """Compute the design matrix of a real-valued Fourier series.
+
+    Each row contains the basis functions of `FourierSeries`
+    evaluated at one angle::
+
+        1, sin(angle), cos(angle), sin(2 angle), cos(2 angle), ...
+
+    Only ``sin(angle)`` and ``cos(angle)`` are computed directly;
+    higher harmonics use the angle-addition recurrence::
+
+        sin((k+1) a) = sin(k a) cos(a) + cos(k a) sin(a)
+        cos((k+1) a) = cos(k a) cos(a) - sin(k a) sin(a)
+
+    so the cost per harmonic is a few multiplications.
+
+    Parameters
+    ----------
+    angle : `float` or `numpy.ndarray`
+        Angle or angles, in degrees.
+    ncoeffs : `int`
+        Number of coefficients (columns).
+
+    Returns
+    -------
+    design_matrix : `numpy.ndarray`
+        Design matrix, with shape ``numpy.shape(angle) + (ncoeffs,)``.
+        Thus the value of a Fourier series with coefficients ``coeffs``
+        is ``design_matrix @ coeffs``.
+
+    Raises
+    ------
+    ValueError
+        If ``ncoeffs`` < 1.
+    """
+    if ncoeffs < 1:
+        raise ValueError(f"ncoeffs={ncoeffs} must be positive")
+    angle_rad = np.asarray(angle, dtype=float) * RAD_PER_DEG
+    design_matrix = np.empty(angle_rad.shape + (ncoeffs,), dtype=float)
+    design_matrix[..., 0] = 1
+    if ncoeffs == 1:
+        return design_matrix
+
+    sin1 = np.sin(angle_rad)
+    cos1 = np.cos(angle_rad)
+    sin_k = sin1
+    cos_k = cos1
+    for i in range(1, ncoeffs, 2):
+        design_matrix[..., i] = sin_k
+        if i + 1 < ncoeffs:
+            design_matrix[..., i + 1] = cos_k
+        sin_k, cos_k = sin_k * cos1 + cos_k * sin1, cos_k * cos1 - sin_k * sin1
+    return design_matrix
+
+
+def fourier_derivative_matrix(angle, ncoeffs):
+    """Compute the derivative of `fourier_design_matrix` with respect
+    to angle.
+
+    Parameters
+    ----------
+    angle : `float` or `numpy.ndarray`
+        Angle or angles, in degrees.
+    ncoeffs : `int`
+        Number of coefficients (columns).
+
+    Returns
+    -------
+    derivative_matrix : `numpy.ndarray`
+        Derivative of each basis function with respect to angle (per deg),
+        with shape ``numpy.shape(angle) + (ncoeffs,)``.
+        Thus the derivative of a Fourier series with coefficients
+        ``coeffs`` is ``derivative_matrix @ coeffs``.
+
+    Raises
+    ------
+    ValueError
+        If ``ncoeffs`` < 1.
+    """
+    # d/da sin(k a) = k cos(k a) and d/da cos(k a) = -k sin(k a),
+    # so compute one extra column, to have cos(k a) for the last sin(k a).
+    design_matrix = fourier_design_matrix(angle, ncoeffs + 1)
+    derivative_matrix = np.zeros_like(design_matrix[..., :ncoeffs])
+    # Column i is sin(k a) for odd i and cos(k a) for even i > 0,
+    # where k = (i + 1) // 2.
+    columns = np.arange(1, ncoeffs)
+    is_sin = columns % 2 == 1
+    harmonics = (columns + 1) // 2
+    source_columns = np.where(is_sin, columns + 1, columns - 1)
+    scales = np.where(is_sin, 1.0, -1.0) * harmonics * RAD_PER_DEG
+    derivative_matrix[..., 1:] = design_matrix[..., source_columns] * scales
+    return derivative_matrix
+
+
 class FourierSeries:
     """A real-valued Fourier series.
 
@@ -46,31 +139,20 @@ class FourierSeries:
         if len(coeffs) < 1:
             raise ValueError(f"coeffs={coeffs} must contain at least one element")
         self.coeffs = coeffs
-
-        def return_one(data):
-            return 1
-
-        # Functions for C0, C1, C2, C3, ...
-        function_iter = itertools.cycle([np.sin, np.cos])
-        self.functions = [return_one] + [
-            next(function_iter) for i in range(len(coeffs) - 1)
-        ]
-        # Angle multipliers for C0, C1, C2, C3
-        self.angle_multipliers = [
-            ((i + 1) // 2) * RAD_PER_DEG for i in range(len(coeffs))
-        ]
+        self._coeffs_array = np.array(coeffs, dtype=float)
 
     def __call__(self, angle):
         """Compute the value of the function.
 
         Parameters
         ----------
-        angle : `float`
-            Angle, in degrees.
+        angle : `float` or `numpy.ndarray`
+            Angle or angles, in degrees.
+
+        Returns
+        -------
+        value : `float` or `numpy.ndarray`
+            The value of the function: a scalar if ``angle`` is a scalar,
+            else an array with the same shape as ``angle``.
         """
-        result = 0
-        for coeff, function, angle_multiplier in zip(
-            self.coeffs, self.functions, self.angle_multipliers
-        ):
-            result += coeff * function(angle * angle_multiplier)
-        return result
+        return fourier_design_matrix(angle, len(self.coeffs)) @ self._coeffs_array
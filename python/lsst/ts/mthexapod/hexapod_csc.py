@@ -24,18 +24,27 @@ __all__ = ["HexapodCsc"]
 import asyncio
 import copy
 import dataclasses
+import functools
 import pathlib
+import time
 import types
 
+import numpy as np
+
 from lsst.ts import salobj
 from lsst.ts import hexrotcomm
 from lsst.ts.idl.enums.MTHexapod import EnabledSubstate, ApplicationStatus
 from . import base
-from . import compensation
+from . import compensation_cache
+from . import compensation_config_watcher
+from . import compensation_model_cache
 from . import constants
+from . import deadline_scheduler
 from . import enums
+from . import latency_recorder
 from . import mock_controller
 from . import structs
+from . import temperature_source
 from . import utils
 
 
@@ -118,12 +127,106 @@ class HexapodCsc(hexrotcomm.BaseCsc):
         # Set in `configure`, but we need something now.
         self.compensation_interval = 0.2
 
+        # Minimum change in compensated position, in order x, y, z (um),
+        # u, v, w (deg), for the compensation loop to command a move.
+        # Set in `configure`, but we need something now.
+        self.compensation_deadband = (0,) * 6
+
+        # Predict compensation inputs at the expected end of each move?
+        # Set in `configure`, but we need something now.
+        self.compensation_predict = False
+
+        # Expected duration (sec) of a compensation move;
+        # used to predict compensation inputs.
+        # Set in `configure`, but we need something now.
+        self.compensation_lead_time = 0.2
+
+        # Maximum age (sec) of a compensation input, or None if no limit,
+        # and what to do with an input that is older than that:
+        # "extrapolate" or "refuse".
+        # Set in `configure`, but we need something now.
+        self.compensation_max_input_age = None
+        self.compensation_stale_input_policy = "refuse"
+
+        # What triggers a compensation update: "timer" or "event";
+        # if "event": the minimum time between updates and the maximum
+        # time to wait for an event (None for no limit) (sec).
+        # Set in `configure`, but we need something now.
+        self.compensation_trigger = "timer"
+        self.compensation_min_spacing = 0.05
+        self.compensation_max_staleness = 1
+
+        # Set when a new MTMount or MTRotator target arrives.
+        self.compensation_trigger_event = asyncio.Event()
+
+        # Adapt the interval between timer-driven compensation updates
+        # to how fast the compensation offset is changing?
+        # If so: the minimum and maximum interval (sec), and the maximum
+        # change in offset allowed between updates, in order
+        # x, y, z (um), u, v, w (deg).
+        # Set in `configure`, but we need something now.
+        self.compensation_adaptive_interval = False
+        self.compensation_min_interval = 0.05
+        self.compensation_max_interval = 2
+        self.compensation_tolerance = (1,) * 6
+
+        # (monotonic time, offset array) of the previous sample used
+        # to compute the adaptive interval; None if no sample.
+        self.last_adaptive_sample = None
+
+        # Set while the low-level controller reports that the hexapod
+        # is stationary (enabled_substate is STATIONARY).
+        self.stationary_event = asyncio.Event()
+
+        # Time (monotonic sec) at which the compensation loop
+        # last started an update.
+        self.last_compensation_update_time = 0
+
+        # Limit the change in position commanded by each compensation update,
+        # so each compensation move finishes before the next update?
+        # Set in `configure`, but we need something now.
+        self.compensation_rate_limit = False
+
+        # Compensated position most recently commanded by `_move`,
+        # (a `Position`), or None if unknown.
+        self.last_compensated_pos = None
+
+        # Private_seqNum of the MTMount and MTRotator target events
+        # used for the most recent compensated move, or None.
+        self.last_compensation_seq_nums = None
+
+        # Compensation model and `CompensationCache` built from
+        # a changed compensation configuration file, to be used by
+        # the next compensation update; None if no change is pending.
+        self.pending_compensation = None
+
+        # Settings for `_make_compensation`.
+        # Set in `configure`, but we need something now.
+        self.compensation_grid_steps = None
+        self.compensation_cache_size = 0
+        self.compensation_cache_resolution = (0,) * 4
+
+        # The compensation loop runs as a series of `compensation_loop`
+        # tasks (compensation_loop_task), one at a time, under the
+        # supervision of a single long-lived task (compensation_task).
+        # Control them with `restart_compensation`, `pause_compensation`,
+        # `resume_compensation` and `wake_compensation`.
+        self.compensation_task = salobj.make_done_future()
+        self.compensation_loop_task = salobj.make_done_future()
         self.compensation_wait_task = salobj.make_done_future()
+        # Set to ask compensation_task to start a new compensation loop.
+        self.compensation_run_event = asyncio.Event()
+        # wait_first argument for the next compensation loop.
+        self.compensation_wait_first = False
+        # Diagnostics: the number of supervisor tasks started (normally 1)
+        # and the number of compensation loops started.
+        self.num_compensation_tasks = 0
+        self.num_compensation_loops = 0
 
         structs.Config.FRAME_ID = controller_constants.config_frame_id
         structs.Telemetry.FRAME_ID = controller_constants.telemetry_frame_id
 
-        schema_path = pathlib.Path(__file__).parents[4] / "schema" / "MTHexapod.yaml"
+        schema_path = utils.SCHEMA_PATH
         super().__init__(
             name="MTHexapod",
             index=index,
@@ -139,15 +242,60 @@ class HexapodCsc(hexrotcomm.BaseCsc):
             simulation_mode=simulation_mode,
         )
 
-        # TODO DM-28005: add a suitable Remote from which to get temperature;
-        # perhaps something like:
-        # self.eas = salobj.Remote(domain=self.domain, name="EAS", include=[?])
+        # Watches the compensation configuration file, if one is specified.
+        # Replaced in `configure`, but we need something now.
+        self.compensation_config_watcher = compensation_config_watcher.CompensationConfigWatcher(
+            path="",
+            index=index,
+            callback=self.compensation_config_callback,
+            poll_interval=1,
+            log=self.log,
+        )
+
+        # Compensation models, keyed on a hash of their configuration,
+        # so reconfiguring does not rebuild an unchanged model.
+        self.compensation_model_cache = compensation_model_cache.CompensationModelCache(
+            log=self.log
+        )
+
+        # Source of temperature for compensation, and the Remote
+        # it reads (None if no Remote). Set in `configure`.
+        self.temperature_source = temperature_source.NullTemperatureSource()
+        self.temperature_remote = None
+        self._temperature_remote_key = None
+
         self.mtmount = salobj.Remote(
             domain=self.domain, name="MTMount", include=["target"]
         )
         self.mtrotator = salobj.Remote(
             domain=self.domain, name="MTRotator", include=["target"]
         )
+        self.mtmount.evt_target.callback = self._target_callback
+        self.mtrotator.evt_target.callback = self._target_callback
+
+        # Durations of the stages of `_move` and of compensation updates.
+        # See `get_move_latencies` for the stage names.
+        self.move_latency_recorder = latency_recorder.LatencyRecorder(
+            stage_names=(
+                "inputs",
+                "offset",
+                "build",
+                "command",
+                "publish",
+                "compensation_update",
+            ),
+            log=self.log,
+            name="Move",
+        )
+
+        # Schedules compensation updates every compensation_interval seconds
+        # and logs statistics about the schedule.
+        # Configured in `configure`.
+        self.compensation_scheduler = deadline_scheduler.DeadlineScheduler(
+            interval=self.compensation_interval,
+            log=self.log,
+            name="Compensation schedule",
+        )
 
     @property
     def compensation_mode(self):
@@ -165,9 +313,138 @@ class HexapodCsc(hexrotcomm.BaseCsc):
             (since they perform a compensated move, if appropriate),
             but not for do_setCompensationMode.
         """
-        self.compensation_wait_task.cancel()
         if self.compensation_mode:
-            asyncio.create_task(self.compensation_loop(wait_first=wait_first))
+            self.restart_compensation(wait_first=wait_first)
+        else:
+            self.pause_compensation()
+
+    @property
+    def compensation_loop_running(self):
+        """Return True if a compensation loop is running."""
+        return not self.compensation_loop_task.done()
+
+    def restart_compensation(self, wait_first):
+        """Stop the current compensation loop, if any, and start a new one.
+
+        An in-progress compensation move is cancelled.
+        The new loop does not start until the old one has finished.
+
+        Parameters
+        ----------
+        wait_first : `bool`
+            Wait before applying the first compensation update?
+        """
+        self.compensation_loop_task.cancel()
+        self.compensation_wait_first = wait_first
+        self.compensation_run_event.set()
+        self._start_compensation_task()
+
+    def pause_compensation(self):
+        """Stop the current compensation loop, if any.
+
+        An in-progress compensation move is cancelled.
+        Call `resume_compensation` or `restart_compensation` to start
+        a new loop.
+        """
+        self.compensation_run_event.clear()
+        self.compensation_loop_task.cancel()
+
+    def resume_compensation(self, wait_first):
+        """Start a compensation loop, unless one is already running.
+
+        Parameters
+        ----------
+        wait_first : `bool`
+            Wait before applying the first compensation update?
+        """
+        if self.compensation_loop_running:
+            return
+        self.compensation_wait_first = wait_first
+        self.compensation_run_event.set()
+        self._start_compensation_task()
+
+    def wake_compensation(self):
+        """Make the compensation loop, if running, apply an update now,
+        instead of waiting for the usual trigger.
+        """
+        self.compensation_wait_task.cancel()
+
+    def get_move_latencies(self, percentiles=latency_recorder.LATENCY_PERCENTILES):
+        """Get percentiles of the duration of each stage of recent moves.
+
+        Parameters
+        ----------
+        percentiles : `list` [`float`], optional
+            Percentiles to compute, in the range [0, 100].
+
+        Returns
+        -------
+        latencies : `dict` [`str`, `dict` [`float`, `float`]]
+            Dict of stage name: dict of percentile: duration (sec),
+            computed from the most recent 1000 executions of each stage.
+            Stages that have not been executed are omitted.
+            The stages are:
+
+            * inputs: get the compensation inputs
+              (only if compensation mode is on).
+            * offset: compute the compensation offset
+              (only if the compensation inputs are available).
+            * build: build the low-level commands.
+            * command: send the low-level commands and wait for
+              the replies (`run_multiple_commands`).
+            * publish: publish the position events.
+            * compensation_update: an entire compensation update by the
+              compensation loop, including the stages above
+              (only for updates that command a move).
+
+        Notes
+        -----
+        The same percentiles are logged at info level every
+        ``compensation_statistics_interval`` seconds,
+        if that is not null.
+        """
+        return self.move_latency_recorder.get_percentiles(percentiles)
+
+    async def _compensation_supervisor(self):
+        """Run compensation loops, one at a time.
+
+        This is the body of `compensation_task`. It runs until cancelled.
+        If a compensation loop raises an exception then stop compensation,
+        which reports compensation mode disabled.
+        """
+        self.num_compensation_tasks += 1
+        try:
+            while True:
+                await self.compensation_run_event.wait()
+                if not self.compensation_run_event.is_set():
+                    # Paused after the event was set.
+                    continue
+                self.compensation_run_event.clear()
+                self.num_compensation_loops += 1
+                self.compensation_loop_task = asyncio.create_task(
+                    self.compensation_loop(wait_first=self.compensation_wait_first)
+                )
+                # Use asyncio.wait so that cancelling the loop
+                # does not end this task.
+                await asyncio.wait([self.compensation_loop_task])
+                if (
+                    not self.compensation_loop_task.cancelled()
+                    and self.compensation_loop_task.exception() is not None
+                ):
+                    self.log.error(
+                        "Compensation loop failed; turning off compensation mode: "
+                        f"{self.compensation_loop_task.exception()!r}"
+                    )
+                    self.stop_compensation()
+        finally:
+            self.compensation_loop_task.cancel()
+
+    def _start_compensation_task(self):
+        """Start `compensation_task`, if not already running."""
+        if self.compensation_task.done():
+            self.compensation_task = asyncio.create_task(
+                self._compensation_supervisor()
+            )
 
     def config_callback(self, server):
         """Called when the low-level controller outputs configuration.
@@ -206,24 +483,101 @@ class HexapodCsc(hexrotcomm.BaseCsc):
         )
 
     async def configure(self, config):
+        if config.compensation_min_interval > config.compensation_max_interval:
+            raise salobj.ExpectedError(
+                f"compensation_min_interval={config.compensation_min_interval} "
+                f"must be <= compensation_max_interval={config.compensation_max_interval}"
+            )
         self.compensation_interval = config.compensation_interval
-        subconfig_name = {
-            enums.SalIndex.CAMERA_HEXAPOD: "camera_config",
-            enums.SalIndex.M2_HEXAPOD: "m2_config",
-        }[self.salinfo.index]
+        self.compensation_scheduler.interval = config.compensation_interval
+        self.compensation_scheduler.log_interval = (
+            config.compensation_statistics_interval
+        )
+        self.compensation_scheduler.reset_statistics()
+        self.move_latency_recorder.log_interval = (
+            config.compensation_statistics_interval
+        )
+        self.compensation_deadband = tuple(config.compensation_deadband)
+        self.compensation_predict = config.compensation_predict
+        self.compensation_lead_time = config.compensation_lead_time
+        self.compensation_max_input_age = config.compensation_max_input_age
+        self.compensation_stale_input_policy = config.compensation_stale_input_policy
+        self.compensation_rate_limit = config.compensation_rate_limit
+        self.compensation_trigger = config.compensation_trigger
+        self.compensation_min_spacing = config.compensation_min_spacing
+        self.compensation_max_staleness = config.compensation_max_staleness
+        self.compensation_adaptive_interval = config.compensation_adaptive_interval
+        self.compensation_min_interval = config.compensation_min_interval
+        self.compensation_max_interval = config.compensation_max_interval
+        self.compensation_tolerance = tuple(config.compensation_tolerance)
+        self.compensation_grid_steps = config.compensation_grid_steps
+        self.compensation_cache_size = config.compensation_cache_size
+        self.compensation_cache_resolution = config.compensation_cache_resolution
+        subconfig_name = utils.get_subconfig_name(self.salinfo.index)
         subconfig = types.SimpleNamespace(**getattr(config, subconfig_name))
-        self.compensation = compensation.Compensation(
-            elevation_coeffs=subconfig.elevation_coeffs,
-            azimuth_coeffs=subconfig.azimuth_coeffs,
-            rotation_coeffs=subconfig.rotation_coeffs,
-            temperature_coeffs=subconfig.temperature_coeffs,
-            min_temperature=subconfig.min_temperature,
-            max_temperature=subconfig.max_temperature,
+        self.compensation_model_cache.cache_dir = (
+            None
+            if config.compensation_model_cache_dir is None
+            else pathlib.Path(config.compensation_model_cache_dir)
+        )
+
+        self.compensation_config_watcher.stop()
+        self.pending_compensation = None
+        compensation_config = getattr(config, subconfig_name)
+        if config.compensation_config_path is not None:
+            self.compensation_config_watcher = compensation_config_watcher.CompensationConfigWatcher(
+                path=config.compensation_config_path,
+                index=self.salinfo.index,
+                callback=self.compensation_config_callback,
+                poll_interval=config.compensation_config_poll_interval,
+                log=self.log,
+            )
+            if self.compensation_config_watcher.path.exists():
+                self.log.info(
+                    "Reading compensation configuration from "
+                    f"{self.compensation_config_watcher.path}"
+                )
+                loop = asyncio.get_running_loop()
+                compensation_config = await loop.run_in_executor(
+                    None,
+                    compensation_config_watcher.read_compensation_config,
+                    self.compensation_config_watcher.path,
+                    self.salinfo.index,
+                )
+            self.compensation_config_watcher.start(ignore_current=True)
+
+        self.compensation, self.compensation_cache = await self._make_compensation(
+            compensation_config
         )
+        await self._configure_temperature_source(config)
         self.reference_position = base.Position(*subconfig.reference_position)
 
+    async def compensation_config_callback(self, compensation_config):
+        """Called when the compensation configuration file changes.
+
+        Build the new compensation model and wake the compensation loop
+        to apply it (or apply it immediately, if the compensation loop
+        is not running).
+
+        Parameters
+        ----------
+        compensation_config : `dict`
+            New compensation configuration, in the same format
+            as the ``camera_config`` or ``m2_config`` section of
+            the CSC configuration. ``reference_position`` is ignored.
+        """
+        self.log.info("Compensation configuration file changed; updating")
+        self.pending_compensation = await self._make_compensation(compensation_config)
+        if not self.compensation_mode or self.summary_state != salobj.State.ENABLED:
+            self._apply_pending_compensation()
+        else:
+            self.wake_compensation()
+
     def connect_callback(self, server):
         super().connect_callback(server)
+        # The hexapod may not be where it was last commanded,
+        # e.g. if the low-level controller restarted.
+        self._forget_compensated_position()
         if not self.server.connected:
             self.stop_compensation()
 
@@ -239,42 +593,121 @@ class HexapodCsc(hexrotcomm.BaseCsc):
 
         Notes
         -----
+        Do not call directly; this is run by `compensation_task`,
+        which makes sure only one compensation loop runs at a time.
+
         The interval between compensation updates is a configuration parameter.
 
         This will skip a compensation update if the hexapod is moving
-        (and log a debug-level message). That will be common after
-        a large move.
+        (and log a debug-level message), then apply it as soon as
+        the hexapod is stationary. That will be common after a large move.
+
+        If ``compensation_deadband`` is nonzero on any axis, it also skips
+        a compensation update if the MTMount and MTRotator target events
+        have not changed since the last compensated move, or if the
+        compensated position would change by no more than the deadband
+        on every axis.
+
+        If ``compensation_rate_limit`` is true then each compensation move
+        is limited to what the hexapod can move before the next update
+        (see `_get_compensation_period`), so a large change in compensation
+        is applied in several steps.
+
+        See `_wait_for_compensation_trigger` for how the time of each
+        compensation update is chosen, and `_update_adaptive_interval`
+        for how the interval is chosen if ``compensation_adaptive_interval``
+        is true. Timer-driven updates
+        keep a fixed cadence: the time spent computing and commanding
+        each update does not delay the next one. If an update overruns
+        the interval then the next update starts as soon as it finishes,
+        and any intervals that were entirely missed are skipped.
         """
-        self.compensation_wait_task.cancel()
+        self.compensation_scheduler.reset()
+        self.last_adaptive_sample = None
         do_wait = wait_first
+        retry = False
         while self.summary_state == salobj.State.ENABLED:
             if do_wait:
                 self.compensation_wait_task = asyncio.create_task(
-                    asyncio.sleep(self.compensation_interval)
+                    self._wait_for_compensation_trigger(retry=retry)
                 )
-                await self.compensation_wait_task
+                # Use asyncio.wait so that `wake_compensation` can
+                # end the wait early (by cancelling the wait task)
+                # without ending this loop.
+                try:
+                    await asyncio.wait([self.compensation_wait_task])
+                except asyncio.CancelledError:
+                    self.compensation_wait_task.cancel()
+                    return
                 if self.summary_state != salobj.State.ENABLED:
                     return
             else:
                 do_wait = True
 
-            # Apply a compensation move, if movement is allowed.
-            if self.server.telemetry.enabled_substate != EnabledSubstate.STATIONARY:
-                # Cast the float value for nicer output
-                enabled_substate = EnabledSubstate(
-                    self.server.telemetry.enabled_substate
-                )
-                self.log.debug(
-                    f"Skip compensation; enabled_substate={enabled_substate!r}"
-                )
-                continue
-            if not self._has_uncompensated_position():
-                self.log.error("Compensation failed; no position has been commanded")
-                return
+            # Clear the trigger before reading the inputs, so a target
+            # that arrives while this update is being applied
+            # triggers another update.
+            self.compensation_trigger_event.clear()
+            self.last_compensation_update_time = time.monotonic()
+            retry = False
             try:
+                self._apply_pending_compensation()
+                # The compensation offset, if computed for the adaptive
+                # interval; `_move` reuses it rather than computing it again.
+                compensation = None
+                if (
+                    self.compensation_adaptive_interval
+                    and self.compensation_trigger == "timer"
+                ):
+                    compensation = self._compute_compensation()
+                    self._update_adaptive_interval(
+                        compensation_inputs=compensation.inputs,
+                        offset=compensation.offset,
+                    )
+
+                # Apply a compensation move, if movement is allowed.
+                if self.server.telemetry.enabled_substate != EnabledSubstate.STATIONARY:
+                    # Cast the float value for nicer output
+                    enabled_substate = EnabledSubstate(
+                        self.server.telemetry.enabled_substate
+                    )
+                    self.log.debug(
+                        f"Skip compensation; enabled_substate={enabled_substate!r}"
+                    )
+                    retry = True
+                    continue
+                if not self._has_uncompensated_position():
+                    self.log.error(
+                        "Compensation failed; no position has been commanded"
+                    )
+                    return
+                # Every move updates last_compensation_seq_nums, so if the
+                # targets are unchanged then so is the compensated position
+                # (unless the compensation inputs depend on the current time).
+                # Only skip if a deadband is configured; otherwise command
+                # a move every time, e.g. to correct a controller reset.
+                if (
+                    self._has_compensation_deadband()
+                    and not self._compensation_inputs_depend_on_time()
+                    and self.last_compensation_seq_nums is not None
+                    and self.last_compensation_seq_nums
+                    == self._get_compensation_seq_nums()
+                ):
+                    self.log.debug("Skip compensation; inputs unchanged")
+                    continue
                 self.log.debug("Apply compensation")
                 uncompensated_pos = self._get_uncompensated_position()
-                await self._move(uncompensated_pos=uncompensated_pos, sync=1)
+                moved = await self._move(
+                    uncompensated_pos=uncompensated_pos,
+                    sync=1,
+                    compensation_update=True,
+                    compensation=compensation,
+                )
+                if moved:
+                    self.move_latency_recorder.record(
+                        "compensation_update",
+                        time.monotonic() - self.last_compensation_update_time,
+                    )
             except asyncio.CancelledError:
                 # Normal termination. This may be temporary (e.g.
                 # when starting a move or offset command) so do not
@@ -295,18 +728,48 @@ class HexapodCsc(hexrotcomm.BaseCsc):
         -------
         compensation_inputs : `CompensationInputs` or `None`
             The compensation inputs, if all inputs are available, else `None`.
+
+        Notes
+        -----
+        If ``compensation_predict`` is true then the MTMount and MTRotator
+        targets are extrapolated, using their velocity and time,
+        to ``compensation_lead_time`` seconds from now:
+        the expected end of the compensation move.
+
+        Temperature is read from ``temperature_source``; if no temperature
+        source is configured then temperature is 0.
+
+        If ``compensation_max_input_age`` is not None then a target
+        older than that is stale, and is handled according to
+        ``compensation_stale_input_policy``:
+
+        * "extrapolate": extrapolate the target to now
+          (plus ``compensation_lead_time`` if predicting).
+        * "refuse": treat the target as missing.
+          The compensation loop then holds the current compensated
+          position; see `_move`.
         """
+        current_tai = salobj.current_tai()
         mount_target = self.mtmount.evt_target.get()
         missing_inputs = []
         if mount_target is None:
             missing_inputs.append("MTMount.target.elevation, azimuth")
+        elif self._is_stale_and_refused(mount_target.taiTime, current_tai):
+            missing_inputs.append("MTMount.target (stale)")
 
         rotator_target = self.mtrotator.evt_target.get()
         if rotator_target is None:
             missing_inputs.append("MTRotator.target.position")
+        elif self._is_stale_and_refused(rotator_target.tai, current_tai):
+            missing_inputs.append("MTRotator.target (stale)")
 
-        # TODO DM-28005: update this code:
-        temperature = 0
+        # The temperature source smooths and caches the temperature
+        # as data arrives, so reading it is cheap.
+        temperature = self.temperature_source.temperature
+        if temperature is None:
+            missing_inputs.append("temperature")
+        elif self.temperature_source.is_stale(current_tai):
+            missing_inputs.append("temperature (stale)")
 
         if missing_inputs:
             missing_str = ", ".join(missing_inputs)
@@ -319,10 +782,29 @@ class HexapodCsc(hexrotcomm.BaseCsc):
 
         self.missing_inputs_str = ""
 
+        elevation = self._extrapolate_input(
+            position=mount_target.elevation,
+            velocity=mount_target.elevationVelocity,
+            tai=mount_target.taiTime,
+            current_tai=current_tai,
+        )
+        azimuth = self._extrapolate_input(
+            position=mount_target.azimuth,
+            velocity=mount_target.azimuthVelocity,
+            tai=mount_target.taiTime,
+            current_tai=current_tai,
+        )
+        rotation = self._extrapolate_input(
+            position=rotator_target.position,
+            velocity=rotator_target.velocity,
+            tai=rotator_target.tai,
+            current_tai=current_tai,
+        )
         return base.CompensationInputs(
-            elevation=mount_target.elevation,
-            azimuth=mount_target.azimuth,
-            rotation=rotator_target.position,
+            # Extrapolation may take elevation slightly out of range.
+            elevation=min(max(elevation, 0), 90),
+            azimuth=azimuth,
+            rotation=rotation,
             temperature=temperature,
         )
 
@@ -450,7 +932,7 @@ class HexapodCsc(hexrotcomm.BaseCsc):
             if self._has_uncompensated_position():
                 self.bump_compensation_loop(wait_first=False)
             else:
-                self.compensation_wait_task.cancel()
+                self.pause_compensation()
         else:
             self.stop_compensation()
             try:
@@ -477,11 +959,28 @@ class HexapodCsc(hexrotcomm.BaseCsc):
         """
         if self.summary_state != salobj.State.ENABLED:
             raise salobj.ExpectedError("Not enabled")
+        # The hexapod may stop short of the last commanded position,
+        # so make the compensation loop command a new move.
+        self._forget_compensated_position()
         await self.run_command(
             code=enums.CommandCode.SET_ENABLED_SUBSTATE,
             param1=enums.SetEnabledSubstateParam.STOP,
         )
 
+    async def close_tasks(self):
+        self.compensation_task.cancel()
+        self.compensation_config_watcher.stop()
+        await self.temperature_source.close()
+        if self.temperature_remote is not None:
+            await self.temperature_remote.close()
+        await super().close_tasks()
+
+    async def handle_summary_state(self):
+        await super().handle_summary_state()
+        if self.summary_state not in (salobj.State.DISABLED, salobj.State.ENABLED):
+            self.compensation_config_watcher.stop()
+            self.pending_compensation = None
+
     async def start(self):
         await asyncio.gather(self.mtmount.start_task, self.mtrotator.start_task)
         self.evt_compensationMode.set_put(enabled=False)
@@ -508,6 +1007,11 @@ class HexapodCsc(hexrotcomm.BaseCsc):
             enabledSubstate=int(server.telemetry.enabled_substate),
             applicationStatus=server.telemetry.application_status,
         )
+        # Wake the compensation loop if it is waiting for a move to end.
+        if server.telemetry.enabled_substate == EnabledSubstate.STATIONARY:
+            self.stationary_event.set()
+        else:
+            self.stationary_event.clear()
 
         pos_error = [
             server.telemetry.measured_pos[i] - server.telemetry.commanded_pos[i]
@@ -558,11 +1062,67 @@ class HexapodCsc(hexrotcomm.BaseCsc):
         )
 
     def stop_compensation(self):
-        """Stop the compensation loop."""
-        self.compensation_wait_task.cancel()
+        """Stop the compensation loop.
+
+        Also forget the most recently commanded compensated position,
+        because the hexapod may not stay there (e.g. if the CSC faults
+        or is disabled).
+        """
+        self.pause_compensation()
         self.compensate_position = False
+        self._forget_compensated_position()
         self.evt_compensationMode.set_put(enabled=False)
 
+    async def _make_compensation(self, compensation_config):
+        """Make a compensation model and cache of compensation offsets.
+
+        Parameters
+        ----------
+        compensation_config : `dict`
+            Compensation configuration: the ``camera_config`` or
+            ``m2_config`` section of the CSC configuration.
+
+        Returns
+        -------
+        compensation : `Compensation`
+            Compensation model.
+        compensation_cache : `CompensationCache`
+            Cache of compensation offsets, using ``compensation``
+            or a `CompensationGrid` that samples it.
+        """
+        model_cache = self.compensation_model_cache
+        prev_num_built = model_cache.misses + model_cache.disk_hits
+        # Building a grid may take a few seconds,
+        # so do it in a thread to avoid blocking the event loop.
+        loop = asyncio.get_running_loop()
+        compensation, grid = await loop.run_in_executor(
+            None,
+            functools.partial(
+                model_cache.get,
+                subconfig=compensation_config,
+                grid_steps=self.compensation_grid_steps,
+            ),
+        )
+        if model_cache.misses + model_cache.disk_hits == prev_num_built:
+            self.log.info("Using cached compensation model")
+        if grid is None:
+            compensation_model = compensation
+        else:
+            compensation_model = grid
+            grid_shape = compensation_model.table.shape[:-1]
+            self.log.info(
+                f"Compensation grid shape={grid_shape}, "
+                f"memory={compensation_model.nbytes / 1e6:0.1f} MB, "
+                f"max interpolation error for x, y, z (um), u, v, w (deg)="
+                f"{compensation_model.max_error}"
+            )
+        offset_cache = compensation_cache.CompensationCache(
+            compensation=compensation_model,
+            max_size=self.compensation_cache_size,
+            resolution=self.compensation_cache_resolution,
+        )
+        return compensation, offset_cache
+
     def _make_position_set_command(self, position):
         """Make a POSITION_SET command for the low-level controller.
 
@@ -582,6 +1142,412 @@ class HexapodCsc(hexrotcomm.BaseCsc):
         }
         return self.make_command(code=enums.CommandCode.POSITION_SET, **command_kwargs)
 
+    def _apply_pending_compensation(self):
+        """Use the pending compensation model, if there is one.
+
+        Called between compensation updates, so each update
+        uses a single, consistent compensation model.
+        """
+        if self.pending_compensation is None:
+            return
+        self.compensation, self.compensation_cache = self.pending_compensation
+        self.pending_compensation = None
+        # Make sure the compensation loop applies the new model
+        # even if the compensation inputs have not changed.
+        self.last_compensation_seq_nums = None
+        self.log.info("Updated the compensation model")
+
+    def _forget_compensated_position(self):
+        """Forget the most recently commanded compensated position.
+
+        Call this if the hexapod may no longer be at that position,
+        so the next compensation update commands a move, without checking
+        the deadband or limiting the change in position.
+        """
+        self.last_compensated_pos = None
+        self.last_compensation_seq_nums = None
+
+    def _has_compensation_deadband(self):
+        """Return True if ``compensation_deadband`` is nonzero
+        for any axis.
+
+        If False then the compensation loop commands a move
+        for every update, even if nothing has changed.
+        """
+        return any(value > 0 for value in self.compensation_deadband)
+
+    def _compensation_inputs_depend_on_time(self):
+        """Return True if the compensation inputs may change with time,
+        even if the MTMount and MTRotator targets do not change.
+        """
+        return (
+            self.compensation_predict
+            or self.compensation_max_input_age is not None
+            or self.temperature_source.max_age is not None
+        )
+
+    def _get_compensation_input_velocities(self):
+        """Get the velocity of each compensation input.
+
+        Returns
+        -------
+        velocities : `numpy.ndarray`
+            Velocity of elevation, azimuth, rotation (deg/sec) and
+            temperature (C/sec) from the MTMount and MTRotator targets;
+            temperature velocity is always 0.
+            A missing target has velocity 0.
+        """
+        velocities = np.zeros(4)
+        mount_target = self.mtmount.evt_target.get()
+        if mount_target is not None:
+            velocities[0] = mount_target.elevationVelocity
+            velocities[1] = mount_target.azimuthVelocity
+        rotator_target = self.mtrotator.evt_target.get()
+        if rotator_target is not None:
+            velocities[2] = rotator_target.velocity
+        return velocities
+
+    def _update_adaptive_interval(self, compensation_inputs, offset):
+        """Set the interval until the next timer-driven compensation update
+        from how fast the compensation offset is changing.
+
+        Parameters
+        ----------
+        compensation_inputs : `CompensationInputs` or `None`
+            The current compensation inputs, or None if not available.
+        offset : `Position` or `None`
+            The compensation offset for ``compensation_inputs``,
+            or None if not available.
+
+        Notes
+        -----
+        The rate of change of the offset on each axis is the larger of:
+
+        * The rate predicted from the velocity of the MTMount and MTRotator
+          targets, using the Jacobian of the compensation model.
+          This responds as soon as a slew starts.
+        * The rate measured from this offset and the offset computed
+          by the previous call. This responds to changes
+          in temperature and to model changes.
+
+        The interval is the longest time in which no axis is expected
+        to change by more than ``compensation_tolerance``, limited to
+        the range [``compensation_min_interval``,
+        ``compensation_max_interval``]. Only affects timer-driven updates.
+
+        Do nothing if the compensation inputs are not available.
+        """
+        if compensation_inputs is None:
+            return
+        current_time = time.monotonic()
+        offset = np.array(dataclasses.astuple(offset))
+        jacobian = self.compensation.get_jacobian(**vars(compensation_inputs))[0]
+        rates = np.abs(jacobian @ self._get_compensation_input_velocities())
+        if self.last_adaptive_sample is not None:
+            previous_time, previous_offset = self.last_adaptive_sample
+            dt = current_time - previous_time
+            if dt > 0:
+                rates = np.maximum(rates, np.abs(offset - previous_offset) / dt)
+        self.last_adaptive_sample = (current_time, offset)
+
+        with np.errstate(divide="ignore"):
+            interval = float(np.min(np.array(self.compensation_tolerance) / rates))
+        interval = min(
+            max(interval, self.compensation_min_interval),
+            self.compensation_max_interval,
+        )
+        if interval != self.compensation_scheduler.interval:
+            self.log.debug(f"Set compensation interval to {interval:0.3f} seconds")
+            self.compensation_scheduler.set_interval(interval)
+
+    def _target_callback(self, data):
+        """Called when an MTMount or MTRotator target is received.
+
+        Trigger a compensation update, if ``compensation_trigger``
+        is "event".
+        """
+        self.compensation_trigger_event.set()
+
+    async def _wait_for_compensation_trigger(self, retry):
+        """Wait until it is time for the next compensation update.
+
+        Parameters
+        ----------
+        retry : `bool`
+            Was the previous update skipped because the hexapod was moving?
+
+        Notes
+        -----
+        If ``compensation_trigger`` is "timer" then wait for the next tick
+        of `compensation_scheduler`, which ticks every
+        ``compensation_interval`` seconds without drift.
+
+        If ``compensation_trigger`` is "event" then wait for a new MTMount
+        or MTRotator target, but no longer than ``compensation_max_staleness``
+        seconds after the start of the previous update (forever, if None),
+        then wait until at least ``compensation_min_spacing`` seconds
+        have passed since the previous update.
+
+        If ``retry`` is true then, in either mode, wait until telemetry
+        reports that the hexapod is stationary; this applies
+        the deferred update as soon as the move that caused it ends,
+        rather than up to ``compensation_interval`` seconds later.
+        """
+        if retry:
+            await self.stationary_event.wait()
+            # Keep the usual cadence from here on,
+            # without counting this wait as an overrun.
+            self.compensation_scheduler.reset()
+            return
+
+        if self.compensation_trigger == "timer":
+            await self.compensation_scheduler.wait()
+            return
+
+        if self.compensation_max_staleness is None:
+            timeout = None
+        else:
+            # Measure staleness from the previous update,
+            # not from the start of this wait.
+            timeout = max(
+                self.compensation_max_staleness
+                - (time.monotonic() - self.last_compensation_update_time),
+                0,
+            )
+        try:
+            await asyncio.wait_for(
+                self.compensation_trigger_event.wait(), timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            pass
+        elapsed = time.monotonic() - self.last_compensation_update_time
+        if elapsed < self.compensation_min_spacing:
+            await asyncio.sleep(self.compensation_min_spacing - elapsed)
+
+    async def _configure_temperature_source(self, config):
+        """Configure the source of temperature for compensation.
+
+        Parameters
+        ----------
+        config : `types.SimpleNamespace`
+            CSC configuration.
+        """
+        await self.temperature_source.close()
+        remote_key = (
+            config.temperature_sal_name,
+            config.temperature_sal_index,
+            config.temperature_topic_name,
+        )
+        if self.temperature_remote is not None and (
+            config.temperature_sal_name is None
+            or remote_key != self._temperature_remote_key
+        ):
+            await self.temperature_remote.close()
+            self.temperature_remote = None
+
+        if config.temperature_sal_name is None:
+            self.temperature_source = temperature_source.NullTemperatureSource()
+            return
+
+        if self.temperature_remote is None:
+            topic_prefix, _, topic_name = config.temperature_topic_name.partition("_")
+            if topic_prefix not in ("evt", "tel") or not topic_name:
+                raise salobj.ExpectedError(
+                    f"temperature_topic_name={config.temperature_topic_name!r} "
+                    "must start with evt_ or tel_"
+                )
+            self.temperature_remote = salobj.Remote(
+                domain=self.domain,
+                name=config.temperature_sal_name,
+                index=config.temperature_sal_index,
+                include=[topic_name],
+            )
+            self._temperature_remote_key = remote_key
+            await self.temperature_remote.start_task
+        self.temperature_source = temperature_source.TopicTemperatureSource(
+            topic=getattr(self.temperature_remote, config.temperature_topic_name),
+            field_name=config.temperature_field_name,
+            field_index=config.temperature_field_index,
+            time_constant=config.temperature_time_constant,
+            max_age=config.temperature_max_age,
+        )
+        self.log.info(
+            "Reading temperature from "
+            f"{config.temperature_sal_name}:{config.temperature_sal_index}."
+            f"{config.temperature_topic_name}.{config.temperature_field_name}"
+        )
+
+    def _extrapolate_input(self, position, velocity, tai, current_tai):
+        """Extrapolate a compensation input, if appropriate.
+
+        Parameters
+        ----------
+        position : `float`
+            Target position (deg).
+        velocity : `float`
+            Target velocity (deg/sec).
+        tai : `float`
+            Time at which the target has the specified position
+            (TAI unix seconds).
+        current_tai : `float`
+            Current time (TAI unix seconds).
+
+        Returns
+        -------
+        position : `float`
+            The target position, extrapolated to ``compensation_lead_time``
+            after ``current_tai`` if ``compensation_predict`` is true,
+            else to ``current_tai`` if the target is stale,
+            else unchanged.
+        """
+        if self.compensation_predict:
+            return position + velocity * (
+                current_tai + self.compensation_lead_time - tai
+            )
+        elif (
+            self.compensation_max_input_age is not None
+            and current_tai - tai > self.compensation_max_input_age
+        ):
+            return position + velocity * (current_tai - tai)
+        return position
+
+    def _is_stale_and_refused(self, tai, current_tai):
+        """Return True if a compensation input is stale and should
+        not be used.
+
+        Parameters
+        ----------
+        tai : `float`
+            Time at which the target has the specified position
+            (TAI unix seconds).
+        current_tai : `float`
+            Current time (TAI unix seconds).
+        """
+        return (
+            self.compensation_stale_input_policy == "refuse"
+            and self.compensation_max_input_age is not None
+            and current_tai - tai > self.compensation_max_input_age
+        )
+
+    def _get_max_compensation_change(self):
+        """Get the maximum change in position for one compensation move.
+
+        Returns
+        -------
+        max_change : `Position` or `None`
+            The maximum change in x, y, z (um), u, v, w (deg) that the
+            hexapod can make in the period between compensation updates
+            (see `_get_compensation_period`), or None if the low-level
+            controller has not reported its configuration or a reported
+            limit is not positive.
+
+        Notes
+        -----
+        The velocity limits are the values reported by the low-level
+        controller for each axis. The controller only reports the strut
+        acceleration, so the acceleration for each axis is estimated
+        by assuming that each axis takes as long to reach its maximum
+        velocity as a strut does.
+        """
+        config = self.evt_configuration.data
+        if config is None:
+            return None
+        velocities = (
+            config.maxVelocityXY,
+            config.maxVelocityXY,
+            config.maxVelocityZ,
+            config.maxVelocityUV,
+            config.maxVelocityUV,
+            config.maxVelocityW,
+        )
+        if min(velocities + (config.maxVelocityStrut, config.accelerationStrut)) <= 0:
+            return None
+        accel_duration = config.maxVelocityStrut / config.accelerationStrut
+        period = self._get_compensation_period()
+        max_changes = []
+        for velocity in velocities:
+            max_changes.append(
+                utils.get_max_move_distance(
+                    velocity=velocity,
+                    acceleration=velocity / accel_duration,
+                    duration=period,
+                )
+            )
+        return base.Position(*max_changes)
+
+    def _get_compensation_period(self):
+        """Get the minimum expected time between compensation updates (sec).
+
+        This is the current interval of ``compensation_scheduler``
+        (which differs from ``compensation_interval`` if
+        ``compensation_adaptive_interval`` is true) if
+        ``compensation_trigger`` is "timer", or
+        ``compensation_min_spacing`` if ``compensation_trigger`` is "event"
+        (or ``compensation_interval`` if ``compensation_min_spacing`` is 0).
+        """
+        if self.compensation_trigger == "event":
+            if self.compensation_min_spacing > 0:
+                return self.compensation_min_spacing
+            return self.compensation_interval
+        return self.compensation_scheduler.interval
+
+    def _compute_compensation(self):
+        """Get the current compensation inputs and offset.
+
+        Record the time taken in the "inputs" and "offset" stages
+        of `move_latency_recorder`.
+
+        Returns
+        -------
+        compensation : `types.SimpleNamespace`
+            Compensation, with fields:
+
+            * seq_nums: the sequence numbers of the compensation inputs,
+              as returned by `_get_compensation_seq_nums`.
+            * inputs: the compensation inputs (a `CompensationInputs`),
+              or None if not available.
+            * offset: the compensation offset (a `Position`),
+              or None if the inputs are not available.
+        """
+        recorder = self.move_latency_recorder
+        t0 = time.monotonic()
+        seq_nums = self._get_compensation_seq_nums()
+        inputs = self.get_compensation_inputs()
+        t1 = time.monotonic()
+        recorder.record("inputs", t1 - t0)
+        offset = None
+        if inputs is not None:
+            offset = self.compensation_cache.get_offset(inputs)
+            recorder.record("offset", time.monotonic() - t1)
+        return types.SimpleNamespace(seq_nums=seq_nums, inputs=inputs, offset=offset)
+
+    def _get_compensation_seq_nums(self):
+        """Get the sequence numbers of the compensation inputs.
+
+        Returns
+        -------
+        seq_nums : `tuple`
+            The private_seqNum of the most recent MTMount target event
+            and MTRotator target event (each None if there is no data),
+            and the temperature, quantized to the temperature element
+            of ``compensation_cache_resolution`` (as it is when computing
+            the offset), or None if unknown.
+
+        Notes
+        -----
+        The temperature is used instead of the number of temperature
+        samples, because samples arrive continuously, even if the
+        temperature does not change.
+        """
+        temperature = self.temperature_source.temperature
+        temperature_resolution = self.compensation_cache_resolution[3]
+        if temperature is not None and temperature_resolution > 0:
+            temperature = round(temperature / temperature_resolution)
+        return tuple(
+            None if data is None else data.private_seqNum
+            for data in (self.mtmount.evt_target.get(), self.mtrotator.evt_target.get())
+        ) + (temperature,)
+
     def _has_uncompensated_position(self):
         """Return True if the uncompensated position has been set,
         e.g. by a move command.
@@ -606,7 +1572,9 @@ class HexapodCsc(hexrotcomm.BaseCsc):
             raise salobj.ExpectedError("No uncompensated position to offset from")
         return base.Position.from_struct(uncompensated_data)
 
-    async def _move(self, uncompensated_pos, sync):
+    async def _move(
+        self, uncompensated_pos, sync, compensation_update=False, compensation=None
+    ):
         """Command a move and output appropriate events.
 
         Parameters
@@ -617,25 +1585,109 @@ class HexapodCsc(hexrotcomm.BaseCsc):
             keys are x, y, z (um), u, v, w (deg).
         sync : `bool`
             Should this be a synchronized move? Usually True.
+        compensation_update : `bool`, optional
+            Is this a compensation update from the compensation loop?
+            If True then:
+
+            * Skip the move if the compensation inputs are not available
+              (e.g. they are stale and ``compensation_stale_input_policy``
+              is "refuse"), so the hexapod keeps its current compensation
+              rather than moving to the uncompensated position.
+            * Skip the move if ``compensation_deadband`` is nonzero on any
+              axis and the compensated position differs from the most
+              recently commanded compensated position by no more than
+              ``compensation_deadband`` on every axis.
+            * If ``compensation_rate_limit`` is true, limit the change
+              in compensated position to what the hexapod can move
+              before the next compensation update.
+              The compensationOffset event reports the full (unlimited)
+              offset, and the compensatedPosition event reports
+              the limited position that was commanded.
+        compensation : `types.SimpleNamespace` or `None`, optional
+            The compensation for this move, as returned by
+            `_compute_compensation`, if already computed.
+            If None and compensation mode is enabled, compute it.
+            Ignored if compensation mode is disabled.
+
+        Returns
+        -------
+        moved : `bool`
+            True if a move was commanded, False if the move was skipped
+            (which is only possible if ``compensation_update`` is True).
         """
+        self._apply_pending_compensation()
+        recorder = self.move_latency_recorder
         compensation_offset = None
+        compensation_seq_nums = None
         if self.compensation_mode:
-            compensation_input = self.get_compensation_inputs()
-            if compensation_input is not None:
-                compensation_offset = self.compensation.get_offset(compensation_input)
+            if compensation is None:
+                compensation = self._compute_compensation()
+            compensation_seq_nums = compensation.seq_nums
+            compensation_input = compensation.inputs
+            compensation_offset = compensation.offset
+            if compensation_update and compensation_offset is None:
+                self.log.debug("Skip compensation; inputs not available")
+                return False
 
         if compensation_offset is not None:
             compensated_pos = uncompensated_pos + compensation_offset
         else:
             compensated_pos = uncompensated_pos
 
+        if (
+            compensation_update
+            and self._has_compensation_deadband()
+            and self.last_compensated_pos is not None
+            and all(
+                abs(new_value - old_value) <= deadband
+                for new_value, old_value, deadband in zip(
+                    dataclasses.astuple(compensated_pos),
+                    dataclasses.astuple(self.last_compensated_pos),
+                    self.compensation_deadband,
+                )
+            )
+        ):
+            self.log.debug("Skip compensation; change is within the deadband")
+            self.last_compensation_seq_nums = compensation_seq_nums
+            return False
+
+        if (
+            compensation_update
+            and self.compensation_rate_limit
+            and self.last_compensated_pos is not None
+        ):
+            max_change = self._get_max_compensation_change()
+            if max_change is not None:
+                limited_pos = utils.limit_position_change(
+                    start=self.last_compensated_pos,
+                    end=compensated_pos,
+                    max_change=max_change,
+                )
+                if limited_pos != compensated_pos:
+                    self.log.debug(
+                        "Limit the change in compensated position; "
+                        f"desired={compensated_pos}, commanded={limited_pos}, "
+                        f"step={limited_pos - self.last_compensated_pos}"
+                    )
+                    compensated_pos = limited_pos
+                    # More steps are needed, so do not let the
+                    # compensation loop skip the next update.
+                    compensation_seq_nums = None
+
+        t0 = time.monotonic()
         cmd1 = self._make_position_set_command(compensated_pos)
         cmd2 = self.make_command(
             code=enums.CommandCode.SET_ENABLED_SUBSTATE,
             param1=enums.SetEnabledSubstateParam.MOVE_POINT_TO_POINT,
             param2=sync,
         )
+        t1 = time.monotonic()
+        recorder.record("build", t1 - t0)
         await self.run_multiple_commands(cmd1, cmd2)
+        t2 = time.monotonic()
+        recorder.record("command", t2 - t1)
+        self.last_compensated_pos = compensated_pos
+        self.last_compensation_seq_nums = compensation_seq_nums
 
         self.evt_uncompensatedPosition.set_put(**vars(uncompensated_pos))
         self.evt_compensatedPosition.set_put(**vars(compensated_pos))
@@ -647,3 +1699,6 @@ class HexapodCsc(hexrotcomm.BaseCsc):
                 temperature=compensation_input.temperature,
                 **vars(compensation_offset),
             )
+        recorder.record("publish", time.monotonic() - t2)
+        recorder.maybe_log()
+        return True
@@ -0,0 +1,171 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ["LatencyRecorder", "LATENCY_PERCENTILES"]
+
+import time
+
+import numpy as np
+
+# Percentiles reported by `LatencyRecorder`.
+LATENCY_PERCENTILES = (50, 95, 99)
+
+
+class LatencyRecorder:
+    """Record the most recent durations of named stages of an operation,
+    and report percentiles.
+
+    Parameters
+    ----------
+    stage_names : `list` [`str`]
+        Names of the stages to record.
+    size : `int`, optional
+        Number of durations to keep for each stage;
+        older durations are overwritten.
+    log : `logging.Logger` or `None`, optional
+        Logger for percentiles. If None then percentiles are not logged.
+    log_interval : `float` or `None`, optional
+        Interval between percentile log messages (sec).
+        If None then percentiles are not logged.
+    name : `str`, optional
+        Name of the operation, for log messages.
+
+    Raises
+    ------
+    ValueError
+        If ``stage_names`` is empty or has duplicates,
+        or ``size`` is not positive.
+
+    Notes
+    -----
+    Durations are kept in a fixed-size circular buffer for each stage,
+    so recording never allocates memory.
+
+    If logging is enabled then `maybe_log` logs the percentiles at info level
+    if at least ``log_interval`` seconds have passed since the previous
+    log message. The durations are not reset by logging.
+    """
+
+    def __init__(self, stage_names, size=1000, log=None, log_interval=None, name=""):
+        if len(stage_names) == 0:
+            raise ValueError("stage_names must not be empty")
+        if len(set(stage_names)) != len(stage_names):
+            raise ValueError(f"stage_names={stage_names} has duplicates")
+        if size <= 0:
+            raise ValueError(f"size={size} must be positive")
+        self.stage_names = tuple(stage_names)
+        self.size = size
+        self.log = log
+        self.log_interval = log_interval
+        self.name = name
+        self._stage_indices = {name: i for i, name in enumerate(self.stage_names)}
+        self._durations = np.zeros((len(self.stage_names), size))
+        # Number of durations recorded for each stage.
+        self._counts = np.zeros(len(self.stage_names), dtype=int)
+        self._log_time = time.monotonic()
+
+    def clear(self):
+        """Discard all recorded durations."""
+        self._counts[:] = 0
+
+    def get_count(self, stage_name):
+        """Get the total number of durations recorded for a stage.
+
+        Parameters
+        ----------
+        stage_name : `str`
+            Stage name.
+
+        Raises
+        ------
+        KeyError
+            If ``stage_name`` is not a known stage.
+        """
+        return int(self._counts[self._stage_indices[stage_name]])
+
+    def record(self, stage_name, duration):
+        """Record the duration of one execution of a stage.
+
+        Parameters
+        ----------
+        stage_name : `str`
+            Stage name.
+        duration : `float`
+            Duration of the stage (sec).
+
+        Raises
+        ------
+        KeyError
+            If ``stage_name`` is not a known stage.
+        """
+        i = self._stage_indices[stage_name]
+        self._durations[i, self._counts[i] % self.size] = duration
+        self._counts[i] += 1
+
+    def get_percentiles(self, percentiles=LATENCY_PERCENTILES):
+        """Get percentiles of the recorded durations for each stage.
+
+        Parameters
+        ----------
+        percentiles : `list` [`float`], optional
+            Percentiles to compute, in the range [0, 100].
+
+        Returns
+        -------
+        stage_percentiles : `dict` [`str`, `dict` [`float`, `float`]]
+            Dict of stage name: dict of percentile: duration (sec),
+            computed from the most recent ``size`` durations.
+            Stages with no durations are omitted.
+        """
+        stage_percentiles = dict()
+        for i, stage_name in enumerate(self.stage_names):
+            count = min(self._counts[i], self.size)
+            if count == 0:
+                continue
+            values = np.percentile(self._durations[i, 0:count], percentiles)
+            stage_percentiles[stage_name] = {
+                percentile: float(value)
+                for percentile, value in zip(percentiles, values)
+            }
+        return stage_percentiles
+
+    def format(self):
+        """Format the percentiles for each stage as a one-line string,
+        with durations in milliseconds.
+        """
+        items = []
+        for stage_name, percentiles in self.get_percentiles().items():
+            values_str = "/".join(
+                f"{value*1000:0.2f}" for value in percentiles.values()
+            )
+            items.append(f"{stage_name}={values_str}")
+        percentiles_str = "/".join(f"p{value}" for value in LATENCY_PERCENTILES)
+        return f"{percentiles_str} (msec): " + ", ".join(items)
+
+    def maybe_log(self):
+        """Log the percentiles, if logging is enabled and it is time."""
+        if self.log is None or self.log_interval is None:
+            return
+        current_time = time.monotonic()
+        if current_time - self._log_time < self.log_interval:
+            return
+        self._log_time = current_time
+        self.log.info(f"{self.name} latency {self.format()}")
@@ -0,0 +1,105 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ["make_lookup_tables", "set_config_lookup_tables"]
+
+import warnings
+
+import numpy as np
+
+from . import structs
+
+# Dict of low-level controller lookup table prefix: compensation cause name
+LUT_PREFIX_CAUSES = dict(el_lut="elevation", az_lut="azimuth", temp_lut="temperature")
+
+AXIS_NAMES = ("x", "y", "z", "u", "v", "w")
+
+
+def make_lookup_tables(compensation):
+    """Sample a compensation model onto the low-level controller's
+    lookup table grids.
+
+    The grids are:
+
+    * elevation: 0 to 90 deg, with `structs.ELEVATION_ELEMENTS` points.
+    * azimuth: 0 to 360 deg, with `structs.AZIMUTH_ELEMENTS` points.
+    * temperature: ``compensation.min_temperature`` to
+      ``compensation.max_temperature``,
+      with `structs.TEMPERATURE_ELEMENTS` points.
+
+    Parameters
+    ----------
+    compensation : `Compensation`
+        Compensation model.
+
+    Returns
+    -------
+    tables : `dict` [`str`, `numpy.ndarray`]
+        Lookup tables, as a dict of `structs.Config` field name: values,
+        e.g. "el_lut_index" for the elevation grid
+        and "el_lut_x" for the x offset due to elevation.
+
+    Notes
+    -----
+    The model is additive, so each table contains the offset due to
+    one cause alone, including the constant term for that cause.
+    The low-level controller has no table for camera rotation,
+    so the rotation term of the model is not represented.
+    Nor can the tables represent cross terms (terms that depend on
+    two causes at once), so they are omitted, with a warning.
+    """
+    if getattr(compensation, "has_cross_terms", False):
+        warnings.warn(
+            "The lookup tables cannot represent cross terms; they are omitted",
+            RuntimeWarning,
+        )
+    grids = dict(
+        el_lut=np.linspace(0, 90, structs.ELEVATION_ELEMENTS),
+        az_lut=np.linspace(0, 360, structs.AZIMUTH_ELEMENTS),
+        temp_lut=np.linspace(
+            compensation.min_temperature,
+            compensation.max_temperature,
+            structs.TEMPERATURE_ELEMENTS,
+        ),
+    )
+    tables = dict()
+    for prefix, cause in LUT_PREFIX_CAUSES.items():
+        index = grids[prefix]
+        offsets = compensation.get_cause_offsets(cause=cause, values=index)
+        tables[f"{prefix}_index"] = index
+        for i, axis_name in enumerate(AXIS_NAMES):
+            tables[f"{prefix}_{axis_name}"] = offsets[:, i]
+    return tables
+
+
+def set_config_lookup_tables(config, compensation):
+    """Set the lookup tables in a low-level controller configuration
+    from a compensation model.
+
+    Parameters
+    ----------
+    config : `structs.Config`
+        Low-level controller configuration. Updated in place.
+    compensation : `Compensation`
+        Compensation model.
+    """
+    for name, values in make_lookup_tables(compensation).items():
+        setattr(config, name, tuple(values))
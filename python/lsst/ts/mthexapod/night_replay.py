@@ -0,0 +1,450 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = [
+    "REPLAY_INPUT_NAMES",
+    "ReplaySummary",
+    "read_target_chunks",
+    "replay_target_chunks",
+    "replay_night",
+    "run_night_replay",
+]
+
+import argparse
+import csv
+import dataclasses
+import itertools
+import pathlib
+import zipfile
+
+import numpy as np
+
+from . import base
+from . import constants
+from . import enums
+from . import utils
+from .compensation import Compensation
+
+# Names of the columns (CSV files) or arrays (NPZ files) read by
+# `read_target_chunks`. Temperature is optional.
+REPLAY_INPUT_NAMES = ("tai", "elevation", "azimuth", "rotation", "temperature")
+
+# Names of the columns written by `replay_night`.
+_OUTPUT_NAMES = (
+    ("tai", "elevation", "azimuth", "rotation", "temperature")
+    + tuple(f"compensated_{name}" for name in base.Position.field_names())
+    + tuple(f"move_{name}" for name in base.Position.field_names())
+    + ("num_violations",)
+)
+
+# Default number of rows per chunk.
+DEFAULT_CHUNK_SIZE = 100000
+
+
+@dataclasses.dataclass
+class ReplaySummary:
+    """Summary of replaying compensation over recorded targets.
+
+    Per-axis values are for x, y, z (um), u, v, w (deg).
+    """
+
+    # Number of targets replayed.
+    num_targets: int = 0
+    # Number of targets whose elevation was clamped to [0, 90].
+    num_clamped: int = 0
+    # Number of targets whose compensated position is out of range
+    # on any axis.
+    num_bad_targets: int = 0
+    # Number of targets whose compensated position is out of range,
+    # for each axis.
+    num_violations: np.ndarray = dataclasses.field(
+        default_factory=lambda: np.zeros(6, dtype=int)
+    )
+    # Minimum and maximum compensated position for each axis.
+    min_position: np.ndarray = dataclasses.field(
+        default_factory=lambda: np.full(6, np.inf)
+    )
+    max_position: np.ndarray = dataclasses.field(
+        default_factory=lambda: np.full(6, -np.inf)
+    )
+    # Maximum and sum of absolute move sizes for each axis.
+    max_move: np.ndarray = dataclasses.field(default_factory=lambda: np.zeros(6))
+    sum_move: np.ndarray = dataclasses.field(default_factory=lambda: np.zeros(6))
+
+    def update(self, chunk_result):
+        """Update the summary with the result of one chunk.
+
+        Parameters
+        ----------
+        chunk_result : `dict` [`str`, `numpy.ndarray`]
+            Result of one chunk, as yielded by `replay_target_chunks`.
+        """
+        compensated_positions = chunk_result["compensated_positions"]
+        violations = chunk_result["position_violations"]
+        moves = np.abs(chunk_result["move_sizes"])
+        self.num_targets += len(compensated_positions)
+        self.num_clamped += chunk_result["num_clamped"]
+        self.num_bad_targets += np.count_nonzero(np.any(violations, axis=1))
+        self.num_violations += np.count_nonzero(violations, axis=0)
+        self.min_position = np.minimum(
+            self.min_position, compensated_positions.min(axis=0)
+        )
+        self.max_position = np.maximum(
+            self.max_position, compensated_positions.max(axis=0)
+        )
+        self.max_move = np.maximum(self.max_move, moves.max(axis=0))
+        self.sum_move += moves.sum(axis=0)
+
+    def format(self):
+        """Format the summary as a multi-line string."""
+        names = " ".join(base.Position.field_names())
+        return "\n".join(
+            (
+                f"Replayed {self.num_targets} targets; "
+                f"{self.num_bad_targets} have a compensated position out of range; "
+                f"{self.num_clamped} had elevation clamped to [0, 90]",
+                f"Per-axis values for {names}:",
+                f"  num violations: {self.num_violations.tolist()}",
+                f"  min position: {self.min_position.tolist()}",
+                f"  max position: {self.max_position.tolist()}",
+                f"  max move: {self.max_move.tolist()}",
+                f"  total move: {self.sum_move.tolist()}",
+            )
+        )
+
+
+def read_target_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Read recorded targets from a file, in chunks.
+
+    Only one chunk is held in memory at a time, so memory use
+    does not depend on the size of the file.
+
+    Parameters
+    ----------
+    path : `str` or `pathlib.Path`
+        Path to the data file. The format is determined by the suffix:
+
+        * ``.csv``: a CSV file with a header row of column names.
+        * ``.npz``: a numpy ``.npz`` file (compressed or not)
+          with one 1-dimensional array per column.
+
+        There must be data for tai (TAI unix seconds),
+        elevation, azimuth (MTMount target), and rotation
+        (MTRotator target position), in deg.
+        Data for temperature (C) is optional; it defaults to 0.
+        Other columns are ignored.
+    chunk_size : `int`, optional
+        Maximum number of rows per chunk.
+
+    Yields
+    ------
+    chunk : `dict` [`str`, `numpy.ndarray`]
+        Data for each name in ``REPLAY_INPUT_NAMES``.
+
+    Raises
+    ------
+    ValueError
+        If the file suffix is not recognized or a required column
+        is missing.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size={chunk_size} must be positive")
+    path = pathlib.Path(path)
+    if path.suffix == ".csv":
+        yield from _read_csv_chunks(path, chunk_size)
+    elif path.suffix == ".npz":
+        yield from _read_npz_chunks(path, chunk_size)
+    else:
+        raise ValueError(f"Unsupported file type {path.suffix!r}; must be .csv or .npz")
+
+
+def replay_target_chunks(compensation, chunks, uncompensated_position, position_limits):
+    """Compute compensated positions for chunks of recorded targets.
+
+    Parameters
+    ----------
+    compensation : `BaseCompensation`
+        Compensation model.
+    chunks : iterable of `dict` [`str`, `numpy.ndarray`]
+        Chunks of targets, as yielded by `read_target_chunks`.
+    uncompensated_position : `Position`
+        Uncompensated position of the hexapod.
+    position_limits : `PositionLimits`
+        Position limits.
+
+    Yields
+    ------
+    chunk_result : `dict` [`str`, `numpy.ndarray`]
+        The input chunk, plus:
+
+        * compensated_positions: compensated positions, with shape (N, 6).
+        * position_violations: True for each axis of each compensated
+          position that is out of range, with shape (N, 6).
+        * move_sizes: change in compensated position from the previous
+          target, with shape (N, 6). Zero for the first target.
+        * num_clamped: the number of targets whose elevation
+          was clamped to [0, 90].
+
+    Notes
+    -----
+    This evaluates the raw compensation model for each target:
+    `BaseCompensation.get_offsets` followed by a vectorized version
+    of `check_position`. Elevation is clamped to [0, 90], as in the CSC.
+    It does not model the rest of the CSC's compensation loop:
+    the offset cache or grid, target prediction, the deadband,
+    rate limiting, or the timing of compensation updates.
+    """
+    uncompensated_array = np.array(dataclasses.astuple(uncompensated_position))
+    prev_position = None
+    for chunk in chunks:
+        if len(chunk["elevation"]) == 0:
+            continue
+        elevation = np.clip(chunk["elevation"], 0, 90)
+        offsets = compensation.get_offsets(
+            elevation=elevation,
+            azimuth=chunk["azimuth"],
+            rotation=chunk["rotation"],
+            temperature=chunk["temperature"],
+        )
+        compensated_positions = offsets + uncompensated_array
+        if prev_position is None:
+            prev_position = compensated_positions[0]
+        move_sizes = np.diff(
+            compensated_positions, axis=0, prepend=prev_position[np.newaxis, :]
+        )
+        prev_position = compensated_positions[-1]
+        chunk_result = dict(chunk)
+        chunk_result.update(
+            compensated_positions=compensated_positions,
+            position_violations=utils.get_position_limit_violations(
+                positions=compensated_positions, limits=position_limits
+            ),
+            move_sizes=move_sizes,
+            num_clamped=int(np.count_nonzero(elevation != chunk["elevation"])),
+        )
+        yield chunk_result
+
+
+def replay_night(
+    path,
+    compensation,
+    uncompensated_position,
+    position_limits,
+    output_path=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+):
+    """Replay compensation over a file of recorded targets.
+
+    Memory use is bounded by ``chunk_size``, regardless of file size.
+
+    Parameters
+    ----------
+    path : `str` or `pathlib.Path`
+        Path to the data file; see `read_target_chunks` for the format.
+    compensation : `BaseCompensation`
+        Compensation model.
+    uncompensated_position : `Position`
+        Uncompensated position of the hexapod.
+    position_limits : `PositionLimits`
+        Position limits.
+    output_path : `str` or `pathlib.Path` or `None`, optional
+        If not None, write a CSV file with one row per target:
+        the inputs, compensated position, move size
+        and number of axes out of range.
+    chunk_size : `int`, optional
+        Maximum number of targets to process at once.
+
+    Returns
+    -------
+    summary : `ReplaySummary`
+        Summary of the results.
+    """
+    summary = ReplaySummary()
+    chunk_results = replay_target_chunks(
+        compensation=compensation,
+        chunks=read_target_chunks(path, chunk_size=chunk_size),
+        uncompensated_position=uncompensated_position,
+        position_limits=position_limits,
+    )
+    if output_path is None:
+        for chunk_result in chunk_results:
+            summary.update(chunk_result)
+        return summary
+
+    with open(output_path, "w", newline="") as output_file:
+        output_file.write(",".join(_OUTPUT_NAMES) + "\n")
+        for chunk_result in chunk_results:
+            summary.update(chunk_result)
+            output_data = np.column_stack(
+                [chunk_result[name] for name in REPLAY_INPUT_NAMES]
+                + [
+                    chunk_result["compensated_positions"],
+                    chunk_result["move_sizes"],
+                    np.count_nonzero(chunk_result["position_violations"], axis=1),
+                ]
+            )
+            np.savetxt(output_file, output_data, delimiter=",", fmt="%.10g")
+    return summary
+
+
+def run_night_replay(args=None):
+    """Command-line interface to `replay_night`.
+
+    Parameters
+    ----------
+    args : `list` [`str`], optional
+        Command-line arguments; if None then use `sys.argv`.
+    """
+    parser = argparse.ArgumentParser(
+        description="Evaluate the raw hexapod compensation model over recorded "
+        "MTMount and MTRotator targets, and report limit violations and move sizes. "
+        "This does not model the CSC's cache, deadband, rate limiting or timing."
+    )
+    parser.add_argument("config", help="CSC configuration file.")
+    parser.add_argument(
+        "index",
+        type=int,
+        choices=[int(value) for value in enums.SalIndex],
+        help="SAL index of the hexapod: 1 for the Camera, 2 for M2.",
+    )
+    parser.add_argument(
+        "input",
+        help="Recorded targets: a .csv or .npz file with data for "
+        "tai, elevation, azimuth, rotation and (optionally) temperature.",
+    )
+    parser.add_argument(
+        "--output", help="Output CSV file with one row of results per target."
+    )
+    parser.add_argument(
+        "--position",
+        type=float,
+        nargs=6,
+        metavar=("X", "Y", "Z", "U", "V", "W"),
+        help="Uncompensated position: x, y, z (um), u, v, w (deg). "
+        "Defaults to reference_position from the configuration.",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Number of targets to process at once.",
+    )
+    namespace = parser.parse_args(args)
+
+    index = enums.SalIndex(namespace.index)
+    config = utils.load_csc_config(path=namespace.config, index=index)
+    if namespace.position is None:
+        uncompensated_position = base.Position(*config["reference_position"])
+    else:
+        uncompensated_position = base.Position(*namespace.position)
+    summary = replay_night(
+        path=namespace.input,
+        compensation=Compensation.from_config(config),
+        uncompensated_position=uncompensated_position,
+        position_limits=constants.MAX_POSITION_LIMITS[index],
+        output_path=namespace.output,
+        chunk_size=namespace.chunk_size,
+    )
+    print(summary.format())
+
+
+def _make_chunk(columns, nrows):
+    """Make a chunk from a dict of column name: data,
+    filling in temperature if missing.
+    """
+    chunk = dict()
+    for name in REPLAY_INPUT_NAMES:
+        if name in columns:
+            chunk[name] = np.asarray(columns[name], dtype=float)
+        elif name == "temperature":
+            chunk[name] = np.zeros(nrows)
+        else:
+            raise ValueError(f"Missing required data for {name}")
+    return chunk
+
+
+def _read_csv_chunks(path, chunk_size):
+    """Read chunks from a CSV file; see `read_target_chunks`."""
+    with open(path, "r", newline="") as f:
+        reader = csv.reader(f)
+        column_names = [name.strip() for name in next(reader)]
+        indices = {
+            name: column_names.index(name)
+            for name in REPLAY_INPUT_NAMES
+            if name in column_names
+        }
+        _make_chunk(indices, nrows=0)  # check for missing columns
+        while True:
+            rows = list(itertools.islice(reader, chunk_size))
+            if not rows:
+                return
+            columns = {
+                name: [row[index] for row in rows] for name, index in indices.items()
+            }
+            yield _make_chunk(columns, nrows=len(rows))
+
+
+def _read_npz_chunks(path, chunk_size):
+    """Read chunks from a numpy .npz file; see `read_target_chunks`.
+
+    Read each array incrementally from the zip file, rather than using
+    `numpy.load`, which reads an entire array at once.
+    """
+    with zipfile.ZipFile(path, "r") as zf:
+        available_names = {
+            name[: -len(".npy")] for name in zf.namelist() if name.endswith(".npy")
+        }
+        names = [name for name in REPLAY_INPUT_NAMES if name in available_names]
+        _make_chunk({name: None for name in names}, nrows=0)
+
+        files = {name: zf.open(f"{name}.npy", "r") for name in names}
+        try:
+            readers = dict()
+            nrows = None
+            for name, f in files.items():
+                version = np.lib.format.read_magic(f)
+                if version == (1, 0):
+                    header = np.lib.format.read_array_header_1_0(f)
+                else:
+                    header = np.lib.format.read_array_header_2_0(f)
+                shape, fortran_order, dtype = header
+                if len(shape) != 1:
+                    raise ValueError(f"Array {name} has shape {shape}; must be 1-D")
+                if dtype.hasobject:
+                    raise ValueError(f"Array {name} has unsupported dtype {dtype}")
+                if nrows is None:
+                    nrows = shape[0]
+                elif shape[0] != nrows:
+                    raise ValueError(
+                        f"Array {name} has {shape[0]} elements; expected {nrows}"
+                    )
+                readers[name] = (f, dtype)
+
+            for start in range(0, nrows, chunk_size):
+                nread = min(chunk_size, nrows - start)
+                columns = {
+                    name: np.frombuffer(f.read(nread * dtype.itemsize), dtype=dtype)
+                    for name, (f, dtype) in readers.items()
+                }
+                yield _make_chunk(columns, nrows=nread)
+        finally:
+            for f in files.values():
+                f.close()
@@ -58,28 +58,31 @@ class RangedPolynomial:
             raise ValueError(f"coeffs={coeffs} must contain at least one element")
         if min_x >= max_x:
             raise ValueError(f"min_x {min_x} >= max_x {max_x}")
-        linear_coeff = coeffs[1] if len(coeffs) > 1 else 0
         self.coeffs = coeffs
         self.min_x = min_x
         self.max_x = max_x
+        self._linear_coeff = coeffs[1] if len(coeffs) > 1 else 0
         self._inrange_poly = np.polynomial.polynomial.Polynomial(self.coeffs)
-        self._min_poly = np.polynomial.polynomial.Polynomial(
-            [self._inrange_poly(self.min_x), linear_coeff]
-        )
-        self._max_poly = np.polynomial.polynomial.Polynomial(
-            [self._inrange_poly(self.max_x), linear_coeff]
-        )
 
     def __call__(self, x):
         """Compute the value of the function.
 
         Parameters
         ----------
-        x : `float`
-            Input value.
+        x : `float` or `numpy.ndarray`
+            Input value or values.
+
+        Returns
+        -------
+        y : `float` or `numpy.ndarray`
+            The value of the function: a scalar if ``x`` is a scalar,
+            else an array with the same shape as ``x``.
+
+        Notes
+        -----
+        The function is computed as the polynomial evaluated at
+        x clipped to [min_x, max_x], plus C1 times the amount by which
+        x was clipped. This works for scalars and arrays alike.
         """
-        if self.min_x <= x <= self.max_x:
-            return self._inrange_poly(x)
-        elif x < self.min_x:
-            return self._min_poly(x - self.min_x)
-        return self._max_poly(x - self.max_x)
+        clipped_x = np.clip(x, self.min_x, self.max_x)
+        return self._inrange_poly(clipped_x) + self._linear_coeff * (x - clipped_x)
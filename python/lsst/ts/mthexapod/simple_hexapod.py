@@ -256,6 +256,75 @@ class SimpleHexapod:
             lengths -= self.neutral_actuator_lengths
         return lengths
 
+    def compute_actuator_lengths_array(self, positions, absolute=False):
+        """Compute actuator lengths for many positions of the pivot point.
+
+        This is a vectorized equivalent of calling `compute_mirror_positions`
+        and `compute_actuator_lengths` for each position.
+
+        Parameters
+        ----------
+        positions : `numpy.ndarray`
+            Positions of the pivot point, as an array of shape (N, 6)
+            where the columns are x, y, z (relative to the neutral
+            pivot point) and the rotation about x, then y, then z (deg).
+        absolute : `bool`, optional
+            If True then return end to end actuator lengths.
+            If False then return lengths relative to neutral lengths.
+
+        Returns
+        -------
+        actuator_lengths : `numpy.ndarray`
+            Length of each actuator, as an array of shape (N, 6).
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, 6)
+        angles = positions[:, 3:] * utils.RAD_PER_DEG
+        cos = np.cos(angles)
+        sin = np.sin(angles)
+        zeros = np.zeros(len(positions))
+        ones = np.ones(len(positions))
+
+        def make_rotation_matrices(rows):
+            return np.moveaxis(np.array(rows), -1, 0)
+
+        rot_x = make_rotation_matrices(
+            [
+                [ones, zeros, zeros],
+                [zeros, cos[:, 0], -sin[:, 0]],
+                [zeros, sin[:, 0], cos[:, 0]],
+            ]
+        )
+        rot_y = make_rotation_matrices(
+            [
+                [cos[:, 1], zeros, sin[:, 1]],
+                [zeros, ones, zeros],
+                [-sin[:, 1], zeros, cos[:, 1]],
+            ]
+        )
+        rot_z = make_rotation_matrices(
+            [
+                [cos[:, 2], -sin[:, 2], zeros],
+                [sin[:, 2], cos[:, 2], zeros],
+                [zeros, zeros, ones],
+            ]
+        )
+        # Rotate about x, then y, then z, as per compute_mirror_positions.
+        rotation = rot_z @ rot_y @ rot_x
+        mirror_pos_in_pivot_frame = (
+            np.array(self.neutral_mirror_positions) - self.neutral_pivot
+        )
+        mirror_positions = (
+            np.einsum("nij,aj->nai", rotation, mirror_pos_in_pivot_frame)
+            + self.neutral_pivot
+            + positions[:, np.newaxis, :3]
+        )
+        lengths = np.linalg.norm(
+            mirror_positions - np.array(self.base_positions), axis=-1
+        )
+        if not absolute:
+            lengths -= self.neutral_actuator_lengths
+        return lengths
+
     def compute_mirror_positions(self, pos, xyzrot):
         """Compute the actuator mirror positions needed to move the pivot point
         to a specified orientation.
@@ -0,0 +1,358 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = [
+    "compute_sky_grid",
+    "make_grid_axis",
+    "make_simple_hexapod",
+    "run_sky_grid",
+]
+
+import argparse
+import concurrent.futures
+import dataclasses
+import math
+
+import numpy as np
+
+from . import base
+from . import compensation_grid
+from . import constants
+from . import enums
+from . import mock_controller
+from . import simple_hexapod
+from . import utils
+from .compensation import CAUSE_NAMES, Compensation
+
+# Default number of grid points per shard.
+DEFAULT_SHARD_SIZE = 50000
+
+# State of a worker process; set by `_init_worker`.
+_worker_state = None
+
+
+def make_grid_axis(min_value, max_value, step):
+    """Make evenly spaced grid values spanning a range.
+
+    Parameters
+    ----------
+    min_value : `float`
+        Minimum value.
+    max_value : `float`
+        Maximum value; must be >= ``min_value``.
+    step : `float`
+        Maximum spacing between values; must be positive.
+        The actual spacing is chosen to evenly divide the range,
+        so it may be a bit smaller.
+
+    Returns
+    -------
+    values : `numpy.ndarray`
+        Grid values, including ``min_value`` and ``max_value``.
+    """
+    if step <= 0:
+        raise ValueError(f"step={step} must be positive")
+    if max_value < min_value:
+        raise ValueError(f"max_value={max_value} < min_value={min_value}")
+    return np.linspace(
+        min_value, max_value, math.ceil((max_value - min_value) / step) + 1
+    )
+
+
+def make_simple_hexapod():
+    """Make a `SimpleHexapod` with the geometry and actuator limits
+    of the mock controller.
+    """
+    controller_class = mock_controller.MockMTHexapodController
+    return simple_hexapod.SimpleHexapod(
+        base_positions=controller_class.actuator_base_positions,
+        mirror_positions=controller_class.actuator_mirror_positions,
+        pivot=controller_class.pivot,
+        min_length=controller_class.actuator_min_length,
+        max_length=controller_class.actuator_max_length,
+        speed=controller_class.actuator_speed,
+    )
+
+
+def compute_sky_grid(
+    compensation,
+    hexapod,
+    uncompensated_position,
+    position_limits,
+    grid_axes,
+    max_workers=None,
+    shard_size=DEFAULT_SHARD_SIZE,
+):
+    """Compute compensated positions and actuator lengths on a grid
+    of elevation, azimuth, rotation and temperature.
+
+    Parameters
+    ----------
+    compensation : `BaseCompensation`
+        Compensation model.
+    hexapod : `SimpleHexapod`
+        Hexapod model, used to compute actuator lengths.
+    uncompensated_position : `Position`
+        Uncompensated position of the hexapod.
+    position_limits : `PositionLimits`
+        Position limits.
+    grid_axes : `list` [`numpy.ndarray`]
+        Grid values for elevation, azimuth, rotation (deg)
+        and temperature (C).
+    max_workers : `int` or `None`, optional
+        Maximum number of worker processes. If None then use the default
+        for `concurrent.futures.ProcessPoolExecutor`. If 0 then compute
+        the grid in this process.
+    shard_size : `int`, optional
+        Number of grid points computed by each task.
+
+    Returns
+    -------
+    results : `dict` [`str`, `numpy.ndarray`]
+        Results, with these keys, where ``grid_shape`` is
+        (n_elevation, n_azimuth, n_rotation, n_temperature):
+
+        * elevation, azimuth, rotation, temperature: the grid axes.
+        * offsets: compensation offsets x, y, z (um), u, v, w (deg),
+          with shape ``grid_shape + (6,)``.
+        * compensated_positions: uncompensated position + offsets,
+          with shape ``grid_shape + (6,)``.
+        * actuator_lengths: actuator lengths relative to the neutral
+          lengths (um), with shape ``grid_shape + (6,)``.
+        * position_violations: True for each axis of each compensated
+          position that is outside ``position_limits``,
+          with shape ``grid_shape + (6,)``.
+        * actuator_violations: True for each actuator length that is
+          outside the actuator's range, with shape ``grid_shape + (6,)``.
+    """
+    if shard_size < 1:
+        raise ValueError(f"shard_size={shard_size} must be positive")
+    grid_axes = [np.asarray(axis, dtype=float) for axis in grid_axes]
+    if len(grid_axes) != len(CAUSE_NAMES):
+        raise ValueError(f"grid_axes must have {len(CAUSE_NAMES)} items")
+    grid_shape = tuple(len(axis) for axis in grid_axes)
+    npoints = math.prod(grid_shape)
+    offsets = np.empty((npoints, 6))
+    actuator_lengths = np.empty((npoints, 6))
+    initargs = (
+        compensation,
+        hexapod,
+        np.array(dataclasses.astuple(uncompensated_position)),
+        grid_axes,
+    )
+    shard_starts = range(0, npoints, shard_size)
+
+    def save_shard_result(result):
+        start, shard_offsets, shard_actuator_lengths = result
+        offsets[start : start + len(shard_offsets)] = shard_offsets
+        actuator_lengths[start : start + len(shard_offsets)] = shard_actuator_lengths
+
+    if max_workers == 0:
+        _init_worker(*initargs)
+        for start in shard_starts:
+            save_shard_result(_compute_shard(start, min(start + shard_size, npoints)))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=initargs
+        ) as executor:
+            futures = [
+                executor.submit(_compute_shard, start, min(start + shard_size, npoints))
+                for start in shard_starts
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                save_shard_result(future.result())
+
+    compensated_positions = offsets + initargs[2]
+    min_lengths = np.array([actuator.min_position for actuator in hexapod.actuators])
+    max_lengths = np.array([actuator.max_position for actuator in hexapod.actuators])
+    results = {name: axis for name, axis in zip(CAUSE_NAMES, grid_axes)}
+    results.update(
+        offsets=offsets,
+        compensated_positions=compensated_positions,
+        actuator_lengths=actuator_lengths,
+        position_violations=utils.get_position_limit_violations(
+            positions=compensated_positions, limits=position_limits
+        ),
+        actuator_violations=(actuator_lengths < min_lengths)
+        | (actuator_lengths > max_lengths),
+    )
+    for name in (
+        "offsets",
+        "compensated_positions",
+        "actuator_lengths",
+        "position_violations",
+        "actuator_violations",
+    ):
+        results[name] = results[name].reshape(grid_shape + (6,))
+    return results
+
+
+def run_sky_grid(args=None):
+    """Command-line interface to `compute_sky_grid`.
+
+    Compute the compensated position and actuator lengths for a hexapod
+    on a grid of elevation, azimuth, rotation, and temperature, using
+    a CSC configuration file, and save the results to a compressed
+    numpy ``.npz`` file. Report how many grid points exceed
+    ``MAX_POSITION_LIMITS`` or the actuator limits.
+
+    Parameters
+    ----------
+    args : `list` [`str`], optional
+        Command-line arguments; if None then use `sys.argv`.
+    """
+    parser = argparse.ArgumentParser(
+        description="Compute hexapod compensation and actuator lengths "
+        "on a grid of elevation, azimuth, rotation, and temperature."
+    )
+    parser.add_argument("config", help="CSC configuration file.")
+    parser.add_argument(
+        "index",
+        type=int,
+        choices=[int(value) for value in enums.SalIndex],
+        help="SAL index of the hexapod: 1 for the Camera, 2 for M2.",
+    )
+    parser.add_argument(
+        "output", help="Output file; numpy adds a .npz suffix if missing."
+    )
+    parser.add_argument(
+        "--steps",
+        type=float,
+        nargs=4,
+        default=(5, 10, 10, 5),
+        metavar=("ELEVATION", "AZIMUTH", "ROTATION", "TEMPERATURE"),
+        help="Maximum grid spacing: elevation, azimuth, rotation (deg), "
+        "temperature (C).",
+    )
+    parser.add_argument(
+        "--temperature-range",
+        type=float,
+        nargs=2,
+        metavar=("MIN", "MAX"),
+        help="Temperature range (C). "
+        "Defaults to min_temperature, max_temperature from the configuration.",
+    )
+    parser.add_argument(
+        "--position",
+        type=float,
+        nargs=6,
+        metavar=("X", "Y", "Z", "U", "V", "W"),
+        help="Uncompensated position: x, y, z (um), u, v, w (deg). "
+        "Defaults to reference_position from the configuration.",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        help="Maximum number of worker processes; 0 to compute in one process. "
+        "Defaults to the number of processors.",
+    )
+    parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=DEFAULT_SHARD_SIZE,
+        help="Number of grid points computed by each worker task.",
+    )
+    namespace = parser.parse_args(args)
+
+    index = enums.SalIndex(namespace.index)
+    config = utils.load_csc_config(path=namespace.config, index=index)
+    compensation_model = Compensation.from_config(config)
+    if namespace.temperature_range is None:
+        temperature_range = (config["min_temperature"], config["max_temperature"])
+    else:
+        temperature_range = namespace.temperature_range
+    if namespace.position is None:
+        uncompensated_position = base.Position(*config["reference_position"])
+    else:
+        uncompensated_position = base.Position(*namespace.position)
+    ranges = compensation_grid.ANGLE_RANGES + (tuple(temperature_range),)
+    grid_axes = [
+        make_grid_axis(min_value=min_value, max_value=max_value, step=step)
+        for (min_value, max_value), step in zip(ranges, namespace.steps)
+    ]
+    position_limits = constants.MAX_POSITION_LIMITS[index]
+
+    results = compute_sky_grid(
+        compensation=compensation_model,
+        hexapod=make_simple_hexapod(),
+        uncompensated_position=uncompensated_position,
+        position_limits=position_limits,
+        grid_axes=grid_axes,
+        max_workers=namespace.max_workers,
+        shard_size=namespace.shard_size,
+    )
+    np.savez_compressed(
+        namespace.output,
+        uncompensated_position=dataclasses.astuple(uncompensated_position),
+        position_limits=dataclasses.astuple(position_limits),
+        **results,
+    )
+
+    grid_shape = results["offsets"].shape[:-1]
+    print(f"Computed {math.prod(grid_shape)} grid points; grid shape={grid_shape}")
+    for name, axis_names in (
+        ("position_violations", "x y z u v w"),
+        ("actuator_violations", "actuators 0-5"),
+    ):
+        violations = results[name]
+        num_bad_points = np.count_nonzero(np.any(violations, axis=-1))
+        counts = np.count_nonzero(violations.reshape(-1, 6), axis=0)
+        print(
+            f"{name}: {num_bad_points} grid points; "
+            f"counts for {axis_names}: {counts.tolist()}"
+        )
+    print(f"Wrote {namespace.output}")
+
+
+def _init_worker(compensation, hexapod, uncompensated_position, grid_axes):
+    """Initialize a worker process for `compute_sky_grid`."""
+    global _worker_state
+    _worker_state = (compensation, hexapod, uncompensated_position, grid_axes)
+
+
+def _compute_shard(start, stop):
+    """Compute offsets and actuator lengths for a range of grid points.
+
+    Parameters
+    ----------
+    start : `int`
+        Index of the first grid point, in the flattened grid.
+    stop : `int`
+        Index of the last grid point + 1.
+
+    Returns
+    -------
+    start : `int`
+        The ``start`` argument.
+    offsets : `numpy.ndarray`
+        Compensation offsets, with shape (stop - start, 6).
+    actuator_lengths : `numpy.ndarray`
+        Actuator lengths, with shape (stop - start, 6).
+    """
+    compensation, hexapod, uncompensated_position, grid_axes = _worker_state
+    grid_shape = tuple(len(axis) for axis in grid_axes)
+    indices = np.unravel_index(np.arange(start, stop), grid_shape)
+    inputs = [axis[index] for axis, index in zip(grid_axes, indices)]
+    offsets = compensation.get_offsets(*inputs)
+    actuator_lengths = hexapod.compute_actuator_lengths_array(
+        offsets + uncompensated_position
+    )
+    return start, offsets, actuator_lengths
@@ -0,0 +1,217 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = [
+    "BaseTemperatureSource",
+    "NullTemperatureSource",
+    "TopicTemperatureSource",
+]
+
+import math
+
+from lsst.ts import salobj
+
+
+class BaseTemperatureSource:
+    """Base class for sources of temperature for compensation.
+
+    Parameters
+    ----------
+    max_age : `float` or `None`, optional
+        Maximum age (sec) of the temperature; if older then it is stale.
+        If None then the temperature is never stale.
+
+    Raises
+    ------
+    ValueError
+        If ``max_age`` is not None and not positive.
+
+    Attributes
+    ----------
+    temperature : `float` or `None`
+        The current temperature (C), or None if not yet known.
+    tai : `float` or `None`
+        Time at which ``temperature`` was last updated
+        (TAI unix seconds), or None if not yet known.
+    num_samples : `int`
+        Number of times ``temperature`` has been updated.
+
+    Notes
+    -----
+    Subclasses must update ``temperature``, ``tai`` and ``num_samples``,
+    typically by calling `add_sample`. Reading the temperature is cheap:
+    the value is computed when data arrives, not when it is read.
+    """
+
+    def __init__(self, max_age=None):
+        if max_age is not None and max_age <= 0:
+            raise ValueError(f"max_age={max_age} must be None or positive")
+        self.max_age = max_age
+        self.temperature = None
+        self.tai = None
+        self.num_samples = 0
+
+    def add_sample(self, temperature, tai):
+        """Update the temperature with a new sample.
+
+        The default implementation uses the new value as is.
+
+        Parameters
+        ----------
+        temperature : `float`
+            Measured temperature (C).
+        tai : `float`
+            Time at which the temperature was measured
+            (TAI unix seconds).
+        """
+        self.temperature = temperature
+        self.tai = tai
+        self.num_samples += 1
+
+    def get_age(self, current_tai=None):
+        """Get the age of the temperature (sec), or None if not known.
+
+        Parameters
+        ----------
+        current_tai : `float` or `None`, optional
+            Current time (TAI unix seconds).
+            If None then use the current time.
+        """
+        if self.tai is None:
+            return None
+        if current_tai is None:
+            current_tai = salobj.current_tai()
+        return current_tai - self.tai
+
+    def is_stale(self, current_tai=None):
+        """Is the temperature older than ``max_age``?
+
+        Always False if ``max_age`` is None or the temperature is unknown.
+
+        Parameters
+        ----------
+        current_tai : `float` or `None`, optional
+            Current time (TAI unix seconds).
+            If None then use the current time.
+        """
+        if self.max_age is None or self.tai is None:
+            return False
+        return self.get_age(current_tai) > self.max_age
+
+    async def start(self):
+        """Start receiving data. The default implementation does nothing."""
+        pass
+
+    async def close(self):
+        """Stop receiving data. The default implementation does nothing."""
+        pass
+
+
+class NullTemperatureSource(BaseTemperatureSource):
+    """A temperature source whose temperature is always 0 C.
+
+    Use this when no source of temperature is available.
+    It is never stale.
+    """
+
+    def __init__(self):
+        super().__init__(max_age=None)
+        self.temperature = 0
+        self.tai = salobj.current_tai()
+
+    def get_age(self, current_tai=None):
+        return 0
+
+
+class TopicTemperatureSource(BaseTemperatureSource):
+    """A temperature source that reads a SAL topic, and smooths
+    the temperature with an exponentially weighted moving average.
+
+    Parameters
+    ----------
+    topic : `lsst.ts.salobj.topics.ReadTopic`
+        Topic to read. This source sets the topic's callback function,
+        so it is updated each time a sample arrives.
+        If the topic already has data, it is used as the first sample.
+        Unit tests may use `testutils.MockTemperatureTopic` instead.
+    field_name : `str`
+        Name of the topic field that contains temperature (C).
+    field_index : `int` or `None`, optional
+        If the field is an array: index of the element to use.
+        If None then the field must be a scalar.
+    time_constant : `float`, optional
+        Time constant of the exponentially weighted moving average (sec).
+        0 for no smoothing.
+    max_age : `float` or `None`, optional
+        Maximum age (sec) of the temperature; if older then it is stale.
+        If None then the temperature is never stale.
+
+    Raises
+    ------
+    ValueError
+        If ``time_constant`` < 0, or ``max_age`` is not None
+        and not positive.
+
+    Notes
+    -----
+    The weight of a new sample is 1 - exp(-dt / time_constant),
+    where dt is the time since the previous sample, so the smoothing
+    is independent of the sample rate. Sample time is read from
+    the sample's ``private_sndStamp`` field.
+    """
+
+    def __init__(
+        self, topic, field_name, field_index=None, time_constant=0, max_age=None
+    ):
+        if time_constant < 0:
+            raise ValueError(f"time_constant={time_constant} must be >= 0")
+        super().__init__(max_age=max_age)
+        self.topic = topic
+        self.field_name = field_name
+        self.field_index = field_index
+        self.time_constant = time_constant
+        data = self.topic.get()
+        if data is not None:
+            self._topic_callback(data)
+        self.topic.callback = self._topic_callback
+
+    def add_sample(self, temperature, tai):
+        if self.temperature is None or self.time_constant == 0:
+            weight = 1
+        else:
+            dt = max(tai - self.tai, 0)
+            weight = 1 - math.exp(-dt / self.time_constant)
+        if weight == 1:
+            smoothed_temperature = temperature
+        else:
+            smoothed_temperature = self.temperature + weight * (
+                temperature - self.temperature
+            )
+        super().add_sample(temperature=smoothed_temperature, tai=tai)
+
+    async def close(self):
+        self.topic.callback = None
+
+    def _topic_callback(self, data):
+        temperature = getattr(data, self.field_name)
+        if self.field_index is not None:
+            temperature = temperature[self.field_index]
+        self.add_sample(temperature=float(temperature), tai=data.private_sndStamp)
@@ -0,0 +1,76 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Utilities for unit tests. Not for use in production code.
+
+This module is not imported by ``lsst.ts.mthexapod``;
+import it explicitly.
+"""
+
+__all__ = ["MockTemperatureTopic"]
+
+import types
+
+from lsst.ts import salobj
+
+
+class MockTemperatureTopic:
+    """A local stand-in for a SAL topic that publishes temperature,
+    for unit tests.
+
+    Parameters
+    ----------
+    field_name : `str`, optional
+        Name of the temperature field.
+
+    Attributes
+    ----------
+    callback : callable or `None`
+        Function to call with each sample.
+    """
+
+    def __init__(self, field_name="temperature"):
+        self.field_name = field_name
+        self.callback = None
+        self._data = None
+
+    def get(self):
+        """Get the most recent sample, or None if none."""
+        return self._data
+
+    def publish(self, temperature, tai=None):
+        """Publish a sample.
+
+        Parameters
+        ----------
+        temperature : `float` or `list` [`float`]
+            Temperature (C).
+        tai : `float` or `None`, optional
+            Time of the sample (TAI unix seconds).
+            If None then use the current time.
+        """
+        if tai is None:
+            tai = salobj.current_tai()
+        self._data = types.SimpleNamespace(
+            **{self.field_name: temperature, "private_sndStamp": tai}
+        )
+        if self.callback is not None:
+            self.callback(self._data)
@@ -25,6 +25,12 @@ __all__ = [
     "check_symmetrical_range",
     "check_position",
     "check_new_position_limits",
+    "get_position_limit_violations",
+    "get_config_validator",
+    "get_max_move_distance",
+    "get_subconfig_name",
+    "load_csc_config",
+    "limit_position_change",
     "rot2d",
     "rot_about_x",
     "rot_about_y",
@@ -32,12 +38,25 @@ __all__ = [
     "RAD_PER_DEG",
 ]
 
+import dataclasses
 import math
+import pathlib
 
 import numpy as np
+import yaml
+
+from lsst.ts import salobj
+from . import base
+from . import enums
 
 RAD_PER_DEG = math.pi / 180
 
+# Path to the CSC configuration schema.
+SCHEMA_PATH = pathlib.Path(__file__).parents[4] / "schema" / "MTHexapod.yaml"
+
+# Validator for the CSC configuration; see `get_config_validator`.
+_config_validator = None
+
 
 def check_positive_value(value, name, max_value, ExceptionClass=ValueError):
     """Check that a numeric value is in range 0 < value <= max_value.
@@ -167,6 +186,49 @@ def check_position(position, limits, ExceptionClass=ValueError):
     )
 
 
+def get_position_limit_violations(positions, limits):
+    """Find positions that are not within limits.
+
+    This is a vectorized equivalent of `check_position`.
+
+    Parameters
+    ----------
+    positions : `numpy.ndarray`
+        Positions to check, as an array of shape (N, 6)
+        where the columns are x, y, z (um), u, v, w (deg).
+    limits : `PositionLimits`
+        Position limits.
+
+    Returns
+    -------
+    violations : `numpy.ndarray`
+        Boolean array of shape (N, 6) that is True for each axis of
+        each position that is out of range.
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 6)
+    min_position = np.array(
+        [
+            -limits.maxXY,
+            -limits.maxXY,
+            limits.minZ,
+            -limits.maxUV,
+            -limits.maxUV,
+            limits.minW,
+        ]
+    )
+    max_position = np.array(
+        [
+            limits.maxXY,
+            limits.maxXY,
+            limits.maxZ,
+            limits.maxUV,
+            limits.maxUV,
+            limits.maxW,
+        ]
+    )
+    return (positions < min_position) | (positions > max_position)
+
+
 def check_new_position_limits(limits, max_limits, ExceptionClass=ValueError):
     """Raise ExceptionClass if proposed new position limits are not with range
     of the maximum allowed position limits.
@@ -209,6 +271,78 @@ def check_new_position_limits(limits, max_limits, ExceptionClass=ValueError):
     )
 
 
+def get_max_move_distance(velocity, acceleration, duration):
+    """Get the maximum distance a point to point move can cover
+    in a specified time.
+
+    The move starts and ends at rest and has a trapezoidal velocity profile
+    (or triangular, if the move is too short to reach maximum velocity).
+
+    Parameters
+    ----------
+    velocity : `float`
+        Maximum velocity (distance units/second). Must be positive.
+    acceleration : `float`
+        Acceleration (distance units/second^2). Must be positive.
+    duration : `float`
+        Duration of the move (seconds). Must be non-negative.
+
+    Returns
+    -------
+    distance : `float`
+        The maximum distance that can be covered in ``duration``.
+
+    Raises
+    ------
+    ValueError
+        If ``velocity`` or ``acceleration`` is not positive,
+        or ``duration`` is negative.
+    """
+    if velocity <= 0:
+        raise ValueError(f"velocity={velocity} must be positive")
+    if acceleration <= 0:
+        raise ValueError(f"acceleration={acceleration} must be positive")
+    if duration < 0:
+        raise ValueError(f"duration={duration} must not be negative")
+    accel_duration = velocity / acceleration
+    if duration >= 2 * accel_duration:
+        # Trapezoidal profile: accelerate, coast, decelerate
+        return velocity * (duration - accel_duration)
+    # Triangular profile: accelerate, decelerate
+    return acceleration * duration ** 2 / 4
+
+
+def limit_position_change(start, end, max_change):
+    """Limit the change in position for a move.
+
+    Parameters
+    ----------
+    start : `Position`
+        Starting position.
+    end : `Position`
+        Desired ending position.
+    max_change : `Position`
+        Maximum change in position allowed for each axis.
+        Each value must be non-negative.
+
+    Returns
+    -------
+    position : `Position`
+        ``end``, if it is within ``max_change`` of ``start``,
+        else a position along the line from ``start`` to ``end``,
+        as near as possible to ``end`` while still within ``max_change``
+        of ``start`` on every axis.
+    """
+    change = dataclasses.astuple(end - start)
+    scale = 1
+    for axis_change, axis_max_change in zip(change, dataclasses.astuple(max_change)):
+        if abs(axis_change) > axis_max_change:
+            scale = min(scale, axis_max_change / abs(axis_change))
+    if scale == 1:
+        return end
+    return start + base.Position(*[value * scale for value in change])
+
+
 def rot2d(xypos, ang):
     """Rotate a 2-d position by the specified angle.
 
@@ -295,3 +429,69 @@ def rot_about_z(xyzpos, ang):
     x, y, z = xyzpos
     rotx, roty = rot2d((x, y), ang)
     return np.array((rotx, roty, z), dtype=float)
+
+
+def get_subconfig_name(index):
+    """Get the name of the instance-specific section
+    of the CSC configuration.
+
+    Parameters
+    ----------
+    index : `SalIndex` or `int`
+        SAL index of the hexapod.
+
+    Returns
+    -------
+    subconfig_name : `str`
+        "camera_config" or "m2_config".
+    """
+    return {
+        enums.SalIndex.CAMERA_HEXAPOD: "camera_config",
+        enums.SalIndex.M2_HEXAPOD: "m2_config",
+    }[enums.SalIndex(index)]
+
+
+def load_csc_config(path, index):
+    """Load and validate a CSC configuration file.
+
+    Parameters
+    ----------
+    path : `str` or `pathlib.Path`
+        Path to the configuration file.
+    index : `SalIndex` or `int`
+        SAL index of the hexapod.
+
+    Returns
+    -------
+    config : `dict`
+        The ``camera_config`` or ``m2_config`` section (as appropriate
+        for ``index``) of the validated configuration.
+
+    Raises
+    ------
+    jsonschema.ValidationError
+        If the configuration is not valid.
+    """
+    with open(path, "r") as f:
+        raw_config = yaml.safe_load(f)
+    config = get_config_validator().validate(raw_config)
+    return config[get_subconfig_name(index)]
+
+
+def get_config_validator():
+    """Get a validator for the CSC configuration.
+
+    The schema is read and the validator constructed once,
+    on the first call.
+
+    Returns
+    -------
+    validator : `lsst.ts.salobj.DefaultingValidator`
+        Validator for the CSC configuration schema.
+    """
+    global _config_validator
+    if _config_validator is None:
+        with open(SCHEMA_PATH, "r") as f:
+            schema = yaml.safe_load(f)
+        _config_validator = salobj.DefaultingValidator(schema=schema)
+    return _config_validator
@@ -27,7 +27,12 @@ setuptools.setup(
     package_dir={"": "python"},
     packages=setuptools.find_namespace_packages(where="python"),
     package_data={"": ["*.rst", "*.yaml"]},
-    scripts=["bin/run_mthexapod.py", "bin/command_mthexapod.py"],
+    scripts=[
+        "bin/run_mthexapod.py",
+        "bin/command_mthexapod.py",
+        "bin/run_sky_grid.py",
+        "bin/run_night_replay.py",
+    ],
     data_files=[(os.path.join(data_files_path, "schema"), ["schema/MTHexapod.yaml"])],
     tests_require=tests_require,
     extras_require={"dev": dev_requires},
@@ -19,6 +19,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import dataclasses
 import itertools
 import unittest
 
@@ -62,6 +63,18 @@ class CompensationTestCase(unittest.TestCase):
             with self.assertRaises(ValueError):
                 mthexapod.Compensation(**bad_kwargs)
 
+        # A list of coefficients with no elements
+        for name in (
+            "elevation_coeffs",
+            "azimuth_coeffs",
+            "rotation_coeffs",
+            "temperature_coeffs",
+        ):
+            bad_kwargs = kwargs.copy()
+            bad_kwargs[name] = [[0]] * 5 + [[]]
+            with self.assertRaises(ValueError):
+                mthexapod.Compensation(**bad_kwargs)
+
         # min_temperature >= max_temperature
         for delta in (0, 0.001, 1):
             bad_kwargs = kwargs.copy()
@@ -69,6 +82,13 @@ class CompensationTestCase(unittest.TestCase):
             with self.assertRaises(ValueError):
                 mthexapod.Compensation(**bad_kwargs)
 
+        # Invalid model name
+        for name in ("azimuth_model", "rotation_model"):
+            bad_kwargs = kwargs.copy()
+            bad_kwargs[name] = "no_such_model"
+            with self.assertRaises(ValueError):
+                mthexapod.Compensation(**bad_kwargs)
+
     def test_get_offset(self):
         elevation_coeffs = [
             [0.11, 0.12, 0.013, 0.0014],
@@ -156,6 +176,449 @@ class CompensationTestCase(unittest.TestCase):
                     elevation=bad_elevation, azimuth=25, rotation=5, temperature=0,
                 )
 
+    def test_get_offsets(self):
+        compensation = mthexapod.Compensation(
+            elevation_coeffs=[
+                [0.11, 0.12, 0.013, 0.0014],
+                [0.21, 0.22, 0.023],
+                [0.31],
+                [0.41, 0.42],
+                [0.51, 0.52],
+                [0.61, 0.62],
+            ],
+            azimuth_coeffs=[[0.11, 0.12], [0.21, 0.22, -0.011]] + [[0.1]] * 4,
+            rotation_coeffs=[[0.31, 0.32, 0.013, 0.0014]] * 6,
+            temperature_coeffs=[[0.41, -0.42, 0.043]] * 3 + [[0.51, -0.52]] * 3,
+            min_temperature=-20,
+            max_temperature=25,
+        )
+        rng = np.random.default_rng(seed=47)
+        nvalues = 100
+        elevation = rng.uniform(0, 90, nvalues)
+        azimuth = rng.uniform(-360, 720, nvalues)
+        rotation = rng.uniform(-270, 270, nvalues)
+        temperature = rng.uniform(-40, 40, nvalues)
+        offsets = compensation.get_offsets(
+            elevation=elevation,
+            azimuth=azimuth,
+            rotation=rotation,
+            temperature=temperature,
+        )
+        self.assertEqual(offsets.shape, (nvalues, 6))
+        for i in range(nvalues):
+            comp_inputs = mthexapod.CompensationInputs(
+                elevation=elevation[i],
+                azimuth=azimuth[i],
+                rotation=rotation[i],
+                temperature=temperature[i],
+            )
+            offset = compensation.get_offset(comp_inputs)
+            np.testing.assert_allclose(offsets[i], dataclasses.astuple(offset))
+
+        # Scalar inputs are broadcast
+        offsets = compensation.get_offsets(
+            elevation=elevation, azimuth=0, rotation=0, temperature=0
+        )
+        self.assertEqual(offsets.shape, (nvalues, 6))
+        offsets = compensation.get_offsets(
+            elevation=45, azimuth=0, rotation=0, temperature=0
+        )
+        self.assertEqual(offsets.shape, (1, 6))
+
+        # The offsets for each cause add up to the total offset
+        offsets = compensation.get_offsets(
+            elevation=elevation,
+            azimuth=azimuth,
+            rotation=rotation,
+            temperature=temperature,
+        )
+        summed_cause_offsets = sum(
+            compensation.get_cause_offsets(cause=cause, values=values)
+            for cause, values in zip(
+                mthexapod.CAUSE_NAMES, (elevation, azimuth, rotation, temperature)
+            )
+        )
+        np.testing.assert_allclose(offsets, summed_cause_offsets)
+        with self.assertRaises(ValueError):
+            compensation.get_cause_offsets(cause="no_such_cause", values=0)
+
+        for bad_elevation in (-0.001, 90.001):
+            with self.assertRaises(ValueError):
+                compensation.get_offsets(
+                    elevation=[45, bad_elevation], azimuth=0, rotation=0, temperature=0
+                )
+
+    def test_fourier_models(self):
+        elevation_coeffs = [[0.11, 0.12, 0.013]] * 6
+        azimuth_coeffs = [
+            [0.11, 0.12],
+            [0.21, 0.22, -0.011],
+            [0.31, 0.32, 0.013, 0.0014, -0.002],
+            [0.41],
+            [0.51, 0.52, 0.053],
+            [0.61, -0.62, 0.063, 0.0064],
+        ]
+        rotation_coeffs = [
+            [0.31, 0.32, 0.013, 0.0014],
+            [0.21, 0.22, 0.023],
+            [0.11],
+            [0.41, 0.42, 0.043],
+            [0.51, -0.052],
+            [0.61, 0.62, -0.063, 0.0064, 0.00065],
+        ]
+        temperature_coeffs = [[0.41, -0.42, 0.043]] * 6
+        min_temperature = -20
+        max_temperature = 25
+        rng = np.random.default_rng(seed=52)
+        nvalues = 50
+        elevation = rng.uniform(0, 90, nvalues)
+        azimuth = rng.uniform(-360, 720, nvalues)
+        rotation = rng.uniform(-270, 270, nvalues)
+        temperature = rng.uniform(-40, 40, nvalues)
+        elevation_polynomials = [
+            np.polynomial.Polynomial(coeffs) for coeffs in elevation_coeffs
+        ]
+        temperature_polynomials = [
+            mthexapod.RangedPolynomial(
+                coeffs, min_x=min_temperature, max_x=max_temperature
+            )
+            for coeffs in temperature_coeffs
+        ]
+        for azimuth_model, rotation_model in itertools.product(
+            mthexapod.MODEL_NAMES, mthexapod.MODEL_NAMES
+        ):
+            with self.subTest(
+                azimuth_model=azimuth_model, rotation_model=rotation_model
+            ):
+                compensation = mthexapod.Compensation(
+                    elevation_coeffs=elevation_coeffs,
+                    azimuth_coeffs=azimuth_coeffs,
+                    rotation_coeffs=rotation_coeffs,
+                    temperature_coeffs=temperature_coeffs,
+                    min_temperature=min_temperature,
+                    max_temperature=max_temperature,
+                    azimuth_model=azimuth_model,
+                    rotation_model=rotation_model,
+                )
+                self.assertEqual(compensation.azimuth_model, azimuth_model)
+                self.assertEqual(compensation.rotation_model, rotation_model)
+                functions = dict()
+                for cause, model, coeffs in (
+                    ("azimuth", azimuth_model, azimuth_coeffs),
+                    ("rotation", rotation_model, rotation_coeffs),
+                ):
+                    if model == "fourier":
+                        functions[cause] = [
+                            mthexapod.FourierSeries(axis_coeffs)
+                            for axis_coeffs in coeffs
+                        ]
+                    else:
+                        functions[cause] = [
+                            np.polynomial.Polynomial(axis_coeffs)
+                            for axis_coeffs in coeffs
+                        ]
+
+                offsets = compensation.get_offsets(
+                    elevation=elevation,
+                    azimuth=azimuth,
+                    rotation=rotation,
+                    temperature=temperature,
+                )
+                # Wrap azimuth and rotation as the compensation model does
+                wrapped_azimuth = azimuth % 360
+                wrapped_rotation = (rotation + 180) % 360 - 180
+                for i in range(6):
+                    predicted_offsets = (
+                        elevation_polynomials[i](elevation)
+                        + functions["azimuth"][i](wrapped_azimuth)
+                        + functions["rotation"][i](wrapped_rotation)
+                        + np.array([temperature_polynomials[i](t) for t in temperature])
+                    )
+                    np.testing.assert_allclose(offsets[:, i], predicted_offsets)
+
+                # A Fourier series is periodic, so the offsets
+                # are continuous across the wrap points.
+                for cause, model, wrap_value in (
+                    ("azimuth", azimuth_model, 360),
+                    ("rotation", rotation_model, 180),
+                ):
+                    if model != "fourier":
+                        continue
+                    cause_offsets = compensation.get_cause_offsets(
+                        cause=cause, values=[wrap_value - 1e-9, wrap_value]
+                    )
+                    np.testing.assert_allclose(
+                        cause_offsets[0], cause_offsets[1], atol=1e-7
+                    )
+
+    def test_get_jacobian(self):
+        kwargs = dict(
+            elevation_coeffs=[
+                [0.11, 0.12, 0.013, 0.0014],
+                [0.21, 0.22, 0.023],
+                [0.31],
+                [0.41, 0.42],
+                [0.51, 0.52],
+                [0.61, 0.62],
+            ],
+            azimuth_coeffs=[[0.11, 0.12], [0.21, 0.22, -0.011]] + [[0.1, 0.2, 0.3]] * 4,
+            rotation_coeffs=[[0.31, 0.32, 0.013, 0.0014]] * 6,
+            temperature_coeffs=[[0.41, -0.42, 0.043]] * 3 + [[0.51, -0.52]] * 3,
+            min_temperature=-20,
+            max_temperature=25,
+        )
+        rng = np.random.default_rng(seed=12)
+        nvalues = 20
+        elevation = rng.uniform(1, 89, nvalues)
+        azimuth = rng.uniform(1, 359, nvalues)
+        rotation = rng.uniform(-179, 179, nvalues)
+        # Include temperatures below, in, and above the valid range
+        temperature = np.linspace(-40, 40, nvalues)
+        temperature[np.abs(temperature - kwargs["min_temperature"]) < 0.1] += 0.5
+        temperature[np.abs(temperature - kwargs["max_temperature"]) < 0.1] += 0.5
+        inputs = np.array([elevation, azimuth, rotation, temperature])
+        delta = 1e-4
+        for model in mthexapod.MODEL_NAMES:
+            with self.subTest(model=model):
+                compensation = mthexapod.Compensation(
+                    azimuth_model=model, rotation_model=model, **kwargs
+                )
+                jacobian = compensation.get_jacobian(*inputs)
+                self.assertEqual(jacobian.shape, (nvalues, 6, 4))
+                for i in range(4):
+                    high_inputs = inputs.copy()
+                    high_inputs[i] += delta
+                    low_inputs = inputs.copy()
+                    low_inputs[i] -= delta
+                    predicted_derivatives = (
+                        compensation.get_offsets(*high_inputs)
+                        - compensation.get_offsets(*low_inputs)
+                    ) / (2 * delta)
+                    np.testing.assert_allclose(
+                        jacobian[:, :, i], predicted_derivatives, atol=1e-6
+                    )
+
+                # Scalar inputs
+                jacobian = compensation.get_jacobian(
+                    elevation=45, azimuth=10, rotation=-5, temperature=0
+                )
+                self.assertEqual(jacobian.shape, (1, 6, 4))
+
+        with self.assertRaises(ValueError):
+            compensation.get_jacobian(
+                elevation=90.001, azimuth=0, rotation=0, temperature=0
+            )
+
+    def make_cross_terms(self):
+        """Make cross terms for tests, with blocks of different shapes."""
+        return [
+            dict(
+                causes=["elevation", "temperature"],
+                coeffs=[
+                    [[0.001, -0.0002], [0.00003]],
+                    [[-0.002]],
+                    [[0.003, 0.0001, -0.00001]],
+                    [[1e-6]],
+                    [[0], [2e-8]],
+                    [[-3e-6]],
+                ],
+            ),
+            dict(
+                causes=["rotation", "azimuth"],
+                coeffs=[[[1e-7, 2e-9], [3e-9, 4e-11]]] * 3
+                + [[[1e-9], [2e-11], [3e-13]]] * 3,
+            ),
+        ]
+
+    def compute_cross_term_offsets(
+        self, compensation, cross_terms, elevation, azimuth, rotation, temperature
+    ):
+        """Compute the offsets due to cross terms, the slow way."""
+        inputs = dict(
+            elevation=elevation,
+            azimuth=azimuth,
+            rotation=rotation,
+            temperature=min(
+                max(temperature, compensation.min_temperature),
+                compensation.max_temperature,
+            ),
+        )
+        models = dict(
+            elevation="polynomial",
+            azimuth=compensation.azimuth_model,
+            rotation=compensation.rotation_model,
+            temperature="polynomial",
+        )
+
+        def basis(cause, i):
+            """Basis function i of cause, where i=0 is the constant."""
+            value = inputs[cause]
+            if models[cause] == "polynomial":
+                return value ** i
+            coeffs = [0] * (i + 1)
+            coeffs[i] = 1
+            return mthexapod.FourierSeries(coeffs)(value)
+
+        offsets = np.zeros(6)
+        for term in cross_terms:
+            cause1, cause2 = term["causes"]
+            for axis, axis_coeffs in enumerate(term["coeffs"]):
+                for i, row in enumerate(axis_coeffs):
+                    for j, coeff in enumerate(row):
+                        offsets[axis] += (
+                            coeff * basis(cause1, i + 1) * basis(cause2, j + 1)
+                        )
+        return offsets
+
+    def test_cross_terms(self):
+        kwargs = dict(
+            elevation_coeffs=[[0.11, 0.12, 0.013]] * 6,
+            azimuth_coeffs=[[0.21, 0.22, -0.011]] * 6,
+            rotation_coeffs=[[0.31, 0.32, 0.013]] * 6,
+            temperature_coeffs=[[0.41, -0.42, 0.043]] * 6,
+            min_temperature=-20,
+            max_temperature=25,
+        )
+        cross_terms = self.make_cross_terms()
+        rng = np.random.default_rng(seed=5)
+        nvalues = 20
+        elevation = rng.uniform(0, 90, nvalues)
+        azimuth = rng.uniform(0, 360, nvalues)
+        rotation = rng.uniform(-180, 180, nvalues)
+        temperature = np.linspace(-40, 40, nvalues)
+        for model in mthexapod.MODEL_NAMES:
+            with self.subTest(model=model):
+                compensation = mthexapod.Compensation(
+                    azimuth_model=model, rotation_model=model, **kwargs
+                )
+                self.assertFalse(compensation.has_cross_terms)
+                cross_compensation = mthexapod.Compensation(
+                    azimuth_model=model,
+                    rotation_model=model,
+                    cross_terms=cross_terms,
+                    **kwargs,
+                )
+                self.assertTrue(cross_compensation.has_cross_terms)
+                offsets = compensation.get_offsets(
+                    elevation, azimuth, rotation, temperature
+                )
+                cross_offsets = cross_compensation.get_offsets(
+                    elevation, azimuth, rotation, temperature
+                )
+                desired_cross_offsets = np.array(
+                    [
+                        self.compute_cross_term_offsets(
+                            cross_compensation, cross_terms, *values
+                        )
+                        for values in zip(elevation, azimuth, rotation, temperature)
+                    ]
+                )
+                self.assertTrue(np.all(np.abs(desired_cross_offsets) > 0))
+                np.testing.assert_allclose(
+                    cross_offsets - offsets, desired_cross_offsets, atol=1e-12
+                )
+
+                # Test get_offset
+                inputs = mthexapod.CompensationInputs(
+                    elevation=elevation[0],
+                    azimuth=azimuth[0],
+                    rotation=rotation[0],
+                    temperature=temperature[0],
+                )
+                np.testing.assert_allclose(
+                    dataclasses.astuple(cross_compensation.get_offset(inputs)),
+                    cross_offsets[0],
+                )
+
+                # Cause offsets do not include cross terms.
+                for cause in mthexapod.CAUSE_NAMES:
+                    np.testing.assert_allclose(
+                        cross_compensation.get_cause_offsets(cause, [0, 10]),
+                        compensation.get_cause_offsets(cause, [0, 10]),
+                    )
+
+        # Test from_config
+        config = dict(
+            elevation_coeffs=kwargs["elevation_coeffs"],
+            azimuth_coeffs=kwargs["azimuth_coeffs"],
+            rotation_coeffs=kwargs["rotation_coeffs"],
+            temperature_coeffs=kwargs["temperature_coeffs"],
+            min_temperature=kwargs["min_temperature"],
+            max_temperature=kwargs["max_temperature"],
+            azimuth_model="fourier",
+            rotation_model="fourier",
+            cross_terms=cross_terms,
+        )
+        np.testing.assert_allclose(
+            mthexapod.Compensation.from_config(config).get_offsets(
+                elevation, azimuth, rotation, temperature
+            ),
+            cross_offsets,
+        )
+
+    def test_cross_term_errors(self):
+        kwargs = dict(
+            elevation_coeffs=[[0]] * 6,
+            azimuth_coeffs=[[0]] * 6,
+            rotation_coeffs=[[0]] * 6,
+            temperature_coeffs=[[0]] * 6,
+            min_temperature=-20,
+            max_temperature=25,
+        )
+        for bad_cross_term in (
+            dict(causes=["elevation"], coeffs=[[[0]]] * 6),
+            dict(causes=["elevation", "elevation"], coeffs=[[[0]]] * 6),
+            dict(causes=["elevation", "zd"], coeffs=[[[0]]] * 6),
+            dict(causes=["elevation", "azimuth", "rotation"], coeffs=[[[0]]] * 6),
+            dict(causes=["elevation", "azimuth"], coeffs=[[[0]]] * 5),
+            dict(causes=["elevation", "azimuth"], coeffs=[[[0]]] * 7),
+            dict(causes=["elevation", "azimuth"], coeffs=[[[0]]] * 5 + [[]]),
+            dict(causes=["elevation", "azimuth"], coeffs=[[[0]]] * 5 + [[[]]]),
+        ):
+            with self.subTest(bad_cross_term=bad_cross_term):
+                with self.assertRaises(ValueError):
+                    mthexapod.Compensation(cross_terms=[bad_cross_term], **kwargs)
+
+    def test_cross_terms_jacobian(self):
+        kwargs = dict(
+            elevation_coeffs=[[0.11, 0.12, 0.013]] * 6,
+            azimuth_coeffs=[[0.21, 0.22, -0.011]] * 6,
+            rotation_coeffs=[[0.31, 0.32, 0.013]] * 6,
+            temperature_coeffs=[[0.41, -0.42, 0.043]] * 6,
+            min_temperature=-20,
+            max_temperature=25,
+            cross_terms=self.make_cross_terms(),
+        )
+        rng = np.random.default_rng(seed=6)
+        nvalues = 20
+        elevation = rng.uniform(1, 89, nvalues)
+        azimuth = rng.uniform(1, 359, nvalues)
+        rotation = rng.uniform(-179, 179, nvalues)
+        # Include temperatures below, in, and above the valid range
+        temperature = np.linspace(-40, 40, nvalues)
+        temperature[np.abs(temperature - kwargs["min_temperature"]) < 0.1] += 0.5
+        temperature[np.abs(temperature - kwargs["max_temperature"]) < 0.1] += 0.5
+        inputs = np.array([elevation, azimuth, rotation, temperature])
+        delta = 1e-4
+        for model in mthexapod.MODEL_NAMES:
+            with self.subTest(model=model):
+                compensation = mthexapod.Compensation(
+                    azimuth_model=model, rotation_model=model, **kwargs
+                )
+                jacobian = compensation.get_jacobian(*inputs)
+                for i in range(4):
+                    high_inputs = inputs.copy()
+                    high_inputs[i] += delta
+                    low_inputs = inputs.copy()
+                    low_inputs[i] -= delta
+                    predicted_derivatives = (
+                        compensation.get_offsets(*high_inputs)
+                        - compensation.get_offsets(*low_inputs)
+                    ) / (2 * delta)
+                    np.testing.assert_allclose(
+                        jacobian[:, :, i], predicted_derivatives, atol=1e-6
+                    )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,151 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import dataclasses
+import unittest
+
+from lsst.ts import mthexapod
+
+
+class CompensationCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.compensation = mthexapod.Compensation(
+            elevation_coeffs=[[0.11, 0.12, 0.013], [0.21, 0.22]] + [[0.3, 0.01]] * 4,
+            azimuth_coeffs=[[0.11, 0.12], [0.21, 0.22, -0.011]] + [[0.1]] * 4,
+            rotation_coeffs=[[0.31, 0.32, 0.013, 0.0014]] * 6,
+            temperature_coeffs=[[0.41, -0.42, 0.043]] * 3 + [[0.51, -0.52]] * 3,
+            min_temperature=-20,
+            max_temperature=25,
+        )
+
+    def make_inputs(self, elevation, azimuth=10, rotation=5, temperature=3):
+        return mthexapod.CompensationInputs(
+            elevation=elevation,
+            azimuth=azimuth,
+            rotation=rotation,
+            temperature=temperature,
+        )
+
+    def assert_offsets_almost_equal(self, offset1, offset2):
+        for value1, value2 in zip(
+            dataclasses.astuple(offset1), dataclasses.astuple(offset2)
+        ):
+            self.assertAlmostEqual(value1, value2)
+
+    def test_constructor_errors(self):
+        for bad_kwargs in (
+            dict(max_size=-1, resolution=[0] * 4),
+            dict(max_size=10, resolution=[0] * 3),
+            dict(max_size=10, resolution=[0] * 5),
+            dict(max_size=10, resolution=[0, 0, -0.1, 0]),
+        ):
+            with self.subTest(bad_kwargs=bad_kwargs):
+                with self.assertRaises(ValueError):
+                    mthexapod.CompensationCache(
+                        compensation=self.compensation, **bad_kwargs
+                    )
+
+    def test_no_quantization(self):
+        cache = mthexapod.CompensationCache(
+            compensation=self.compensation, max_size=3, resolution=[0] * 4
+        )
+        elevations = (10, 20, 30, 40)
+        for elevation in elevations:
+            inputs = self.make_inputs(elevation)
+            self.assert_offsets_almost_equal(
+                cache.get_offset(inputs), self.compensation.get_offset(inputs)
+            )
+        self.assertEqual(cache.misses, 4)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(len(cache), 3)
+
+        # Most recently used values are still cached;
+        # the least recently used (the first) was evicted.
+        for elevation in elevations[1:]:
+            cache.get_offset(self.make_inputs(elevation))
+        self.assertEqual(cache.hits, 3)
+        self.assertEqual(cache.misses, 4)
+        cache.get_offset(self.make_inputs(elevations[0]))
+        self.assertEqual(cache.misses, 5)
+        self.assertEqual(cache.evictions, 2)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.misses, 0)
+        self.assertEqual(cache.evictions, 0)
+
+    def test_quantization(self):
+        resolution = [0.5, 2, 1, 0.25]
+        cache = mthexapod.CompensationCache(
+            compensation=self.compensation, max_size=10, resolution=resolution
+        )
+        offset = cache.get_offset(
+            self.make_inputs(elevation=45.1, azimuth=9.5, rotation=5.3, temperature=3.1)
+        )
+        self.assert_offsets_almost_equal(
+            offset,
+            self.compensation.get_offset(
+                self.make_inputs(elevation=45, azimuth=10, rotation=5, temperature=3)
+            ),
+        )
+        self.assertEqual(cache.misses, 1)
+        cache.get_offset(
+            self.make_inputs(
+                elevation=44.9, azimuth=10.5, rotation=4.9, temperature=2.9
+            )
+        )
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+        # Modifying a returned offset does not affect the cached value.
+        inputs = self.make_inputs(elevation=45, azimuth=10, rotation=5, temperature=3)
+        offset = cache.get_offset(inputs)
+        offset.x += 1000
+        self.assert_offsets_almost_equal(
+            cache.get_offset(inputs), self.compensation.get_offset(inputs)
+        )
+
+        # The quantized elevation is clipped to [0, 90]
+        cache = mthexapod.CompensationCache(
+            compensation=self.compensation, max_size=10, resolution=[0.7, 0, 0, 0]
+        )
+        offset = cache.get_offset(self.make_inputs(elevation=90))
+        self.assert_offsets_almost_equal(
+            offset, self.compensation.get_offset(self.make_inputs(elevation=90))
+        )
+
+    def test_disabled(self):
+        cache = mthexapod.CompensationCache(
+            compensation=self.compensation, max_size=0, resolution=[1] * 4
+        )
+        inputs = self.make_inputs(elevation=45.3)
+        self.assert_offsets_almost_equal(
+            cache.get_offset(inputs), self.compensation.get_offset(inputs)
+        )
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.misses, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,215 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import os
+import pathlib
+import tempfile
+import unittest
+
+import asynctest
+import jsonschema
+import yaml
+
+from lsst.ts import mthexapod
+
+config_path = pathlib.Path(__file__).parent / "data" / "config" / "valid.yaml"
+
+# Poll interval for the watcher (sec)
+POLL_INTERVAL = 0.01
+
+# Time limit for the watcher to notice a change (sec)
+STD_TIMEOUT = 5
+
+
+class CompensationConfigWatcherTestCase(asynctest.TestCase):
+    def setUp(self):
+        with open(config_path, "r") as f:
+            self.compensation_config = yaml.safe_load(f)["camera_config"]
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.temp_dir.name) / "compensation.yaml"
+        self.configs = asyncio.Queue()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    async def callback(self, config):
+        await self.configs.put(config)
+
+    def write_config(self, config, mtime_offset=0):
+        """Write a compensation configuration file.
+
+        Parameters
+        ----------
+        config : `dict`
+            Compensation configuration.
+        mtime_offset : `int`, optional
+            Amount by which to offset the modification time (sec).
+            Specify a different value for each write to the same file,
+            in case the file system's timestamps are coarse.
+        """
+        with open(self.path, "w") as f:
+            yaml.safe_dump(config, f)
+        stat_result = os.stat(self.path)
+        mtime = stat_result.st_mtime + mtime_offset
+        os.utime(self.path, (mtime, mtime))
+
+    def make_watcher(self, **kwargs):
+        return mthexapod.CompensationConfigWatcher(
+            path=self.path,
+            index=mthexapod.SalIndex.CAMERA_HEXAPOD,
+            callback=self.callback,
+            poll_interval=POLL_INTERVAL,
+            **kwargs,
+        )
+
+    async def wait_for_condition(self, condition, timeout=STD_TIMEOUT):
+        """Wait for a condition to be true.
+
+        Parameters
+        ----------
+        condition : callable
+            Function that takes no arguments and returns a `bool`.
+        timeout : `float`, optional
+            Maximum time to wait (sec).
+
+        Raises
+        ------
+        asyncio.TimeoutError
+            If ``condition`` is not true in time.
+        """
+
+        async def wait_loop():
+            while not condition():
+                await asyncio.sleep(POLL_INTERVAL / 2)
+
+        await asyncio.wait_for(wait_loop(), timeout=timeout)
+
+    async def wait_for_polls(self, watcher, num_polls=3):
+        """Wait for the watcher to check the file ``num_polls`` more times."""
+        end_num_polls = watcher.num_polls + num_polls
+        await self.wait_for_condition(lambda: watcher.num_polls >= end_num_polls)
+
+    def test_read_compensation_config(self):
+        self.write_config(self.compensation_config)
+        config = mthexapod.read_compensation_config(
+            self.path, index=mthexapod.SalIndex.CAMERA_HEXAPOD
+        )
+        for key, value in self.compensation_config.items():
+            self.assertEqual(config[key], value)
+        # Check that defaults are filled in.
+        self.assertEqual(config["azimuth_model"], "polynomial")
+
+        bad_config = dict(self.compensation_config, elevation_coeffs=[[0.1]] * 5)
+        self.write_config(bad_config)
+        with self.assertRaises(jsonschema.ValidationError):
+            mthexapod.read_compensation_config(
+                self.path, index=mthexapod.SalIndex.CAMERA_HEXAPOD
+            )
+
+    def test_constructor_errors(self):
+        for bad_poll_interval in (0, -1):
+            with self.subTest(bad_poll_interval=bad_poll_interval):
+                with self.assertRaises(ValueError):
+                    mthexapod.CompensationConfigWatcher(
+                        path=self.path,
+                        index=mthexapod.SalIndex.CAMERA_HEXAPOD,
+                        callback=self.callback,
+                        poll_interval=bad_poll_interval,
+                    )
+
+    async def test_watch(self):
+        watcher = self.make_watcher()
+        self.assertFalse(watcher.running)
+        # The file does not exist yet.
+        watcher.start()
+        try:
+            self.assertTrue(watcher.running)
+            await self.wait_for_polls(watcher)
+            self.assertTrue(self.configs.empty())
+
+            self.write_config(self.compensation_config)
+            config = await asyncio.wait_for(self.configs.get(), timeout=STD_TIMEOUT)
+            self.assertEqual(
+                config["elevation_coeffs"], self.compensation_config["elevation_coeffs"]
+            )
+            self.assertEqual(watcher.num_loaded, 1)
+
+            # An invalid file is reported and otherwise ignored.
+            bad_config = dict(self.compensation_config, min_temperature="hot")
+            with self.assertLogs(level="WARNING"):
+                self.write_config(bad_config, mtime_offset=1)
+                await self.wait_for_condition(lambda: watcher.num_errors > 0)
+            self.assertTrue(self.configs.empty())
+            self.assertEqual(watcher.num_errors, 1)
+
+            new_config = dict(self.compensation_config, max_temperature=30)
+            self.write_config(new_config, mtime_offset=2)
+            config = await asyncio.wait_for(self.configs.get(), timeout=STD_TIMEOUT)
+            self.assertEqual(config["max_temperature"], 30)
+            self.assertEqual(watcher.num_loaded, 2)
+
+            # The callback is not called again if the file is unchanged.
+            await self.wait_for_polls(watcher)
+            self.assertTrue(self.configs.empty())
+        finally:
+            watcher.stop()
+        await asyncio.sleep(0)
+        self.assertFalse(watcher.running)
+
+    async def test_ignore_current(self):
+        self.write_config(self.compensation_config)
+        watcher = self.make_watcher()
+        watcher.start(ignore_current=True)
+        try:
+            await self.wait_for_polls(watcher)
+            self.assertTrue(self.configs.empty())
+
+            new_config = dict(self.compensation_config, max_temperature=30)
+            self.write_config(new_config, mtime_offset=1)
+            config = await asyncio.wait_for(self.configs.get(), timeout=STD_TIMEOUT)
+            self.assertEqual(config["max_temperature"], 30)
+        finally:
+            watcher.stop()
+
+    async def test_callback_error(self):
+        async def bad_callback(config):
+            raise RuntimeError("Intentional error")
+
+        self.write_config(self.compensation_config)
+        watcher = mthexapod.CompensationConfigWatcher(
+            path=self.path,
+            index=mthexapod.SalIndex.CAMERA_HEXAPOD,
+            callback=bad_callback,
+            poll_interval=POLL_INTERVAL,
+        )
+        with self.assertLogs(level="ERROR"):
+            watcher.start()
+            await self.wait_for_condition(lambda: watcher.num_errors > 0)
+            await self.wait_for_polls(watcher)
+        self.assertTrue(watcher.running)
+        self.assertEqual(watcher.num_errors, 1)
+        self.assertEqual(watcher.num_loaded, 0)
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import dataclasses
+import pathlib
+import tempfile
+import unittest
+
+import numpy as np
+
+from lsst.ts import mthexapod
+
+
+class CompensationGridTestCase(unittest.TestCase):
+    def make_random_inputs(self, nvalues, min_temperature, max_temperature):
+        rng = np.random.default_rng(seed=12)
+        return dict(
+            elevation=rng.uniform(0, 90, nvalues),
+            azimuth=rng.uniform(-360, 720, nvalues),
+            rotation=rng.uniform(-270, 270, nvalues),
+            temperature=rng.uniform(
+                min_temperature - 10, max_temperature + 10, nvalues
+            ),
+        )
+
+    def test_constructor_errors(self):
+        compensation = mthexapod.Compensation(
+            elevation_coeffs=[[0]] * 6,
+            azimuth_coeffs=[[0]] * 6,
+            rotation_coeffs=[[0]] * 6,
+            temperature_coeffs=[[0]] * 6,
+            min_temperature=-20,
+            max_temperature=25,
+        )
+        for bad_steps in (
+            [1] * 3,
+            [1] * 5,
+            [1, 1, 0, 1],
+            [1, -1, 1, 1],
+            # Too many grid points
+            [0.1, 0.1, 0.1, 1],
+        ):
+            with self.subTest(bad_steps=bad_steps):
+                with self.assertRaises(ValueError):
+                    mthexapod.CompensationGrid(
+                        compensation=compensation, steps=bad_steps
+                    )
+
+    def test_linear_model(self):
+        """Multilinear interpolation of a linear model is exact,
+        including linear extrapolation in temperature.
+        """
+        compensation = mthexapod.Compensation(
+            elevation_coeffs=[[0.1 * i, 0.01 * i] for i in range(6)],
+            azimuth_coeffs=[[0.2 * i, -0.02 * i] for i in range(6)],
+            rotation_coeffs=[[0.3 * i, 0.03 * i] for i in range(6)],
+            temperature_coeffs=[[0.4 * i, -0.04 * i] for i in range(6)],
+            min_temperature=-20,
+            max_temperature=25,
+        )
+        grid = mthexapod.CompensationGrid(
+            compensation=compensation, steps=[30, 90, 90, 15]
+        )
+        self.assertEqual(
+            [len(axis) for axis in grid.grid_axes], [4, 5, 5, 4],
+        )
+        self.assertEqual(grid.table.shape, (4, 5, 5, 4, 6))
+        self.assertEqual(grid.nbytes, 4 * 5 * 5 * 4 * 6 * 8)
+        np.testing.assert_allclose(grid.max_error, 0, atol=1e-12)
+
+        inputs = self.make_random_inputs(
+            nvalues=100, min_temperature=-20, max_temperature=25
+        )
+        np.testing.assert_allclose(
+            grid.get_offsets(**inputs), compensation.get_offsets(**inputs)
+        )
+        # Check the edges of the grid
+        for elevation, azimuth, rotation in (
+            (0, 0, -180),
+            (90, 359.999, 179.999),
+            (90, 360, 180),
+        ):
+            np.testing.assert_allclose(
+                grid.get_offsets(elevation, azimuth, rotation, 25),
+                compensation.get_offsets(elevation, azimuth, rotation, 25),
+            )
+        comp_inputs = mthexapod.CompensationInputs(
+            elevation=12, azimuth=34, rotation=56, temperature=7
+        )
+        np.testing.assert_allclose(
+            dataclasses.astuple(grid.get_offset(comp_inputs)),
+            dataclasses.astuple(compensation.get_offset(comp_inputs)),
+        )
+
+    def test_max_error(self):
+        compensation = mthexapod.Compensation(
+            elevation_coeffs=[[0.1, 0.01, 0.002 * i] for i in range(6)],
+            azimuth_coeffs=[[0.2, -0.02, -0.0003 * i] for i in range(6)],
+            rotation_coeffs=[[0.3, 0.03, 0.0004 * i] for i in range(6)],
+            temperature_coeffs=[[0.4, -0.04, 0.005 * i] for i in range(6)],
+            min_temperature=-20,
+            max_temperature=25,
+        )
+        grid = mthexapod.CompensationGrid(
+            compensation=compensation, steps=[5, 10, 10, 5]
+        )
+        self.assertTrue(np.all(grid.max_error[1:] > 0))
+
+        inputs = self.make_random_inputs(
+            nvalues=1000, min_temperature=-20, max_temperature=25
+        )
+        error = np.abs(grid.get_offsets(**inputs) - compensation.get_offsets(**inputs))
+        self.assertTrue(np.all(error <= grid.max_error * (1 + 1e-7) + 1e-12))
+
+    def test_save_load(self):
+        compensation = mthexapod.Compensation(
+            elevation_coeffs=[[0.1, 0.01, 0.002 * i] for i in range(6)],
+            azimuth_coeffs=[[0.2, -0.02, -0.0003 * i] for i in range(6)],
+            rotation_coeffs=[[0.3, 0.03, 0.0004 * i] for i in range(6)],
+            temperature_coeffs=[[0.4, -0.04, 0.005 * i] for i in range(6)],
+            min_temperature=-20,
+            max_temperature=25,
+        )
+        grid = mthexapod.CompensationGrid(
+            compensation=compensation, steps=[10, 20, 20, 5]
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = pathlib.Path(temp_dir) / "grid.npz"
+            grid.save(path)
+            loaded_grid = mthexapod.CompensationGrid.load(
+                path, compensation=compensation
+            )
+
+            # Save a grid with an inconsistent table.
+            bad_path = pathlib.Path(temp_dir) / "bad_grid.npz"
+            with np.load(path) as data:
+                bad_data = dict(data)
+            bad_data["table"] = bad_data["table"][1:]
+            np.savez(bad_path, **bad_data)
+            with self.assertRaises(ValueError):
+                mthexapod.CompensationGrid.load(bad_path, compensation=compensation)
+
+        self.assertIs(loaded_grid.compensation, compensation)
+        np.testing.assert_array_equal(loaded_grid.table, grid.table)
+        np.testing.assert_array_equal(loaded_grid.max_error, grid.max_error)
+        for loaded_axis, axis in zip(loaded_grid.grid_axes, grid.grid_axes):
+            np.testing.assert_array_equal(loaded_axis, axis)
+        inputs = self.make_random_inputs(
+            nvalues=100, min_temperature=-20, max_temperature=25
+        )
+        np.testing.assert_array_equal(
+            loaded_grid.get_offsets(**inputs), grid.get_offsets(**inputs)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
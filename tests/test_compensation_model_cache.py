@@ -0,0 +1,144 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pathlib
+import tempfile
+import unittest
+
+import numpy as np
+
+from lsst.ts import mthexapod
+
+config_path = pathlib.Path(__file__).parent / "data" / "config" / "valid.yaml"
+
+
+class CompensationModelCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.subconfig = mthexapod.load_csc_config(
+            path=config_path, index=mthexapod.SalIndex.CAMERA_HEXAPOD
+        )
+        self.grid_steps = [15, 30, 30, 15]
+
+    def check_counts(self, cache, hits, disk_hits, misses):
+        self.assertEqual(cache.hits, hits)
+        self.assertEqual(cache.disk_hits, disk_hits)
+        self.assertEqual(cache.misses, misses)
+
+    def test_config_hash(self):
+        config_hash = mthexapod.get_compensation_config_hash(self.subconfig)
+        self.assertEqual(len(config_hash), 64)
+        self.assertEqual(
+            mthexapod.get_compensation_config_hash(dict(self.subconfig)), config_hash
+        )
+        # Key order does not matter.
+        reordered_subconfig = dict(reversed(list(self.subconfig.items())))
+        self.assertEqual(
+            mthexapod.get_compensation_config_hash(reordered_subconfig), config_hash
+        )
+        # Values and grid steps do matter.
+        changed_subconfig = dict(self.subconfig, max_temperature=99)
+        for other_hash in (
+            mthexapod.get_compensation_config_hash(changed_subconfig),
+            mthexapod.get_compensation_config_hash(
+                self.subconfig, grid_steps=self.grid_steps
+            ),
+        ):
+            self.assertNotEqual(other_hash, config_hash)
+
+    def test_constructor_errors(self):
+        with self.assertRaises(ValueError):
+            mthexapod.CompensationModelCache(max_size=-1)
+
+    def test_memory_cache(self):
+        cache = mthexapod.CompensationModelCache(max_size=2)
+        self.assertIsNone(cache.cache_dir)
+        compensation, grid = cache.get(self.subconfig)
+        self.assertIsInstance(compensation, mthexapod.Compensation)
+        self.assertIsNone(grid)
+        self.check_counts(cache, hits=0, disk_hits=0, misses=1)
+
+        compensation2, grid2 = cache.get(dict(self.subconfig))
+        self.assertIs(compensation2, compensation)
+        self.check_counts(cache, hits=1, disk_hits=0, misses=1)
+
+        compensation3, grid3 = cache.get(self.subconfig, grid_steps=self.grid_steps)
+        self.assertIsInstance(grid3, mthexapod.CompensationGrid)
+        self.assertIs(grid3.compensation, compensation3)
+        self.check_counts(cache, hits=1, disk_hits=0, misses=2)
+        self.assertEqual(len(cache), 2)
+
+        # Adding a third model evicts the least recently used one.
+        changed_subconfig = dict(self.subconfig, max_temperature=99)
+        cache.get(changed_subconfig)
+        self.assertEqual(len(cache), 2)
+        self.check_counts(cache, hits=1, disk_hits=0, misses=3)
+        compensation4, _ = cache.get(self.subconfig)
+        self.assertIsNot(compensation4, compensation)
+        self.check_counts(cache, hits=1, disk_hits=0, misses=4)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+        # max_size=0 disables the in-memory cache.
+        cache = mthexapod.CompensationModelCache(max_size=0)
+        cache.get(self.subconfig)
+        cache.get(self.subconfig)
+        self.assertEqual(len(cache), 0)
+        self.check_counts(cache, hits=0, disk_hits=0, misses=2)
+
+    def test_disk_cache(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = pathlib.Path(temp_dir) / "cache"
+            cache = mthexapod.CompensationModelCache(cache_dir=cache_dir)
+            compensation, grid = cache.get(self.subconfig, grid_steps=self.grid_steps)
+            self.check_counts(cache, hits=0, disk_hits=0, misses=1)
+            cached_paths = list(cache_dir.iterdir())
+            self.assertEqual(len(cached_paths), 1)
+            self.assertEqual(cached_paths[0].suffix, ".npz")
+
+            # Models without a grid are not saved to disk.
+            cache.get(self.subconfig)
+            self.assertEqual(len(list(cache_dir.iterdir())), 1)
+
+            # A new cache (e.g. in a new process) loads the saved grid.
+            cache = mthexapod.CompensationModelCache(cache_dir=cache_dir)
+            compensation2, grid2 = cache.get(self.subconfig, grid_steps=self.grid_steps)
+            self.check_counts(cache, hits=0, disk_hits=1, misses=0)
+            np.testing.assert_array_equal(grid2.table, grid.table)
+            np.testing.assert_array_equal(grid2.max_error, grid.max_error)
+
+            # A corrupt file is ignored and replaced.
+            cached_paths[0].write_bytes(b"not a valid npz file")
+            cache = mthexapod.CompensationModelCache(cache_dir=cache_dir)
+            with self.assertLogs(level="WARNING"):
+                compensation3, grid3 = cache.get(
+                    self.subconfig, grid_steps=self.grid_steps
+                )
+            self.check_counts(cache, hits=0, disk_hits=0, misses=1)
+            np.testing.assert_array_equal(grid3.table, grid.table)
+            cache = mthexapod.CompensationModelCache(cache_dir=cache_dir)
+            cache.get(self.subconfig, grid_steps=self.grid_steps)
+            self.check_counts(cache, hits=0, disk_hits=1, misses=0)
+            self.assertEqual(len(list(cache_dir.iterdir())), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
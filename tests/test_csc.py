@@ -26,6 +26,7 @@ import dataclasses
 import logging
 import pathlib
 import unittest
+import unittest.mock
 import time
 
 import asynctest
@@ -33,6 +34,7 @@ import numpy as np
 
 from lsst.ts import salobj
 from lsst.ts import mthexapod
+from lsst.ts.mthexapod.testutils import MockTemperatureTopic
 from lsst.ts import hexrotcomm
 from lsst.ts.idl.enums.MTHexapod import ControllerState, EnabledSubstate
 
@@ -355,6 +357,118 @@ class TestHexapodCsc(hexrotcomm.BaseCscTestCase, asynctest.TestCase):
             desired_position=desired_compensated_position
         )
 
+    async def enable_compensation(self, compensation_inputs):
+        """Set the compensation inputs and enable compensation mode.
+
+        Parameters
+        ----------
+        compensation_inputs : `CompensationInputs`
+            Compensation inputs.
+        """
+        await self.set_compensation_inputs(**vars(compensation_inputs))
+        await self.assert_next_sample(
+            topic=self.remote.evt_compensationMode, enabled=False
+        )
+        await self.remote.cmd_setCompensationMode.set_start(
+            enable=True, timeout=STD_TIMEOUT
+        )
+        await self.assert_next_sample(
+            topic=self.remote.evt_compensationMode, enabled=True
+        )
+        await self.assert_next_application(desired_position=ZERO_POSITION)
+
+    async def start_compensation(self):
+        """Enable compensation mode, move, and check the first
+        compensation update.
+
+        Returns
+        -------
+        compensation_inputs : `CompensationInputs`
+            Compensation inputs.
+        uncompensated_position : `Position`
+            Uncompensated position.
+        """
+        compensation_inputs = CompensationInputs(
+            elevation=32, azimuth=44, rotation=-5, temperature=15
+        )
+        await self.enable_compensation(compensation_inputs)
+        uncompensated_position = mthexapod.Position(500, -300, 200, 0.03, -0.02, 0.03)
+        await self.check_move(
+            uncompensated_position=uncompensated_position, est_move_duration=1,
+        )
+        await self.check_compensation(
+            uncompensated_position=uncompensated_position,
+            compensation_inputs=compensation_inputs,
+            update_inputs=False,
+        )
+        return compensation_inputs, uncompensated_position
+
+    async def wait_for_condition(self, condition, description, timeout=STD_TIMEOUT):
+        """Wait for a condition to be true.
+
+        Parameters
+        ----------
+        condition : callable
+            Function that takes no arguments and returns a `bool`.
+        description : `str`
+            Description of the condition, for the failure message.
+        timeout : `float`, optional
+            Time limit (sec).
+        """
+        t0 = time.monotonic()
+        while not condition():
+            if time.monotonic() - t0 > timeout:
+                self.fail(f"Timed out waiting for {description}")
+            await asyncio.sleep(0.01)
+
+    async def wait_for_compensation_ticks(self, num_ticks=3, timeout=STD_TIMEOUT):
+        """Wait for the compensation scheduler to tick ``num_ticks`` more
+        times.
+
+        Parameters
+        ----------
+        num_ticks : `int`, optional
+            Number of ticks to wait for.
+        timeout : `float`, optional
+            Time limit (sec).
+        """
+        scheduler = self.csc.compensation_scheduler
+        end_num_ticks = scheduler.num_ticks + num_ticks
+        await self.wait_for_condition(
+            lambda: scheduler.num_ticks >= end_num_ticks,
+            description=f"{num_ticks} compensation scheduler ticks",
+            timeout=timeout,
+        )
+
+    async def wait_for_compensation_update(self, timeout=STD_TIMEOUT):
+        """Wait for the compensation loop to start a new update.
+
+        Parameters
+        ----------
+        timeout : `float`, optional
+            Time limit (sec).
+        """
+        update_time = self.csc.last_compensation_update_time
+        await self.wait_for_condition(
+            lambda: self.csc.last_compensation_update_time > update_time,
+            description="a compensation update",
+            timeout=timeout,
+        )
+
+    async def wait_for_telemetry(self, num_samples=5):
+        """Wait for ``num_samples`` new samples of application telemetry.
+
+        Use this to give the CSC a chance to do something
+        (such as apply a compensation update) that it should not do.
+
+        Parameters
+        ----------
+        num_samples : `int`, optional
+            Number of samples to wait for.
+        """
+        for i in range(num_samples):
+            await self.remote.tel_application.next(flush=True, timeout=STD_TIMEOUT)
+
     async def check_offset(
         self, first_uncompensated_position, offset, est_move_duration
     ):
@@ -538,6 +652,34 @@ class TestHexapodCsc(hexrotcomm.BaseCscTestCase, asynctest.TestCase):
                 enabled_commands=enabled_commands
             )
 
+    async def test_reconfigure_uses_cached_compensation(self):
+        async with self.make_csc(
+            initial_state=salobj.State.STANDBY,
+            config_dir=local_config_dir,
+            simulation_mode=1,
+        ):
+            model_cache = self.csc.compensation_model_cache
+            await salobj.set_summary_state(
+                remote=self.remote,
+                state=salobj.State.DISABLED,
+                settingsToApply="valid.yaml",
+            )
+            compensation = self.csc.compensation
+            self.assertEqual(model_cache.hits, 0)
+            self.assertEqual(model_cache.misses, 1)
+
+            await salobj.set_summary_state(
+                remote=self.remote, state=salobj.State.STANDBY
+            )
+            await salobj.set_summary_state(
+                remote=self.remote,
+                state=salobj.State.DISABLED,
+                settingsToApply="valid.yaml",
+            )
+            self.assertIs(self.csc.compensation, compensation)
+            self.assertEqual(model_cache.hits, 1)
+            self.assertEqual(model_cache.misses, 1)
+
     async def test_configure_acceleration(self):
         """Test the configureAcceleration command.
         """
@@ -864,6 +1006,751 @@ class TestHexapodCsc(hexrotcomm.BaseCscTestCase, asynctest.TestCase):
                 topic=self.remote.evt_compensationMode, enabled=False
             )
 
+    async def test_compensation_deadband(self):
+        """Test that the compensation loop skips moves that are within
+        the deadband, or whose compensation inputs are unchanged.
+        """
+        async with self.make_csc(
+            config_dir=local_config_dir,
+            initial_state=salobj.State.ENABLED,
+            settings_to_apply="valid.yaml",
+            simulation_mode=1,
+        ):
+            (
+                compensation_inputs,
+                uncompensated_position,
+            ) = await self.start_compensation()
+            self.assertEqual(
+                self.csc.last_compensation_seq_nums,
+                self.csc._get_compensation_seq_nums(),
+            )
+            self.assertGreater(
+                self.csc.compensation_scheduler.get_statistics().num_ticks, 0
+            )
+            compensated_position = self.csc.last_compensated_pos
+            self.assertIsNotNone(compensated_position)
+
+            # Make the deadband so large that changing the inputs
+            # does not trigger a move.
+            self.csc.compensation_deadband = (1e6,) * 6
+            await self.set_compensation_inputs(
+                elevation=compensation_inputs.elevation + 1,
+                azimuth=compensation_inputs.azimuth,
+                rotation=None,
+                temperature=None,
+            )
+            recorder = self.csc.move_latency_recorder
+            num_updates = recorder.get_count("compensation_update")
+            await self.wait_for_compensation_ticks(num_ticks=5)
+            self.assertEqual(self.csc.last_compensated_pos, compensated_position)
+            # Skipped updates are not recorded as compensation update latency.
+            self.assertEqual(recorder.get_count("compensation_update"), num_updates)
+            self.assertEqual(
+                self.csc.last_compensation_seq_nums,
+                self.csc._get_compensation_seq_nums(),
+            )
+
+            # With no deadband, a change in inputs triggers a move.
+            self.csc.compensation_deadband = (0,) * 6
+            new_compensation_inputs = CompensationInputs(
+                elevation=65, azimuth=44, rotation=-5, temperature=15
+            )
+            await self.check_compensation(
+                uncompensated_position=uncompensated_position,
+                compensation_inputs=new_compensation_inputs,
+                update_inputs=True,
+            )
+            self.assertNotEqual(self.csc.last_compensated_pos, compensated_position)
+
+    async def test_compensation_after_reenable(self):
+        """Test that compensation commands a move after the CSC
+        is disabled and enabled again, even if the compensated position
+        is within the deadband of the previously commanded position.
+        """
+        async with self.make_csc(
+            config_dir=local_config_dir,
+            initial_state=salobj.State.ENABLED,
+            settings_to_apply="valid.yaml",
+            simulation_mode=1,
+        ):
+            (
+                compensation_inputs,
+                uncompensated_position,
+            ) = await self.start_compensation()
+            self.assertIsNotNone(self.csc.last_compensated_pos)
+            self.csc.compensation_deadband = (1e6,) * 6
+
+            await self.remote.cmd_disable.set_start(timeout=STD_TIMEOUT)
+            await self.assert_next_sample(
+                topic=self.remote.evt_compensationMode, enabled=False
+            )
+            self.assertIsNone(self.csc.last_compensated_pos)
+            self.assertIsNone(self.csc.last_compensation_seq_nums)
+
+            await self.remote.cmd_enable.set_start(timeout=STD_TIMEOUT)
+            self.remote.evt_compensationOffset.flush()
+            await self.remote.cmd_setCompensationMode.set_start(
+                enable=True, timeout=STD_TIMEOUT
+            )
+            await self.assert_next_sample(
+                topic=self.remote.evt_compensationMode, enabled=True
+            )
+            await self.check_compensation(
+                uncompensated_position=uncompensated_position,
+                compensation_inputs=compensation_inputs,
+                update_inputs=False,
+            )
+            self.assertIsNotNone(self.csc.last_compensated_pos)
+
+    async def test_compensation_holds_without_inputs(self):
+        """Test that the compensation loop keeps the current compensated
+        position while the compensation inputs are refused as stale.
+        """
+        async with self.make_csc(
+            config_dir=local_config_dir,
+            initial_state=salobj.State.ENABLED,
+            settings_to_apply="valid.yaml",
+            simulation_mode=1,
+        ):
+            (
+                compensation_inputs,
+                uncompensated_position,
+            ) = await self.start_compensation()
+            compensated_position = self.csc.last_compensated_pos
+
+            # The targets have no time, so they are stale.
+            self.csc.compensation_stale_input_policy = "refuse"
+            self.csc.compensation_max_input_age = 1
+            self.assertIsNone(self.csc.get_compensation_inputs())
+            await self.wait_for_compensation_ticks(num_ticks=1)
+            self.remote.evt_compensatedPosition.flush()
+            await self.wait_for_compensation_ticks()
+            self.assertIsNone(self.remote.evt_compensatedPosition.get_oldest())
+            self.assertEqual(self.csc.last_compensated_pos, compensated_position)
+            await self.assert_next_application(desired_position=compensated_position)
+
+            # Compensation resumes when the inputs are available again.
+            self.csc.compensation_max_input_age = None
+            await self.check_compensation(
+                uncompensated_position=uncompensated_position,
+                compensation_inputs=compensation_inputs,
+                update_inputs=False,
+            )
+
+    async def test_move_latencies(self):
+        """Test the latency of each stage of moves
+        and compensation updates.
+        """
+        async with self.make_csc(
+            config_dir=local_config_dir,
+            initial_state=salobj.State.ENABLED,
+            settings_to_apply="valid.yaml",
+            simulation_mode=1,
+        ):
+            self.assertEqual(self.csc.get_move_latencies(), {})
+
+            await self.start_compensation()
+            # Wait for the compensation loop to command a move.
+            recorder = self.csc.move_latency_recorder
+            await self.wait_for_condition(
+                lambda: recorder.get_count("compensation_update") > 0,
+                description="a compensation update that commands a move",
+            )
+
+            latencies = self.csc.get_move_latencies()
+            for stage_name in (
+                "inputs",
+                "offset",
+                "build",
+                "command",
+                "publish",
+                "compensation_update",
+            ):
+                self.assertIn(stage_name, latencies)
+                percentiles = latencies[stage_name]
+                self.assertEqual(tuple(percentiles), mthexapod.LATENCY_PERCENTILES)
+                self.assertGreaterEqual(percentiles[50], 0)
+                self.assertLessEqual(percentiles[50], percentiles[99])
+
+    async def test_update_compensation_config(self):
+        """Test changing the compensation model while compensating."""
+        async with self.make_csc(
+            config_dir=local_config_dir,
+            initial_state=salobj.State.ENABLED,
+            settings_to_apply="valid.yaml",
+            simulation_mode=1,
+        ):
+            (
+                compensation_inputs,
+                uncompensated_position,
+            ) = await self.start_compensation()
+            old_compensation = self.csc.compensation
+            old_compensated_position = self.csc.last_compensated_pos
+
+            # Double all coefficients; the compensation loop should
+            # apply the new model without a change in inputs,
+            # and without interrupting compensation.
+            compensation_config = mthexapod.load_csc_config(
+                path=local_config_dir / "valid.yaml", index=self.csc.salinfo.index
+            )
+            for name in ("elevation", "azimuth", "rotation", "temperature"):
+                compensation_config[f"{name}_coeffs"] = [
+                    [2 * value for value in coeffs]
+                    for coeffs in compensation_config[f"{name}_coeffs"]
+                ]
+            await self.csc.compensation_config_callback(compensation_config)
+            await self.check_compensation(
+                uncompensated_position=uncompensated_position,
+                compensation_inputs=compensation_inputs,
+                update_inputs=False,
+            )
+            self.assertIsNot(self.csc.compensation, old_compensation)
+            self.assertIsNone(self.csc.pending_compensation)
+            self.assertNotEqual(self.csc.last_compensated_pos, old_compensated_position)
+            self.assertTrue(self.csc.compensation_mode)
+
+    async def test_event_triggered_compensation(self):
+        """Test compensation triggered by MTMount and MTRotator targets."""
+        async with self.make_csc(
+            config_dir=local_config_dir,
+            initial_state=salobj.State.ENABLED,
+            settings_to_apply="valid.yaml",
+            simulation_mode=1,
+        ):
+            self.assertEqual(self.csc.compensation_trigger, "timer")
+            _, uncompensated_position = await self.start_compensation()
+
+            # With no staleness limit and no new targets,
+            # the compensation loop should stay idle.
+            self.csc.compensation_trigger = "event"
+            self.csc.compensation_min_spacing = 0
+            self.csc.compensation_max_staleness = None
+            # Wait for the update already scheduled by the timer.
+            await self.wait_for_compensation_update()
+            update_time = self.csc.last_compensation_update_time
+            await self.wait_for_telemetry()
+            self.assertEqual(self.csc.last_compensation_update_time, update_time)
+
+            # A new target triggers a compensation update.
+            new_compensation_inputs = CompensationInputs(
+                elevation=65, azimuth=44, rotation=-5, temperature=15
+            )
+            await self.check_compensation(
+                uncompensated_position=uncompensated_position,
+                compensation_inputs=new_compensation_inputs,
+                update_inputs=True,
+            )
+            self.assertGreater(self.csc.last_compensation_update_time, update_time)
+
+            # With a staleness limit, the compensation loop
+            # updates even if no new target arrives.
+            self.csc.compensation_max_staleness = self.csc.compensation_interval
+            # The loop may already be waiting for a target with no time limit,
+            # so wake it up to apply the new limit.
+            self.csc.wake_compensation()
+            await self.wait_for_compensation_update()
+            await self.wait_for_compensation_update()
+
+    async def test_deferred_compensation(self):
+        """Test that a compensation update deferred because the hexapod
+        is moving is applied as soon as the hexapod is stationary.
+        """
+        async with self.make_csc(
+            config_dir=local_config_dir,
+            initial_state=salobj.State.ENABLED,
+            settings_to_apply="valid.yaml",
+            simulation_mode=1,
+        ):
+            compensation_inputs = CompensationInputs(
+                elevation=32, azimuth=44, rotation=-5, temperature=15
+            )
+            await self.enable_compensation(compensation_inputs)
+            await self.assert_next_sample(
+                topic=self.remote.evt_controllerState,
+                controllerState=ControllerState.ENABLED,
+                enabledSubstate=EnabledSubstate.STATIONARY,
+            )
+            self.assertTrue(self.csc.stationary_event.is_set())
+
+            uncompensated_position = mthexapod.Position(
+                500, -300, 200, 0.03, -0.02, 0.03
+            )
+            await self.remote.cmd_move.set_start(
+                **vars(uncompensated_position), timeout=STD_TIMEOUT
+            )
+            await self.assert_next_sample(
+                topic=self.remote.evt_controllerState,
+                controllerState=ControllerState.ENABLED,
+                enabledSubstate=EnabledSubstate.MOVING_POINT_TO_POINT,
+            )
+            self.assertFalse(self.csc.stationary_event.is_set())
+
+            # Wait for the compensation loop to defer an update,
+            # then make sure the timer cannot trigger the next one.
+            await self.wait_for_compensation_ticks(num_ticks=1)
+            self.csc.compensation_scheduler.interval = 1000
+            new_elevation = compensation_inputs.elevation + 10
+            await self.set_compensation_inputs(
+                elevation=new_elevation,
+                azimuth=compensation_inputs.azimuth,
+                rotation=None,
+                temperature=None,
+            )
+            await self.assert_next_sample(
+                topic=self.remote.evt_controllerState,
+                controllerState=ControllerState.ENABLED,
+                enabledSubstate=EnabledSubstate.STATIONARY,
+                timeout=STD_TIMEOUT * 2,
+            )
+            self.assertTrue(self.csc.stationary_event.is_set())
+            while True:
+                data = await self.remote.evt_compensationOffset.next(
+                    flush=False, timeout=STD_TIMEOUT
+                )
+                if abs(data.elevation - new_elevation) < EPSILON:
+                    break
+
+    async def test_compensation_task(self):
+        """Test that only one compensation loop runs at a time."""
+        async with self.make_csc(
+            config_dir=local_config_dir,
+            initial_state=salobj.State.ENABLED,
+            settings_to_apply="valid.yaml",
+            simulation_mode=1,
+        ):
+            compensation_inputs = CompensationInputs(
+                elevation=32, azimuth=44, rotation=-5, temperature=15
+            )
+            await self.set_compensation_inputs(**vars(compensation_inputs))
+            self.assertEqual(self.csc.num_compensation_tasks, 0)
+            self.assertFalse(self.csc.compensation_loop_running)
+            await self.remote.cmd_setCompensationMode.set_start(
+                enable=True, timeout=STD_TIMEOUT
+            )
+            # There is no commanded position, so nothing to compensate.
+            self.assertFalse(self.csc.compensation_loop_running)
+            uncompensated_position = mthexapod.Position(
+                500, -300, 200, 0.03, -0.02, 0.03
+            )
+            await self.check_move(
+                uncompensated_position=uncompensated_position, est_move_duration=1,
+            )
+            self.assertEqual(self.csc.num_compensation_tasks, 1)
+            self.assertTrue(self.csc.compensation_loop_running)
+
+            # A burst of restarts runs one new loop, not one per restart.
+            num_loops = self.csc.num_compensation_loops
+            for i in range(10):
+                self.csc.bump_compensation_loop(wait_first=True)
+            await self.wait_for_condition(
+                lambda: self.csc.num_compensation_loops > num_loops,
+                description="a new compensation loop",
+            )
+            await self.wait_for_compensation_ticks(num_ticks=1)
+            self.assertEqual(self.csc.num_compensation_tasks, 1)
+            self.assertEqual(self.csc.num_compensation_loops, num_loops + 1)
+            self.assertTrue(self.csc.compensation_loop_running)
+
+            self.csc.pause_compensation()
+            await self.wait_for_condition(
+                lambda: not self.csc.compensation_loop_running,
+                description="the compensation loop to stop",
+            )
+            self.csc.resume_compensation(wait_first=True)
+            self.csc.resume_compensation(wait_first=True)
+            await self.wait_for_condition(
+                lambda: self.csc.compensation_loop_running,
+                description="the compensation loop to start",
+            )
+            await self.wait_for_compensation_ticks(num_ticks=1)
+            self.assertEqual(self.csc.num_compensation_loops, num_loops + 2)
+
+            # Waking the loop applies an update without starting a new loop.
+            self.csc.compensation_scheduler.interval = 1000
+            self.csc.restart_compensation(wait_first=True)
+            await self.wait_for_condition(
+                lambda: self.csc.num_compensation_loops == num_loops + 3
+                and not self.csc.compensation_wait_task.done(),
+                description="the new compensation loop to wait for a tick",
+            )
+            self.csc.wake_compensation()
+            await self.wait_for_compensation_update()
+            self.assertEqual(self.csc.num_compensation_loops, num_loops + 3)
+
+            await self.remote.cmd_setCompensationMode.set_start(
+                enable=False, timeout=STD_TIMEOUT
+            )
+            await self.wait_for_condition(
+                lambda: not self.csc.compensation_loop_running,
+                description="the compensation loop to stop",
+            )
+            self.assertEqual(self.csc.num_compensation_tasks, 1)
+
+    async def test_compensation_loop_failure(self):
+        """Test that compensation mode is turned off if the compensation loop
+        fails with an exception.
+        """
+        async with self.make_csc(
+            config_dir=local_config_dir,
+            initial_state=salobj.State.ENABLED,
+            settings_to_apply="valid.yaml",
+            simulation_mode=1,
+        ):
+            await self.start_compensation()
+
+            async def failing_loop(wait_first):
+                raise RuntimeError("Failed on purpose")
+
+            with unittest.mock.patch.object(
+                self.csc, "compensation_loop", new=failing_loop
+            ):
+                self.csc.restart_compensation(wait_first=False)
+                await self.assert_next_sample(
+                    topic=self.remote.evt_compensationMode, enabled=False
+                )
+            self.assertFalse(self.csc.compensation_mode)
+            await self.wait_for_condition(
+                lambda: not self.csc.compensation_loop_running,
+                description="the compensation loop to stop",
+            )
+            self.assertIsNone(self.csc.last_compensated_pos)
+
+    async def test_compensation_update_failure(self):
+        """Test that compensation mode is turned off if computing
+        a compensation update fails with an exception.
+        """
+        async with self.make_csc(
+            config_dir=local_config_dir,
+            initial_state=salobj.State.ENABLED,
+            settings_to_apply="valid.yaml",
+            simulation_mode=1,
+        ):
+            await self.start_compensation()
+
+            def failing_compute_compensation():
+                raise RuntimeError("Failed on purpose")
+
+            # The adaptive interval computes the compensation offset
+            # before checking whether to apply it.
+            self.csc.compensation_adaptive_interval = True
+            with unittest.mock.patch.object(
+                self.csc, "_compute_compensation", new=failing_compute_compensation,
+            ):
+                await self.assert_next_sample(
+                    topic=self.remote.evt_compensationMode, enabled=False
+                )
+            self.assertFalse(self.csc.compensation_mode)
+            await self.wait_for_condition(
+                lambda: not self.csc.compensation_loop_running,
+                description="the compensation loop to stop",
+            )
+
+    async def test_adaptive_compensation_interval(self):
+        """Test adapting the compensation interval to the rate of change
+        of the compensation offset.
+        """
+        async with self.make_csc(
+            config_dir=local_config_dir,
+            initial_state=salobj.State.ENABLED,
+            settings_to_apply="valid.yaml",
+            simulation_mode=1,
+        ):
+            self.csc.compensation_adaptive_interval = True
+            self.csc.compensation_min_interval = 0.1
+            self.csc.compensation_max_interval = 0.5
+            self.csc.compensation_tolerance = (1,) * 6
+
+            # A stationary target gives the maximum interval.
+            self.mtmount_controller.evt_target.set_put(
+                elevation=45,
+                elevationVelocity=0,
+                azimuth=10,
+                azimuthVelocity=0,
+                taiTime=salobj.current_tai(),
+                force_output=True,
+            )
+            self.mtrotator_controller.evt_target.set_put(
+                position=-5, velocity=0, tai=salobj.current_tai(), force_output=True,
+            )
+            await self.wait_for_condition(
+                lambda: self.csc.mtmount.evt_target.get() is not None
+                and self.csc.mtrotator.evt_target.get() is not None,
+                description="the CSC to read the targets",
+            )
+            compensation = self.csc._compute_compensation()
+            self.csc._update_adaptive_interval(
+                compensation_inputs=compensation.inputs, offset=compensation.offset
+            )
+            self.assertEqual(self.csc.compensation_scheduler.interval, 0.5)
+
+            # A fast slew gives the minimum interval.
+            self.mtmount_controller.evt_target.set_put(
+                elevation=45,
+                elevationVelocity=3,
+                azimuth=10,
+                azimuthVelocity=3,
+                taiTime=salobj.current_tai(),
+                force_output=True,
+            )
+            await self.wait_for_condition(
+                lambda: self.csc.mtmount.evt_target.get().elevationVelocity == 3,
+                description="the CSC to read the new MTMount target",
+            )
+            jacobian = self.csc.compensation.get_jacobian(
+                **vars(self.csc.get_compensation_inputs())
+            )[0]
+            velocities = self.csc._get_compensation_input_velocities()
+            np.testing.assert_allclose(velocities, [3, 3, 0, 0])
+            max_rate = np.max(np.abs(jacobian @ velocities))
+            compensation = self.csc._compute_compensation()
+            self.csc._update_adaptive_interval(
+                compensation_inputs=compensation.inputs, offset=compensation.offset
+            )
+            self.assertAlmostEqual(
+                self.csc.compensation_scheduler.interval,
+                min(max(1 / max_rate, 0.1), 0.5),
+            )
+
+    async def test_temperature_source(self):
+        """Test compensation using temperature from a temperature source."""
+        async with self.make_csc(
+            config_dir=local_config_dir,
+            initial_state=salobj.State.ENABLED,
+            settings_to_apply="valid.yaml",
+            simulation_mode=1,
+        ):
+            self.assertIsInstance(
+                self.csc.temperature_source, mthexapod.NullTemperatureSource
+            )
+            temperature_topic = MockTemperatureTopic()
+            self.csc.temperature_source = mthexapod.TopicTemperatureSource(
+                topic=temperature_topic, field_name="temperature"
+            )
+            compensation_inputs = CompensationInputs(
+                elevation=32, azimuth=44, rotation=-5, temperature=15
+            )
+            await self.set_compensation_inputs(**vars(compensation_inputs))
+            uncompensated_position = mthexapod.Position(
+                500, -300, 200, 0.03, -0.02, 0.03
+            )
+
+            # Temperature is missing, so no compensation is possible.
+            self.assertIsNone(self.csc.get_compensation_inputs())
+
+            temperature_topic.publish(temperature=compensation_inputs.temperature)
+            self.assertEqual(self.csc.get_compensation_inputs(), compensation_inputs)
+
+            # A new sample with the same temperature
+            # does not change the compensation sequence numbers.
+            seq_nums = self.csc._get_compensation_seq_nums()
+            temperature_topic.publish(temperature=compensation_inputs.temperature)
+            self.assertEqual(self.csc._get_compensation_seq_nums(), seq_nums)
+
+            await self.enable_compensation(compensation_inputs)
+            await self.remote.cmd_move.set_start(
+                **vars(uncompensated_position), timeout=STD_TIMEOUT
+            )
+            data = await self.remote.evt_compensationOffset.next(
+                flush=False, timeout=STD_TIMEOUT
+            )
+            self.assertAlmostEqual(data.temperature, compensation_inputs.temperature)
+            self.assert_dataclasses_almost_equal(
+                mthexapod.Position.from_struct(data),
+                self.csc.compensation.get_offset(compensation_inputs),
+            )
+
+            # A new temperature triggers a compensation update,
+            # even if the MTMount and MTRotator targets are unchanged.
+            temperature_topic.publish(temperature=-5)
+            data = await self.remote.evt_compensationOffset.next(
+                flush=False, timeout=STD_TIMEOUT
+            )
+            self.assertAlmostEqual(data.temperature, -5)
+
+            # A stale temperature holds the current compensated position.
+            compensated_position = self.csc.last_compensated_pos
+            self.csc.temperature_source.max_age = 0.001
+            await self.wait_for_compensation_ticks(num_ticks=1)
+            self.assertIsNone(self.csc.get_compensation_inputs())
+            self.remote.evt_compensatedPosition.flush()
+            await self.wait_for_compensation_ticks()
+            self.assertIsNone(self.remote.evt_compensatedPosition.get_oldest())
+            self.assertEqual(self.csc.last_compensated_pos, compensated_position)
+
+    async def test_predict_compensation_inputs(self):
+        """Test predicting and extrapolating compensation inputs."""
+        async with self.make_csc(
+            config_dir=local_config_dir,
+            initial_state=salobj.State.ENABLED,
+            settings_to_apply="valid.yaml",
+            simulation_mode=1,
+        ):
+            elevation = 45
+            azimuth = 10
+            rotation = -5
+            elevation_velocity = 0.1
+            azimuth_velocity = -0.2
+            rotation_velocity = 0.3
+            velocities = (elevation_velocity, azimuth_velocity, rotation_velocity)
+            target_age = 10
+            target_tai = salobj.current_tai() - target_age
+            self.mtmount_controller.evt_target.set_put(
+                elevation=elevation,
+                elevationVelocity=elevation_velocity,
+                azimuth=azimuth,
+                azimuthVelocity=azimuth_velocity,
+                taiTime=target_tai,
+            )
+            self.mtrotator_controller.evt_target.set_put(
+                position=rotation, velocity=rotation_velocity, tai=target_tai,
+            )
+            await self.set_compensation_inputs(
+                elevation=elevation,
+                azimuth=azimuth,
+                rotation=rotation,
+                temperature=None,
+            )
+
+            def get_input_values():
+                inputs = self.csc.get_compensation_inputs()
+                return (inputs.elevation, inputs.azimuth, inputs.rotation)
+
+            # By default the inputs are used as is.
+            self.assertEqual(get_input_values(), (elevation, azimuth, rotation))
+
+            # Predict the inputs compensation_lead_time seconds from now.
+            self.csc.compensation_predict = True
+            self.csc.compensation_lead_time = 2
+            t0 = salobj.current_tai()
+            input_values = get_input_values()
+            dt = salobj.current_tai() - t0
+            for value, position, velocity in zip(
+                input_values, (elevation, azimuth, rotation), velocities
+            ):
+                min_delta_time = t0 + self.csc.compensation_lead_time - target_tai
+                predicted_value = position + velocity * (min_delta_time + dt / 2)
+                self.assertAlmostEqual(
+                    value, predicted_value, delta=abs(velocity) * dt / 2 + EPSILON
+                )
+
+            # Stale inputs may be extrapolated to now, or refused.
+            self.csc.compensation_predict = False
+            self.csc.compensation_max_input_age = target_age / 2
+            self.csc.compensation_stale_input_policy = "extrapolate"
+            input_values = get_input_values()
+            for value, position, velocity in zip(
+                input_values, (elevation, azimuth, rotation), velocities
+            ):
+                self.assertAlmostEqual(value, position + velocity * target_age, delta=1)
+                self.assertNotAlmostEqual(value, position)
+
+            self.csc.compensation_stale_input_policy = "refuse"
+            self.assertIsNone(self.csc.get_compensation_inputs())
+
+            # Inputs that are not stale are used as is.
+            self.csc.compensation_max_input_age = target_age * 10
+            self.assertEqual(get_input_values(), (elevation, azimuth, rotation))
+
+    async def test_max_compensation_change(self):
+        """Test the maximum change in position for one compensation move
+        when ``compensation_rate_limit`` is true.
+        """
+        async with self.make_csc(
+            config_dir=local_config_dir,
+            initial_state=salobj.State.ENABLED,
+            settings_to_apply="valid.yaml",
+            simulation_mode=1,
+        ):
+            await self.remote.evt_configuration.next(flush=False, timeout=STD_TIMEOUT)
+            config = self.csc.evt_configuration.data
+            accel_duration = config.maxVelocityStrut / config.accelerationStrut
+
+            def assert_max_change(period):
+                max_change = self.csc._get_max_compensation_change()
+                for name, velocity in (
+                    ("x", config.maxVelocityXY),
+                    ("y", config.maxVelocityXY),
+                    ("z", config.maxVelocityZ),
+                    ("u", config.maxVelocityUV),
+                    ("v", config.maxVelocityUV),
+                    ("w", config.maxVelocityW),
+                ):
+                    max_distance = getattr(max_change, name)
+                    self.assertGreater(max_distance, 0)
+                    # A move of this distance takes `period` seconds
+                    if max_distance > velocity * accel_duration:
+                        move_duration = max_distance / velocity + accel_duration
+                    else:
+                        move_duration = 2 * np.sqrt(
+                            max_distance * accel_duration / velocity
+                        )
+                    self.assertAlmostEqual(move_duration, period)
+
+            assert_max_change(period=self.csc.compensation_interval)
+
+            # The adaptive interval changes the scheduler's interval.
+            self.csc.compensation_scheduler.interval = (
+                self.csc.compensation_interval * 2
+            )
+            assert_max_change(period=self.csc.compensation_interval * 2)
+
+            # In event mode, use the minimum spacing between updates.
+            self.csc.compensation_trigger = "event"
+            self.csc.compensation_min_spacing = self.csc.compensation_interval / 2
+            assert_max_change(period=self.csc.compensation_interval / 2)
+
+    async def test_compensation_rate_limit(self):
+        """Test that a large change in compensation is applied
+        in several limited steps if ``compensation_rate_limit`` is true.
+        """
+        async with self.make_csc(
+            config_dir=local_config_dir,
+            initial_state=salobj.State.ENABLED,
+            settings_to_apply="valid.yaml",
+            simulation_mode=1,
+        ):
+            _, uncompensated_position = await self.start_compensation()
+            start_position = self.csc.last_compensated_pos
+
+            new_compensation_inputs = CompensationInputs(
+                elevation=65, azimuth=44, rotation=-5, temperature=0
+            )
+            desired_position = (
+                uncompensated_position
+                + self.csc.compensation.get_offset(new_compensation_inputs)
+            )
+            # Limit each step to a bit less than half the total change,
+            # so it takes three steps.
+            max_change = mthexapod.Position(
+                *[
+                    abs(value) / 2.5
+                    for value in dataclasses.astuple(desired_position - start_position)
+                ]
+            )
+            self.csc.compensation_rate_limit = True
+            with unittest.mock.patch.object(
+                self.csc, "_get_max_compensation_change", return_value=max_change
+            ):
+                self.remote.evt_compensatedPosition.flush()
+                await self.set_compensation_inputs(**vars(new_compensation_inputs))
+                positions = [start_position]
+                while not np.allclose(
+                    dataclasses.astuple(positions[-1]),
+                    dataclasses.astuple(desired_position),
+                ):
+                    data = await self.remote.evt_compensatedPosition.next(
+                        flush=False, timeout=STD_TIMEOUT
+                    )
+                    positions.append(mthexapod.Position.from_struct(data))
+
+            self.assertEqual(len(positions), 4)
+            for prev_position, position in zip(positions[:-1], positions[1:]):
+                for change, axis_max_change in zip(
+                    dataclasses.astuple(position - prev_position),
+                    dataclasses.astuple(max_change),
+                ):
+                    self.assertLessEqual(abs(change), axis_max_change + EPSILON)
+
     async def test_move_with_compensation_no_initial_compensation_inputs(self):
         """Test move with compensation enabled but no compensation inputs.
 
@@ -0,0 +1,155 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import logging
+import math
+import time
+import unittest
+
+import asynctest
+
+from lsst.ts import mthexapod
+
+INTERVAL = 0.05
+
+
+class DeadlineSchedulerTestCase(asynctest.TestCase):
+    def test_constructor(self):
+        scheduler = mthexapod.DeadlineScheduler(interval=INTERVAL)
+        self.assertEqual(scheduler.interval, INTERVAL)
+        statistics = scheduler.get_statistics()
+        self.assertEqual(statistics.num_ticks, 0)
+        self.assertEqual(statistics.num_overruns, 0)
+        self.assertEqual(statistics.num_skipped_ticks, 0)
+        for name in ("mean_period", "max_period", "mean_jitter", "max_jitter"):
+            self.assertTrue(math.isnan(getattr(statistics, name)))
+
+        for bad_interval in (0, -INTERVAL):
+            with self.assertRaises(ValueError):
+                mthexapod.DeadlineScheduler(interval=bad_interval)
+            with self.assertRaises(ValueError):
+                scheduler.interval = bad_interval
+
+    async def test_no_drift(self):
+        """Work done between ticks should not delay later ticks."""
+        num_ticks = 10
+        scheduler = mthexapod.DeadlineScheduler(interval=INTERVAL)
+        t0 = time.monotonic()
+        scheduler.reset(start_time=t0)
+        for i in range(num_ticks):
+            num_skipped = await scheduler.wait()
+            self.assertEqual(num_skipped, 0)
+            # Simulate work that takes most of the interval.
+            time.sleep(INTERVAL * 0.6)
+        duration = time.monotonic() - t0
+        # Sleeping after each tick would take num_ticks * 1.6 * INTERVAL.
+        self.assertLess(duration, (num_ticks + 0.9) * INTERVAL)
+        statistics = scheduler.get_statistics()
+        self.assertEqual(statistics.num_ticks, num_ticks)
+        self.assertEqual(statistics.num_overruns, 0)
+        self.assertEqual(statistics.num_skipped_ticks, 0)
+        self.assertAlmostEqual(statistics.mean_period, INTERVAL, delta=INTERVAL * 0.2)
+        self.assertGreaterEqual(statistics.max_period, statistics.mean_period)
+        self.assertGreaterEqual(statistics.mean_jitter, 0)
+        self.assertGreaterEqual(statistics.max_jitter, statistics.mean_jitter)
+
+    async def test_overrun(self):
+        scheduler = mthexapod.DeadlineScheduler(interval=INTERVAL)
+        t0 = time.monotonic()
+        scheduler.reset(start_time=t0)
+        await scheduler.wait()
+        # Overrun the next deadline by 1.5 intervals;
+        # the next tick should fire immediately and one tick
+        # should be skipped.
+        time.sleep(INTERVAL * 2.5)
+        t1 = time.monotonic()
+        num_skipped = await scheduler.wait()
+        self.assertLess(time.monotonic() - t1, INTERVAL * 0.2)
+        self.assertEqual(num_skipped, 1)
+        # The schedule is not shifted by the overrun.
+        self.assertAlmostEqual(scheduler.deadline, t0 + INTERVAL * 4)
+        await scheduler.wait()
+        statistics = scheduler.get_statistics()
+        self.assertEqual(statistics.num_ticks, 3)
+        self.assertEqual(statistics.num_overruns, 1)
+        self.assertEqual(statistics.num_skipped_ticks, 1)
+        self.assertGreater(statistics.max_period, INTERVAL * 2)
+        self.assertGreater(statistics.max_jitter, INTERVAL * 0.4)
+
+        scheduler.reset_statistics()
+        statistics = scheduler.get_statistics()
+        self.assertEqual(statistics.num_ticks, 0)
+        self.assertEqual(statistics.num_overruns, 0)
+        self.assertEqual(statistics.num_skipped_ticks, 0)
+
+    async def test_set_interval(self):
+        scheduler = mthexapod.DeadlineScheduler(interval=INTERVAL)
+        t0 = time.monotonic()
+        scheduler.reset(start_time=t0)
+        await scheduler.wait()
+        self.assertAlmostEqual(scheduler.deadline, t0 + INTERVAL * 2)
+
+        # Setting the interval attribute affects later deadlines.
+        scheduler.interval = INTERVAL * 2
+        self.assertAlmostEqual(scheduler.deadline, t0 + INTERVAL * 2)
+        await scheduler.wait()
+        self.assertAlmostEqual(scheduler.deadline, t0 + INTERVAL * 4)
+
+        # set_interval also moves the pending deadline.
+        scheduler.set_interval(INTERVAL)
+        self.assertAlmostEqual(scheduler.deadline, t0 + INTERVAL * 3)
+        await scheduler.wait()
+        self.assertAlmostEqual(scheduler.deadline, t0 + INTERVAL * 4)
+        self.assertEqual(scheduler.get_statistics().num_overruns, 0)
+
+        with self.assertRaises(ValueError):
+            scheduler.set_interval(0)
+
+    async def test_reset(self):
+        scheduler = mthexapod.DeadlineScheduler(interval=INTERVAL)
+        await asyncio.sleep(INTERVAL * 3)
+        # Without a reset the first deadline has long passed.
+        scheduler.reset()
+        t0 = time.monotonic()
+        num_skipped = await scheduler.wait()
+        self.assertEqual(num_skipped, 0)
+        self.assertGreater(time.monotonic() - t0, INTERVAL * 0.8)
+        self.assertEqual(scheduler.get_statistics().num_overruns, 0)
+
+    async def test_log_statistics(self):
+        log = logging.getLogger("test_log_statistics")
+        scheduler = mthexapod.DeadlineScheduler(
+            interval=INTERVAL, log=log, log_interval=INTERVAL * 2.5, name="Test"
+        )
+        scheduler.reset()
+        with self.assertLogs(log, level=logging.INFO) as logs:
+            for i in range(4):
+                await scheduler.wait()
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("Test statistics", logs.output[0])
+        self.assertIn("num_ticks=3", logs.output[0])
+        # Logging resets the statistics.
+        self.assertEqual(scheduler.get_statistics().num_ticks, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -48,6 +48,49 @@ class FourierSeriesTestCase(unittest.TestCase):
         for ang, pred_value in zip(angarr, pred_values):
             self.assertAlmostEqual(poly(ang), pred_value)
 
+    def test_design_matrix(self):
+        angarr = np.linspace(-360, 360, num=50, endpoint=True)
+        ncoeffs = 41
+        design_matrix = mthexapod.fourier_design_matrix(angarr, ncoeffs)
+        self.assertEqual(design_matrix.shape, (len(angarr), ncoeffs))
+        np.testing.assert_allclose(design_matrix[:, 0], 1)
+        for i in range(1, ncoeffs):
+            harmonic = (i + 1) // 2
+            function = np.sin if i % 2 == 1 else np.cos
+            np.testing.assert_allclose(
+                design_matrix[:, i],
+                function(harmonic * np.radians(angarr)),
+                atol=1e-12,
+            )
+
+        # Scalar angle
+        design_matrix = mthexapod.fourier_design_matrix(30, 4)
+        self.assertEqual(design_matrix.shape, (4,))
+
+        with self.assertRaises(ValueError):
+            mthexapod.fourier_design_matrix(angarr, 0)
+
+    def test_derivative_matrix(self):
+        angarr = np.linspace(-360, 360, num=50, endpoint=True)
+        delta = 1e-6
+        for ncoeffs in (1, 2, 5, 8):
+            derivative_matrix = mthexapod.fourier_derivative_matrix(angarr, ncoeffs)
+            self.assertEqual(derivative_matrix.shape, (len(angarr), ncoeffs))
+            predicted_derivative_matrix = (
+                mthexapod.fourier_design_matrix(angarr + delta, ncoeffs)
+                - mthexapod.fourier_design_matrix(angarr - delta, ncoeffs)
+            ) / (2 * delta)
+            np.testing.assert_allclose(
+                derivative_matrix, predicted_derivative_matrix, atol=1e-8
+            )
+
+    def test_scalar(self):
+        coeffs = [-0.5, 0.4, -0.3, 0.2]
+        poly = mthexapod.FourierSeries(coeffs=coeffs)
+        value = poly(30)
+        self.assertEqual(np.ndim(value), 0)
+        self.assertIsInstance(value, float)
+
     def test_one_coeff(self):
         """Test that a fourier series with only one coffficient
         is constant everywhere.
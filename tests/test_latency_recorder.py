@@ -0,0 +1,99 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+import unittest
+
+import numpy as np
+
+from lsst.ts import mthexapod
+
+
+class LatencyRecorderTestCase(unittest.TestCase):
+    def test_constructor_errors(self):
+        with self.assertRaises(ValueError):
+            mthexapod.LatencyRecorder(stage_names=[])
+        with self.assertRaises(ValueError):
+            mthexapod.LatencyRecorder(stage_names=["a", "b", "a"])
+        for bad_size in (0, -1):
+            with self.assertRaises(ValueError):
+                mthexapod.LatencyRecorder(stage_names=["a"], size=bad_size)
+
+    def test_record(self):
+        size = 100
+        recorder = mthexapod.LatencyRecorder(stage_names=["a", "b", "c"], size=size)
+        self.assertEqual(recorder.get_percentiles(), dict())
+
+        a_durations = np.linspace(0.001, 0.1, 50)
+        for duration in a_durations:
+            recorder.record("a", duration)
+        # Overfill b, so only the most recent durations are used.
+        b_durations = np.linspace(1, 2, size * 2 + 10)
+        for duration in b_durations:
+            recorder.record("b", duration)
+        with self.assertRaises(KeyError):
+            recorder.record("no_such_stage", 0.1)
+        self.assertEqual(recorder.get_count("a"), len(a_durations))
+        self.assertEqual(recorder.get_count("b"), len(b_durations))
+        self.assertEqual(recorder.get_count("c"), 0)
+
+        stage_percentiles = recorder.get_percentiles()
+        self.assertEqual(list(stage_percentiles), ["a", "b"])
+        for stage_name, durations in (
+            ("a", a_durations),
+            ("b", b_durations[-size:]),
+        ):
+            percentiles = stage_percentiles[stage_name]
+            self.assertEqual(tuple(percentiles), mthexapod.LATENCY_PERCENTILES)
+            for percentile, value in percentiles.items():
+                self.assertAlmostEqual(value, np.percentile(durations, percentile))
+
+        percentiles = recorder.get_percentiles(percentiles=[0, 100])["a"]
+        self.assertAlmostEqual(percentiles[0], a_durations[0])
+        self.assertAlmostEqual(percentiles[100], a_durations[-1])
+
+        recorder.clear()
+        self.assertEqual(recorder.get_percentiles(), dict())
+        self.assertEqual(recorder.get_count("a"), 0)
+
+    def test_log(self):
+        log = logging.getLogger("test_log")
+        recorder = mthexapod.LatencyRecorder(
+            stage_names=["a"], log=log, log_interval=0, name="Test"
+        )
+        recorder.record("a", 0.0025)
+        with self.assertLogs(log, level=logging.INFO) as logs:
+            recorder.maybe_log()
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn(
+            "Test latency p50/p95/p99 (msec): a=2.50/2.50/2.50", logs.output[0]
+        )
+
+        # No logging if log_interval is None or has not elapsed.
+        for log_interval in (None, 1000):
+            recorder.log_interval = log_interval
+            with self.assertRaises(AssertionError):
+                with self.assertLogs(log, level=logging.INFO):
+                    recorder.maybe_log()
+
+
+if __name__ == "__main__":
+    unittest.main()
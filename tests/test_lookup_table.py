@@ -0,0 +1,85 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import unittest
+
+import numpy as np
+
+from lsst.ts import mthexapod
+
+
+class LookupTableTestCase(unittest.TestCase):
+    def setUp(self):
+        self.compensation = mthexapod.Compensation(
+            elevation_coeffs=[[0.11, 0.12, 0.013], [0.21, 0.22]] + [[0.3, 0.01]] * 4,
+            azimuth_coeffs=[[0.11, 0.12], [0.21, 0.22, -0.011]] + [[0.1]] * 4,
+            rotation_coeffs=[[0.31, 0.32, 0.013, 0.0014]] * 6,
+            temperature_coeffs=[[0.41, -0.42, 0.043]] * 3 + [[0.51, -0.52]] * 3,
+            min_temperature=-20,
+            max_temperature=25,
+        )
+
+    def test_make_lookup_tables(self):
+        tables = mthexapod.make_lookup_tables(self.compensation)
+        for prefix, cause, nelements, min_value, max_value in (
+            ("el_lut", "elevation", mthexapod.ELEVATION_ELEMENTS, 0, 90),
+            ("az_lut", "azimuth", mthexapod.AZIMUTH_ELEMENTS, 0, 360),
+            ("temp_lut", "temperature", mthexapod.TEMPERATURE_ELEMENTS, -20, 25),
+        ):
+            index = tables[f"{prefix}_index"]
+            self.assertEqual(len(index), nelements)
+            self.assertAlmostEqual(index[0], min_value)
+            self.assertAlmostEqual(index[-1], max_value)
+            cause_offsets = self.compensation.get_cause_offsets(
+                cause=cause, values=index
+            )
+            for i, axis_name in enumerate(("x", "y", "z", "u", "v", "w")):
+                values = tables[f"{prefix}_{axis_name}"]
+                self.assertEqual(len(values), nelements)
+                np.testing.assert_allclose(values, cause_offsets[:, i])
+
+    def test_set_config_lookup_tables(self):
+        config = mthexapod.Config()
+        mthexapod.set_config_lookup_tables(config, self.compensation)
+        for name, values in mthexapod.make_lookup_tables(self.compensation).items():
+            np.testing.assert_allclose(getattr(config, name), values)
+
+    def test_cross_terms(self):
+        compensation = mthexapod.Compensation(
+            elevation_coeffs=[[0.11, 0.12, 0.013], [0.21, 0.22]] + [[0.3, 0.01]] * 4,
+            azimuth_coeffs=[[0.11, 0.12], [0.21, 0.22, -0.011]] + [[0.1]] * 4,
+            rotation_coeffs=[[0.31, 0.32, 0.013, 0.0014]] * 6,
+            temperature_coeffs=[[0.41, -0.42, 0.043]] * 3 + [[0.51, -0.52]] * 3,
+            min_temperature=-20,
+            max_temperature=25,
+            cross_terms=[
+                dict(causes=["elevation", "temperature"], coeffs=[[[0.001]]] * 6)
+            ],
+        )
+        with self.assertWarns(RuntimeWarning):
+            tables = mthexapod.make_lookup_tables(compensation)
+        # Cross terms are omitted.
+        for name, values in mthexapod.make_lookup_tables(self.compensation).items():
+            np.testing.assert_allclose(tables[name], values)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,258 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import contextlib
+import dataclasses
+import io
+import pathlib
+import tempfile
+import unittest
+
+import numpy as np
+
+from lsst.ts import mthexapod
+
+config_path = pathlib.Path(__file__).parent / "data" / "config" / "valid.yaml"
+
+
+class NightReplayTestCase(unittest.TestCase):
+    def setUp(self):
+        self.config = mthexapod.load_csc_config(
+            path=config_path, index=mthexapod.SalIndex.CAMERA_HEXAPOD
+        )
+        self.compensation = mthexapod.Compensation.from_config(self.config)
+        self.uncompensated_position = mthexapod.Position(
+            *self.config["reference_position"]
+        )
+        self.position_limits = mthexapod.MAX_POSITION_LIMITS[
+            mthexapod.SalIndex.CAMERA_HEXAPOD
+        ]
+        nrows = 25
+        self.data = dict(
+            tai=1.6e9 + np.arange(nrows, dtype=float),
+            elevation=np.linspace(10, 85, nrows),
+            azimuth=np.linspace(-30, 200, nrows),
+            rotation=np.linspace(-60, 70, nrows),
+            temperature=np.linspace(-5, 15, nrows),
+        )
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = pathlib.Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_csv(self, names):
+        path = self.data_dir / "targets.csv"
+        data = np.column_stack([self.data[name] for name in names])
+        np.savetxt(
+            path, data, delimiter=",", header=",".join(names), comments="", fmt="%.17g"
+        )
+        return path
+
+    def test_read_target_chunks(self):
+        names = ("tai", "elevation", "azimuth", "rotation", "temperature")
+        csv_path = self.write_csv(names)
+        npz_path = self.data_dir / "targets.npz"
+        np.savez_compressed(npz_path, **self.data)
+        npy_path = self.data_dir / "targets.npy"
+        np.save(npy_path, self.data["tai"])
+
+        for path in (csv_path, npz_path):
+            for chunk_size in (1, 7, 25, 100):
+                with self.subTest(path=path.name, chunk_size=chunk_size):
+                    chunks = list(
+                        mthexapod.read_target_chunks(path, chunk_size=chunk_size)
+                    )
+                    self.assertEqual(len(chunks), int(np.ceil(25 / chunk_size)))
+                    for chunk in chunks:
+                        self.assertLessEqual(len(chunk["tai"]), chunk_size)
+                    for name in names:
+                        data = np.concatenate([chunk[name] for chunk in chunks])
+                        np.testing.assert_allclose(data, self.data[name])
+
+        with self.assertRaises(ValueError):
+            list(mthexapod.read_target_chunks(npy_path))
+        with self.assertRaises(ValueError):
+            list(mthexapod.read_target_chunks(csv_path, chunk_size=0))
+
+    def test_read_target_chunks_missing_data(self):
+        # Temperature is optional.
+        csv_path = self.write_csv(("tai", "rotation", "elevation", "azimuth"))
+        npz_path = self.data_dir / "targets.npz"
+        np.savez(
+            npz_path,
+            **{
+                name: self.data[name]
+                for name in ("tai", "elevation", "azimuth", "rotation")
+            },
+        )
+        for path in (csv_path, npz_path):
+            with self.subTest(path=path.name):
+                chunks = list(mthexapod.read_target_chunks(path, chunk_size=10))
+                for chunk in chunks:
+                    np.testing.assert_allclose(chunk["temperature"], 0)
+                data = np.concatenate([chunk["rotation"] for chunk in chunks])
+                np.testing.assert_allclose(data, self.data["rotation"])
+
+        # Other data is required.
+        csv_path = self.write_csv(("tai", "elevation", "azimuth", "temperature"))
+        npz_path = self.data_dir / "bad_targets.npz"
+        np.savez(
+            npz_path,
+            **{name: self.data[name] for name in ("tai", "elevation", "rotation")},
+        )
+        for path in (csv_path, npz_path):
+            with self.subTest(path=path.name):
+                with self.assertRaises(ValueError):
+                    list(mthexapod.read_target_chunks(path))
+
+    def test_replay_night(self):
+        npz_path = self.data_dir / "targets.npz"
+        np.savez(npz_path, **self.data)
+        output_path = self.data_dir / "replay.csv"
+        # Use limits small enough to have some violations.
+        position_limits = mthexapod.PositionLimits(
+            maxXY=100, minZ=-100, maxZ=100, maxUV=0.01, minW=-0.01, maxW=0.01
+        )
+
+        summaries = [
+            mthexapod.replay_night(
+                path=npz_path,
+                compensation=self.compensation,
+                uncompensated_position=self.uncompensated_position,
+                position_limits=position_limits,
+                output_path=output_path,
+                chunk_size=chunk_size,
+            )
+            for chunk_size in (4, 100)
+        ]
+
+        offsets = self.compensation.get_offsets(
+            elevation=self.data["elevation"],
+            azimuth=self.data["azimuth"],
+            rotation=self.data["rotation"],
+            temperature=self.data["temperature"],
+        )
+        desired_positions = offsets + dataclasses.astuple(self.uncompensated_position)
+        desired_moves = np.diff(
+            desired_positions, axis=0, prepend=desired_positions[:1]
+        )
+        desired_violations = mthexapod.get_position_limit_violations(
+            positions=desired_positions, limits=position_limits
+        )
+        self.assertGreater(np.count_nonzero(desired_violations), 0)
+
+        for summary in summaries:
+            self.assertEqual(summary.num_targets, 25)
+            self.assertEqual(
+                summary.num_bad_targets,
+                np.count_nonzero(np.any(desired_violations, axis=1)),
+            )
+            np.testing.assert_equal(
+                summary.num_violations, np.count_nonzero(desired_violations, axis=0)
+            )
+            np.testing.assert_allclose(
+                summary.min_position, desired_positions.min(axis=0)
+            )
+            np.testing.assert_allclose(
+                summary.max_position, desired_positions.max(axis=0)
+            )
+            np.testing.assert_allclose(
+                summary.max_move, np.abs(desired_moves).max(axis=0)
+            )
+            np.testing.assert_allclose(
+                summary.sum_move, np.abs(desired_moves).sum(axis=0)
+            )
+            self.assertEqual(summary.num_clamped, 0)
+
+        output = np.genfromtxt(output_path, delimiter=",", names=True)
+        self.assertEqual(len(output), 25)
+        np.testing.assert_allclose(output["elevation"], self.data["elevation"])
+        for i, name in enumerate(mthexapod.Position.field_names()):
+            np.testing.assert_allclose(
+                output[f"compensated_{name}"], desired_positions[:, i]
+            )
+            np.testing.assert_allclose(
+                output[f"move_{name}"], desired_moves[:, i], atol=1e-8
+            )
+        np.testing.assert_equal(
+            output["num_violations"], np.count_nonzero(desired_violations, axis=1)
+        )
+
+    def test_replay_elevation_out_of_range(self):
+        """Elevation slightly out of range is clamped to [0, 90]."""
+        elevation = self.data["elevation"].copy()
+        elevation[0] = -1e-6
+        elevation[-1] = 90.001
+        chunk = dict(self.data, elevation=elevation)
+        chunk_results = list(
+            mthexapod.replay_target_chunks(
+                compensation=self.compensation,
+                chunks=[chunk],
+                uncompensated_position=self.uncompensated_position,
+                position_limits=self.position_limits,
+            )
+        )
+        self.assertEqual(len(chunk_results), 1)
+        chunk_result = chunk_results[0]
+        self.assertEqual(chunk_result["num_clamped"], 2)
+        np.testing.assert_array_equal(chunk_result["elevation"], elevation)
+        offsets = self.compensation.get_offsets(
+            elevation=np.clip(elevation, 0, 90),
+            azimuth=self.data["azimuth"],
+            rotation=self.data["rotation"],
+            temperature=self.data["temperature"],
+        )
+        np.testing.assert_allclose(
+            chunk_result["compensated_positions"],
+            offsets + dataclasses.astuple(self.uncompensated_position),
+        )
+
+        summary = mthexapod.ReplaySummary()
+        summary.update(chunk_result)
+        self.assertEqual(summary.num_clamped, 2)
+        self.assertIn("2 had elevation clamped", summary.format())
+
+    def test_run_night_replay(self):
+        csv_path = self.write_csv(
+            ("tai", "elevation", "azimuth", "rotation", "temperature")
+        )
+        output_path = self.data_dir / "replay.csv"
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            mthexapod.run_night_replay(
+                [
+                    str(config_path),
+                    str(int(mthexapod.SalIndex.CAMERA_HEXAPOD)),
+                    str(csv_path),
+                    "--output",
+                    str(output_path),
+                    "--chunk-size",
+                    "10",
+                ]
+            )
+        self.assertIn("Replayed 25 targets", stdout.getvalue())
+        output = np.genfromtxt(output_path, delimiter=",", names=True)
+        self.assertEqual(len(output), 25)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -61,6 +61,27 @@ class RangedPolynomialTestCase(unittest.TestCase):
             pred_value = poly(max_x) + (x - max_x) * coeffs[1]
             self.assertAlmostEqual(poly(x), pred_value)
 
+    def test_array(self):
+        coeffs = [-0.5, 0.4, -0.3, 0.2]
+        min_x = -10
+        max_x = 10
+        poly = mthexapod.RangedPolynomial(coeffs=coeffs, min_x=min_x, max_x=max_x)
+        xarr = np.linspace(min_x - 10, max_x + 10, num=50)
+        values = poly(xarr)
+        self.assertEqual(values.shape, xarr.shape)
+        for x, value in zip(xarr, values):
+            self.assertAlmostEqual(value, poly(x))
+
+        xarr2d = xarr.reshape(5, 10)
+        values2d = poly(xarr2d)
+        self.assertEqual(values2d.shape, xarr2d.shape)
+        np.testing.assert_allclose(values2d.ravel(), values)
+
+        # Scalar inputs give scalar outputs
+        for x in (min_x - 1, 0, max_x + 1):
+            self.assertEqual(np.ndim(poly(x)), 0)
+            self.assertIsInstance(poly(x), float)
+
     def test_one_coeff(self):
         """Test that a ranged polynomial with only one coffficient
         is constant everywhere.
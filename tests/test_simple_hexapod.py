@@ -73,6 +73,38 @@ class SimpleHexapodTestCase(asynctest.TestCase):
             absolute_actuator_lengths, model.neutral_actuator_lengths, atol=1e-7
         )
 
+    def test_compute_actuator_lengths_array(self):
+        max_length = 10e6  # big enough to not be a problem
+        model = mthexapod.SimpleHexapod(
+            base_positions=[np.random.normal(size=3) for i in range(6)],
+            mirror_positions=[np.random.normal(size=3) for i in range(6)],
+            pivot=np.random.normal(size=3),
+            min_length=-max_length,
+            max_length=max_length,
+            speed=5e6,
+        )
+        npositions = 20
+        positions = np.concatenate(
+            (
+                np.random.uniform(-1, 1, size=(npositions, 3)),
+                np.random.uniform(-45, 45, size=(npositions, 3)),
+            ),
+            axis=1,
+        )
+        for absolute in (False, True):
+            actuator_lengths = model.compute_actuator_lengths_array(
+                positions, absolute=absolute
+            )
+            self.assertEqual(actuator_lengths.shape, (npositions, 6))
+            for position, lengths in zip(positions, actuator_lengths):
+                mirror_positions = model.compute_mirror_positions(
+                    pos=position[:3], xyzrot=position[3:]
+                )
+                predicted_lengths = model.compute_actuator_lengths(
+                    mirror_positions=mirror_positions, absolute=absolute
+                )
+                np.testing.assert_allclose(lengths, predicted_lengths)
+
     def test_constructor_errors(self):
         # Use default position limits large enough to not be a problem
         max_length = 10e6
@@ -0,0 +1,211 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import contextlib
+import dataclasses
+import io
+import itertools
+import pathlib
+import tempfile
+import unittest
+
+import numpy as np
+
+from lsst.ts import mthexapod
+
+config_path = pathlib.Path(__file__).parent / "data" / "config" / "valid.yaml"
+
+
+class SkyGridTestCase(unittest.TestCase):
+    def setUp(self):
+        self.config = mthexapod.load_csc_config(
+            path=config_path, index=mthexapod.SalIndex.CAMERA_HEXAPOD
+        )
+        self.compensation = mthexapod.Compensation.from_config(self.config)
+        self.hexapod = mthexapod.make_simple_hexapod()
+        self.uncompensated_position = mthexapod.Position(
+            *self.config["reference_position"]
+        )
+        self.position_limits = mthexapod.MAX_POSITION_LIMITS[
+            mthexapod.SalIndex.CAMERA_HEXAPOD
+        ]
+        self.grid_axes = [
+            mthexapod.make_grid_axis(0, 90, 45),
+            mthexapod.make_grid_axis(0, 360, 120),
+            mthexapod.make_grid_axis(-90, 90, 90),
+            mthexapod.make_grid_axis(-20, 25, 45),
+        ]
+
+    def test_make_grid_axis(self):
+        np.testing.assert_allclose(mthexapod.make_grid_axis(0, 90, 30), [0, 30, 60, 90])
+        np.testing.assert_allclose(mthexapod.make_grid_axis(0, 90, 40), [0, 30, 60, 90])
+        np.testing.assert_allclose(mthexapod.make_grid_axis(5, 5, 1), [5])
+        with self.assertRaises(ValueError):
+            mthexapod.make_grid_axis(0, 90, 0)
+        with self.assertRaises(ValueError):
+            mthexapod.make_grid_axis(90, 0, 10)
+
+    def test_compute_sky_grid(self):
+        grid_shape = tuple(len(axis) for axis in self.grid_axes)
+        results = mthexapod.compute_sky_grid(
+            compensation=self.compensation,
+            hexapod=self.hexapod,
+            uncompensated_position=self.uncompensated_position,
+            position_limits=self.position_limits,
+            grid_axes=self.grid_axes,
+            max_workers=0,
+            shard_size=7,
+        )
+        for name, axis in zip(mthexapod.CAUSE_NAMES, self.grid_axes):
+            np.testing.assert_equal(results[name], axis)
+        for name in (
+            "offsets",
+            "compensated_positions",
+            "actuator_lengths",
+            "position_violations",
+            "actuator_violations",
+        ):
+            self.assertEqual(results[name].shape, grid_shape + (6,))
+
+        for indices in itertools.product(*[range(n) for n in grid_shape]):
+            inputs = mthexapod.CompensationInputs(
+                *[axis[i] for axis, i in zip(self.grid_axes, indices)]
+            )
+            offset = self.compensation.get_offset(inputs)
+            np.testing.assert_allclose(
+                results["offsets"][indices], dataclasses.astuple(offset)
+            )
+            compensated_position = self.uncompensated_position + offset
+            np.testing.assert_allclose(
+                results["compensated_positions"][indices],
+                dataclasses.astuple(compensated_position),
+            )
+            mirror_positions = self.hexapod.compute_mirror_positions(
+                pos=dataclasses.astuple(compensated_position)[:3],
+                xyzrot=dataclasses.astuple(compensated_position)[3:],
+            )
+            np.testing.assert_allclose(
+                results["actuator_lengths"][indices],
+                self.hexapod.compute_actuator_lengths(
+                    mirror_positions=mirror_positions, absolute=False
+                ),
+            )
+            try:
+                mthexapod.check_position(
+                    position=compensated_position, limits=self.position_limits
+                )
+                self.assertFalse(np.any(results["position_violations"][indices]))
+            except ValueError:
+                self.assertTrue(np.any(results["position_violations"][indices]))
+
+        # A process pool gives the same results
+        pool_results = mthexapod.compute_sky_grid(
+            compensation=self.compensation,
+            hexapod=self.hexapod,
+            uncompensated_position=self.uncompensated_position,
+            position_limits=self.position_limits,
+            grid_axes=self.grid_axes,
+            max_workers=2,
+            shard_size=10,
+        )
+        for name, value in results.items():
+            np.testing.assert_equal(pool_results[name], value)
+
+    def test_limit_violations(self):
+        # Put the uncompensated position at the x limit,
+        # so compensation pushes some grid points past it.
+        uncompensated_position = mthexapod.Position(
+            self.position_limits.maxXY, 0, 0, 0, 0, 0
+        )
+        results = mthexapod.compute_sky_grid(
+            compensation=self.compensation,
+            hexapod=self.hexapod,
+            uncompensated_position=uncompensated_position,
+            position_limits=self.position_limits,
+            grid_axes=self.grid_axes,
+            max_workers=0,
+        )
+        position_violations = results["position_violations"]
+        np.testing.assert_equal(
+            position_violations[..., 0], results["offsets"][..., 0] > 0
+        )
+        self.assertFalse(np.any(position_violations[..., 1:]))
+
+        # Use a hexapod with very short actuators,
+        # so some actuator lengths are out of range.
+        max_length = 100
+        controller_class = mthexapod.MockMTHexapodController
+        hexapod = mthexapod.SimpleHexapod(
+            base_positions=controller_class.actuator_base_positions,
+            mirror_positions=controller_class.actuator_mirror_positions,
+            pivot=controller_class.pivot,
+            min_length=-max_length,
+            max_length=max_length,
+            speed=controller_class.actuator_speed,
+        )
+        results = mthexapod.compute_sky_grid(
+            compensation=self.compensation,
+            hexapod=hexapod,
+            uncompensated_position=self.uncompensated_position,
+            position_limits=self.position_limits,
+            grid_axes=self.grid_axes,
+            max_workers=0,
+        )
+        actuator_violations = results["actuator_violations"]
+        self.assertTrue(np.any(actuator_violations))
+        np.testing.assert_equal(
+            actuator_violations, np.abs(results["actuator_lengths"]) > max_length
+        )
+
+    def test_run_sky_grid(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            output_path = pathlib.Path(tempdir) / "grid.npz"
+            with contextlib.redirect_stdout(io.StringIO()) as stdout:
+                mthexapod.run_sky_grid(
+                    [
+                        str(config_path),
+                        "1",
+                        str(output_path),
+                        "--steps",
+                        "45",
+                        "120",
+                        "90",
+                        "45",
+                        "--max-workers",
+                        "0",
+                    ]
+                )
+            self.assertIn("position_violations", stdout.getvalue())
+            with np.load(output_path) as data:
+                for name, axis in zip(mthexapod.CAUSE_NAMES, self.grid_axes):
+                    if name == "rotation":
+                        np.testing.assert_allclose(data[name], [-180, -90, 0, 90, 180])
+                    else:
+                        np.testing.assert_allclose(data[name], axis)
+                np.testing.assert_allclose(
+                    data["uncompensated_position"],
+                    dataclasses.astuple(self.uncompensated_position),
+                )
+                self.assertEqual(data["offsets"].shape, (3, 4, 5, 2, 6))
+
+
+if __name__ == "__main__":
+    unittest.main()
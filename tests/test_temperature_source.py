@@ -0,0 +1,117 @@
+# This file is part of ts_mthexapod.
+#
+# Developed for the Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import math
+import unittest
+
+from lsst.ts import salobj
+from lsst.ts import mthexapod
+from lsst.ts.mthexapod.testutils import MockTemperatureTopic
+
+
+class TemperatureSourceTestCase(unittest.TestCase):
+    def test_null_source(self):
+        source = mthexapod.NullTemperatureSource()
+        self.assertEqual(source.temperature, 0)
+        self.assertIsNone(source.max_age)
+        self.assertEqual(source.get_age(), 0)
+        self.assertFalse(source.is_stale(current_tai=salobj.current_tai() + 1e6))
+
+    def test_constructor_errors(self):
+        topic = MockTemperatureTopic()
+        for bad_kwargs in (
+            dict(time_constant=-1),
+            dict(max_age=0),
+            dict(max_age=-1),
+        ):
+            with self.subTest(bad_kwargs=bad_kwargs):
+                with self.assertRaises(ValueError):
+                    mthexapod.TopicTemperatureSource(
+                        topic=topic, field_name="temperature", **bad_kwargs
+                    )
+
+    def test_no_smoothing(self):
+        topic = MockTemperatureTopic()
+        source = mthexapod.TopicTemperatureSource(
+            topic=topic, field_name="temperature", max_age=10
+        )
+        self.assertIsNone(source.temperature)
+        self.assertIsNone(source.get_age())
+        self.assertFalse(source.is_stale())
+        self.assertEqual(source.num_samples, 0)
+
+        for i, temperature in enumerate((5.5, -3.2, 12)):
+            topic.publish(temperature=temperature, tai=1000 + i)
+            self.assertEqual(source.temperature, temperature)
+            self.assertEqual(source.tai, 1000 + i)
+            self.assertEqual(source.num_samples, i + 1)
+        self.assertAlmostEqual(source.get_age(current_tai=1005), 3)
+        self.assertFalse(source.is_stale(current_tai=1012))
+        self.assertTrue(source.is_stale(current_tai=1012.001))
+
+    def test_smoothing(self):
+        time_constant = 5
+        topic = MockTemperatureTopic(field_name="temperatureItem")
+        # Data published before the source is constructed
+        # is used as the first sample.
+        topic.publish(temperature=[0, 10, 0], tai=1000)
+        source = mthexapod.TopicTemperatureSource(
+            topic=topic,
+            field_name="temperatureItem",
+            field_index=1,
+            time_constant=time_constant,
+        )
+        self.assertEqual(source.temperature, 10)
+        self.assertEqual(source.num_samples, 1)
+
+        # The weight of a sample depends on the time since the previous one.
+        expected_temperature = 10
+        tai = 1000
+        for dt, temperature in ((1, 20), (5, 20), (0.1, -5), (10, 0)):
+            tai += dt
+            topic.publish(temperature=[0, temperature, 0], tai=tai)
+            weight = 1 - math.exp(-dt / time_constant)
+            expected_temperature += weight * (temperature - expected_temperature)
+            self.assertAlmostEqual(source.temperature, expected_temperature)
+            self.assertEqual(source.tai, tai)
+
+        # A sample with the same (or an earlier) time has no weight.
+        topic.publish(temperature=[0, 100, 0], tai=tai)
+        self.assertAlmostEqual(source.temperature, expected_temperature)
+        self.assertEqual(source.num_samples, 6)
+
+        # A long gap makes the smoothed value approach the new sample.
+        topic.publish(temperature=[0, 100, 0], tai=tai + time_constant * 100)
+        self.assertAlmostEqual(source.temperature, 100)
+
+    def test_close(self):
+        topic = MockTemperatureTopic()
+        source = mthexapod.TopicTemperatureSource(topic=topic, field_name="temperature")
+        self.assertIsNotNone(topic.callback)
+        asyncio.run(source.close())
+        self.assertIsNone(topic.callback)
+        topic.publish(temperature=1)
+        self.assertIsNone(source.temperature)
+
+
+if __name__ == "__main__":
+    unittest.main()
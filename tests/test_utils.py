@@ -19,6 +19,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import dataclasses
 import math
 import unittest
 
@@ -45,6 +46,90 @@ class UtilsTestCase(unittest.TestCase):
             ((0, 1), -90, (1, 0)),
         )
 
+    def test_get_max_move_distance(self):
+        velocity = 10
+        acceleration = 5
+        # Time to reach full velocity
+        accel_duration = velocity / acceleration
+        for duration in (0, 1, 2 * accel_duration, 5, 10):
+            with self.subTest(duration=duration):
+                distance = mthexapod.get_max_move_distance(
+                    velocity=velocity, acceleration=acceleration, duration=duration
+                )
+                if duration <= 2 * accel_duration:
+                    # Accelerate for half the time, decelerate for the rest
+                    predicted_distance = acceleration * (duration / 2) ** 2
+                else:
+                    coast_duration = duration - 2 * accel_duration
+                    predicted_distance = (
+                        velocity * accel_duration + velocity * coast_duration
+                    )
+                self.assertAlmostEqual(distance, predicted_distance)
+
+        for kwargs in (
+            dict(velocity=0, acceleration=1, duration=1),
+            dict(velocity=1, acceleration=0, duration=1),
+            dict(velocity=1, acceleration=1, duration=-1),
+        ):
+            with self.assertRaises(ValueError):
+                mthexapod.get_max_move_distance(**kwargs)
+
+    def test_limit_position_change(self):
+        start = mthexapod.Position(1, 2, 3, 0.1, 0.2, 0.3)
+        max_change = mthexapod.Position(10, 10, 20, 0.01, 0.01, 0.02)
+
+        # Changes within the limits are not altered
+        end = start + mthexapod.Position(-10, 5, 20, 0.01, -0.005, 0)
+        self.assertEqual(
+            mthexapod.limit_position_change(
+                start=start, end=end, max_change=max_change
+            ),
+            end,
+        )
+
+        # Larger changes are scaled down uniformly,
+        # so the direction of the move is unchanged.
+        change = mthexapod.Position(-40, 5, 20, 0.01, -0.005, 0)
+        end = start + change
+        limited_end = mthexapod.limit_position_change(
+            start=start, end=end, max_change=max_change
+        )
+        limited_change = limited_end - start
+        np.testing.assert_allclose(
+            dataclasses.astuple(limited_change),
+            np.multiply(dataclasses.astuple(change), 0.25),
+        )
+
+    def test_get_position_limit_violations(self):
+        limits = mthexapod.PositionLimits(
+            maxXY=10, minZ=-20, maxZ=30, maxUV=0.1, minW=-0.2, maxW=0.3
+        )
+        min_position = mthexapod.Position(-10, -10, -20, -0.1, -0.1, -0.2)
+        max_position = mthexapod.Position(10, 10, 30, 0.1, 0.1, 0.3)
+        positions = [
+            dataclasses.astuple(min_position),
+            dataclasses.astuple(max_position),
+        ]
+        for i, (min_value, max_value) in enumerate(
+            zip(dataclasses.astuple(min_position), dataclasses.astuple(max_position))
+        ):
+            for value in (min_value - 0.001, max_value + 0.001):
+                position = list(dataclasses.astuple(max_position))
+                position[i] = value
+                positions.append(position)
+        violations = mthexapod.get_position_limit_violations(
+            positions=positions, limits=limits
+        )
+        self.assertEqual(violations.shape, (len(positions), 6))
+        for position, position_violations in zip(positions, violations):
+            try:
+                mthexapod.check_position(
+                    position=mthexapod.Position(*position), limits=limits
+                )
+                self.assertFalse(np.any(position_violations))
+            except ValueError:
+                self.assertEqual(np.sum(position_violations), 1)
+
     def test_rot2d(self):
         for xypos, angle, desired_rotxy in self.xyiter():
             with self.subTest(xypos=xypos, angle=angle):
@@ -46,12 +46,44 @@ class ValidationTestCase(unittest.TestCase):
     def test_default(self):
         result = self.validator.validate(None)
         self.assertEqual(result["compensation_interval"], 0.2)
+        self.assertEqual(result["compensation_deadband"], [0, 0, 0, 0, 0, 0])
+        self.assertFalse(result["compensation_predict"])
+        self.assertEqual(result["compensation_lead_time"], 0.2)
+        self.assertIsNone(result["compensation_max_input_age"])
+        self.assertEqual(result["compensation_stale_input_policy"], "refuse")
+        self.assertFalse(result["compensation_rate_limit"])
+        self.assertIsNone(result["compensation_statistics_interval"])
+        self.assertEqual(result["compensation_trigger"], "timer")
+        self.assertEqual(result["compensation_min_spacing"], 0.05)
+        self.assertEqual(result["compensation_max_staleness"], 1)
+        self.assertFalse(result["compensation_adaptive_interval"])
+        self.assertEqual(result["compensation_min_interval"], 0.05)
+        self.assertEqual(result["compensation_max_interval"], 2)
+        self.assertEqual(
+            result["compensation_tolerance"], [1, 1, 1, 0.0001, 0.0001, 0.0001]
+        )
+        self.assertEqual(result["compensation_cache_size"], 0)
+        self.assertEqual(result["compensation_cache_resolution"], [0, 0, 0, 0])
+        self.assertIsNone(result["compensation_grid_steps"])
+        self.assertIsNone(result["compensation_model_cache_dir"])
+        self.assertIsNone(result["compensation_config_path"])
+        self.assertEqual(result["compensation_config_poll_interval"], 1)
+        self.assertIsNone(result["temperature_sal_name"])
+        self.assertEqual(result["temperature_sal_index"], 0)
+        self.assertEqual(result["temperature_topic_name"], "tel_temperature")
+        self.assertEqual(result["temperature_field_name"], "temperature")
+        self.assertIsNone(result["temperature_field_index"])
+        self.assertEqual(result["temperature_time_constant"], 60)
+        self.assertIsNone(result["temperature_max_age"])
         for instance in self.instance_names:
             self.assertEqual(len(result[instance]["reference_position"]), 6)
             self.assertEqual(len(result[instance]["elevation_coeffs"]), 6)
             self.assertEqual(len(result[instance]["azimuth_coeffs"]), 6)
             self.assertEqual(len(result[instance]["rotation_coeffs"]), 6)
             self.assertEqual(len(result[instance]["temperature_coeffs"]), 6)
+            self.assertEqual(result[instance]["azimuth_model"], "polynomial")
+            self.assertEqual(result[instance]["rotation_model"], "polynomial")
+            self.assertEqual(result[instance]["cross_terms"], [])
             self.assertLessEqual(result[instance]["min_temperature"], 0)
             self.assertGreaterEqual(result[instance]["max_temperature"], 20)
 
@@ -116,6 +148,64 @@ class ValidationTestCase(unittest.TestCase):
                     for i in range(6):
                         np.testing.assert_allclose(result[instance][name][i], coeffs[i])
 
+    def test_models_specified(self):
+        defaults = self.validator.validate(None)
+        for instance in self.instance_names:
+            for name, model in itertools.product(
+                ("azimuth_model", "rotation_model"), ("polynomial", "fourier")
+            ):
+                data = copy.deepcopy(defaults)
+                data[instance][name] = model
+                result = self.validator.validate(data)
+                self.assertEqual(result[instance][name], model)
+
+            # The default model is polynomial
+            data = copy.deepcopy(defaults)
+            del data[instance]["azimuth_model"]
+            del data[instance]["rotation_model"]
+            result = self.validator.validate(data)
+            self.assertEqual(result[instance]["azimuth_model"], "polynomial")
+            self.assertEqual(result[instance]["rotation_model"], "polynomial")
+
+            for name, bad_model in itertools.product(
+                ("azimuth_model", "rotation_model"), ("cosine", "", 1)
+            ):
+                data = copy.deepcopy(defaults)
+                data[instance][name] = bad_model
+                with self.assertRaises(jsonschema.exceptions.ValidationError):
+                    self.validator.validate(data)
+
+    def test_cross_terms(self):
+        defaults = self.validator.validate(None)
+        good_cross_terms = [
+            dict(
+                causes=["elevation", "temperature"],
+                coeffs=[[[0]], [[0.1, 0.2], [0.3]], [[0]], [[0]], [[0]], [[0]]],
+            ),
+            dict(causes=["azimuth", "rotation"], coeffs=[[[1.5]]] * 6),
+        ]
+        for instance in self.instance_names:
+            data = copy.deepcopy(defaults)
+            data[instance]["cross_terms"] = good_cross_terms
+            result = self.validator.validate(data)
+            self.assertEqual(result[instance]["cross_terms"], good_cross_terms)
+
+            for bad_cross_term in (
+                dict(causes=["elevation"], coeffs=[[[0]]] * 6),
+                dict(causes=["elevation", "zd"], coeffs=[[[0]]] * 6),
+                dict(causes=["elevation", "azimuth"], coeffs=[[[0]]] * 5),
+                dict(causes=["elevation", "azimuth"], coeffs=[[[0]]] * 5 + [[]]),
+                dict(causes=["elevation", "azimuth"], coeffs=[[[0]]] * 5 + [[[]]]),
+                dict(causes=["elevation", "azimuth"], coeffs=[[0]] * 6),
+                dict(causes=["elevation", "azimuth"]),
+                dict(causes=["elevation", "azimuth"], coeffs=[[[0]]] * 6, extra=1),
+            ):
+                data = copy.deepcopy(defaults)
+                data[instance]["cross_terms"] = [bad_cross_term]
+                with self.subTest(instance=instance, bad_cross_term=bad_cross_term):
+                    with self.assertRaises(jsonschema.exceptions.ValidationError):
+                        self.validator.validate(data)
+
     def test_bad_coeffs(self):
         defaults = self.validator.validate(None)
         for instance in self.instance_names: